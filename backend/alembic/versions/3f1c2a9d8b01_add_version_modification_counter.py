@@ -0,0 +1,32 @@
+"""add modification_counter to procurement_plan_versions
+
+Revision ID: 3f1c2a9d8b01
+Revises: 
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d8b01'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('procurement_plan_versions') as batch_op:
+        batch_op.add_column(
+            sa.Column('modification_counter', sa.Integer(), server_default=sa.text('0'), nullable=False)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('procurement_plan_versions') as batch_op:
+        batch_op.drop_column('modification_counter')
@@ -0,0 +1,36 @@
+"""add normalized search_text columns to reference tables
+
+Revision ID: 7b4e9c2f1a60
+Revises: 3f1c2a9d8b01
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b4e9c2f1a60'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a9d8b01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('enstru', 'kato', 'agsk', 'mkei', 'cost_items', 'source_funding')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Значения заполняются приложением при старте (refresh_search_columns),
+    # поисковые индексы по колонке создает миграция b6d2e8f4a017
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('search_text')
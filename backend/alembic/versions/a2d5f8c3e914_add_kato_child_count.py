@@ -0,0 +1,37 @@
+"""add kato child_count and parent_id index
+
+Revision ID: a2d5f8c3e914
+Revises: 7b4e9c2f1a60
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2d5f8c3e914'
+down_revision: Union[str, Sequence[str], None] = '7b4e9c2f1a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('kato') as batch_op:
+        batch_op.add_column(sa.Column('child_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+        batch_op.create_index('ix_kato_parent_id', ['parent_id'], unique=False)
+    # Первичное заполнение; дальше значения поддерживает приложение при загрузке справочника
+    op.execute(
+        "UPDATE kato SET child_count = "
+        "(SELECT count(*) FROM kato AS child WHERE child.parent_id = kato.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('kato') as batch_op:
+        batch_op.drop_index('ix_kato_parent_id')
+        batch_op.drop_column('child_count')
@@ -0,0 +1,75 @@
+"""add search indexes on reference tables
+
+Revision ID: b6d2e8f4a017
+Revises: f3a9c6e2b185
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2e8f4a017'
+down_revision: Union[str, Sequence[str], None] = 'f3a9c6e2b185'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('enstru', 'kato', 'agsk', 'mkei', 'cost_items', 'source_funding')
+# Справочники с кодом, который ищется по префиксу
+CODE_TABLES = ('enstru', 'kato', 'agsk', 'mkei')
+
+
+def _fts_ddl(table: str) -> list[str]:
+    """Внешняя (external content) FTS5-таблица над search_text и триггеры синхронизации."""
+    fts = f'{table}_fts'
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5(search_text, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+        f"INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END",
+        # Записи, загруженные до миграции
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Приложение при старте только проверяет, какие из этих индексов есть (search_service.detect_search_indexes)
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table in TABLES:
+            op.create_index(
+                f'ix_{table}_search_text_trgm', table, ['search_text'],
+                postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'}
+            )
+        # LIKE 'q%' по коду использует btree только с text_pattern_ops
+        for table in CODE_TABLES:
+            op.create_index(f'ix_{table}_code_prefix', table, ['code'], postgresql_ops={'code': 'text_pattern_ops'})
+    elif dialect == 'sqlite':
+        for table in TABLES:
+            for statement in _fts_ddl(table):
+                op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in reversed(CODE_TABLES):
+            op.drop_index(f'ix_{table}_code_prefix', table_name=table)
+        for table in reversed(TABLES):
+            op.drop_index(f'ix_{table}_search_text_trgm', table_name=table)
+    elif dialect == 'sqlite':
+        for table in reversed(TABLES):
+            fts = f'{table}_fts'
+            for suffix in ('au', 'ad', 'ai'):
+                op.execute(f'DROP TRIGGER {fts}_{suffix}')
+            op.execute(f'DROP TABLE {fts}')
@@ -0,0 +1,36 @@
+"""add kato materialized path
+
+Revision ID: c7e1b4a9d352
+Revises: a2d5f8c3e914
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1b4a9d352'
+down_revision: Union[str, Sequence[str], None] = 'a2d5f8c3e914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Значения заполняет приложение при старте (kato_service.refresh_paths)
+    with op.batch_alter_table('kato') as batch_op:
+        batch_op.add_column(sa.Column('path', sa.String(length=255), nullable=True))
+        batch_op.create_index(
+            'ix_kato_path', ['path'], unique=False,
+            postgresql_ops={'path': 'text_pattern_ops'}
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('kato') as batch_op:
+        batch_op.drop_index('ix_kato_path')
+        batch_op.drop_column('path')
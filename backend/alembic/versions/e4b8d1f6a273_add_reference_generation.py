@@ -0,0 +1,38 @@
+"""add reference_generation table
+
+Revision ID: e4b8d1f6a273
+Revises: c7e1b4a9d352
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8d1f6a273'
+down_revision: Union[str, Sequence[str], None] = 'c7e1b4a9d352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    reference_generation = op.create_table(
+        'reference_generation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(length=32), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Единственная строка поколения: приложение ее только читает (в том числе с реплики)
+    op.bulk_insert(reference_generation, [{'id': 1, 'generation': 1, 'token': uuid.uuid4().hex}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('reference_generation')
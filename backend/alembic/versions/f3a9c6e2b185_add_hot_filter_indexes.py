@@ -0,0 +1,51 @@
+"""add indexes for hot filter columns
+
+Revision ID: f3a9c6e2b185
+Revises: e4b8d1f6a273
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c6e2b185'
+down_revision: Union[str, Sequence[str], None] = 'e4b8d1f6a273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # plan_item_versions.version_id покрыт уникальным ограничением uq_version_item_type,
+    # kato.parent_id — индексом ix_kato_parent_id (a2d5f8c3e914)
+    op.create_index('ix_procurement_plans_created_by', 'procurement_plans', ['created_by'])
+    op.create_index('ix_procurement_plan_versions_plan_active', 'procurement_plan_versions', ['plan_id', 'is_active'])
+    op.create_index(
+        'ix_plan_item_versions_version_type_number', 'plan_item_versions',
+        ['version_id', 'need_type', 'item_number']
+    )
+    op.create_index(
+        'ix_plan_item_versions_version_not_deleted', 'plan_item_versions', ['version_id'],
+        postgresql_where=sa.text('is_deleted = false'),
+        sqlite_where=sa.text('is_deleted = 0'),
+    )
+    op.create_index('ix_plan_item_versions_kato_delivery_id', 'plan_item_versions', ['kato_delivery_id'])
+    op.create_index('ix_plan_item_versions_kato_purchase_id', 'plan_item_versions', ['kato_purchase_id'])
+    op.create_index('ix_plan_item_executions_plan_item_id', 'plan_item_executions', ['plan_item_id'])
+    op.create_index('ix_reestr_ktp_enstru_code', 'reestr_ktp', ['enstru_code'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reestr_ktp_enstru_code', table_name='reestr_ktp')
+    op.drop_index('ix_plan_item_executions_plan_item_id', table_name='plan_item_executions')
+    op.drop_index('ix_plan_item_versions_kato_purchase_id', table_name='plan_item_versions')
+    op.drop_index('ix_plan_item_versions_kato_delivery_id', table_name='plan_item_versions')
+    op.drop_index('ix_plan_item_versions_version_not_deleted', table_name='plan_item_versions')
+    op.drop_index('ix_plan_item_versions_version_type_number', table_name='plan_item_versions')
+    op.drop_index('ix_procurement_plan_versions_plan_active', table_name='procurement_plan_versions')
+    op.drop_index('ix_procurement_plans_created_by', table_name='procurement_plans')
@@ -0,0 +1,170 @@
+"""
+Нагрузочный тест: синхронный и асинхронный путь к БД под конкурентной нагрузкой.
+
+Поднимает uvicorn (один воркер, отдельный процесс) с двумя одинаковыми эндпоинтами — `def` поверх
+SessionLocal и `async def` поверх AsyncSession (async_service.run_sync_service) —
+и обстреливает каждый из них N параллельными клиентами (потоки + http.client).
+Оба эндпоинта возвращают сводку по планам первого пользователя из БД (DATABASE_URL).
+
+Задержка БД (--db-latency, мс) добавляется в каждый запрос: pg_sleep в PostgreSQL,
+функция bench_sleep в SQLite. Синхронные эндпоинты ограничены пулом потоков
+Starlette (--threadpool, по умолчанию 40), поэтому при задержке БД и числе клиентов
+больше размера пула асинхронный путь обслуживает больше запросов в секунду.
+
+Оба пути делят пул соединений (DB_POOL_SIZE + DB_MAX_OVERFLOW), поэтому для
+сравнения он должен быть не меньше числа клиентов.
+
+Запуск из каталога backend:
+    DB_POOL_SIZE=200 DB_MAX_OVERFLOW=0 python -m benchmarks.bench_async_endpoints \
+        --concurrency 200 --requests 2000 --db-latency 50
+"""
+import argparse
+import http.client
+import multiprocessing
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.database.async_database import get_async_db, get_async_engine
+from src.database.database import DB_MAX_OVERFLOW, DB_POOL_SIZE, engine, get_db, SessionLocal
+from src.models.models import User
+from src.services import async_service, plan_service
+
+
+def _latency_statement(dialect: str) -> str:
+    if dialect == "postgresql":
+        return "SELECT pg_sleep(:ms / 1000.0)"
+    return "SELECT bench_sleep(:ms)"
+
+
+def _install_sqlite_sleep(target_engine):
+    """Функция bench_sleep(ms) для SQLite: имитирует медленный запрос на стороне БД."""
+    @event.listens_for(target_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+def build_app(user_id: int, db_latency_ms: float, threadpool: int) -> FastAPI:
+    user = SessionLocal().get(User, user_id)
+    statement = text(_latency_statement(engine.dialect.name))
+
+    def summaries(db: Session):
+        if db_latency_ms:
+            db.execute(statement, {"ms": db_latency_ms})
+        return plan_service.get_plan_summaries_by_user(db, user=user, limit=20)
+
+    app = FastAPI()
+
+    @app.on_event("startup")
+    async def set_threadpool_size():
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool
+
+    @app.get("/sync")
+    def sync_endpoint(db: Session = Depends(get_db)):
+        return summaries(db)
+
+    @app.get("/async")
+    async def async_endpoint(db: AsyncSession = Depends(get_async_db)):
+        return await async_service.run_sync_service(db, summaries)
+
+    return app
+
+
+def serve(user_id: int, db_latency_ms: float, threadpool: int, port: int):
+    """Процесс сервера: отдельный от клиентов, чтобы они не делили GIL."""
+    # Соединения, унаследованные от родительского процесса, не используем
+    engine.dispose(close=False)
+    if engine.dialect.name == "sqlite":
+        _install_sqlite_sleep(engine)
+        _install_sqlite_sleep(get_async_engine().sync_engine)
+    app = build_app(user_id, db_latency_ms, threadpool)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_for_server(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            http.client.HTTPConnection("127.0.0.1", port, timeout=1).connect()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit("Сервер не запустился")
+
+
+def fire(port: int, path: str, requests_count: int, concurrency: int) -> dict:
+    local = threading.local()
+
+    def one_request(_) -> tuple[float, bool]:
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        started = time.perf_counter()
+        try:
+            local.conn.request("GET", path)
+            response = local.conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            local.conn.close()
+            del local.conn
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_request, range(requests_count)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for seconds, ok in results if ok)
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синхронный и асинхронный путь к БД под нагрузкой")
+    parser.add_argument("--concurrency", type=int, default=200, help="Количество параллельных клиентов")
+    parser.add_argument("--requests", type=int, default=2000, help="Количество запросов на каждый режим")
+    parser.add_argument("--db-latency", type=float, default=50, help="Искусственная задержка БД на запрос, мс")
+    parser.add_argument("--threadpool", type=int, default=40, help="Размер пула потоков для def-эндпоинтов")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user = db.query(User).order_by(User.id).first()
+    db.close()
+    if user is None:
+        raise SystemExit("В БД нет пользователей: сначала заполните ее")
+
+    server = multiprocessing.Process(
+        target=serve, args=(user.id, args.db_latency, args.threadpool, args.port), daemon=True
+    )
+    server.start()
+    wait_for_server(args.port)
+    try:
+        print(f"Клиентов: {args.concurrency}, запросов: {args.requests}, задержка БД: {args.db_latency} мс, "
+              f"пул потоков: {args.threadpool}, пул соединений: {DB_POOL_SIZE}+{DB_MAX_OVERFLOW}")
+        for path in ("/sync", "/async"):
+            fire(args.port, path, min(args.requests, args.concurrency), args.concurrency)  # прогрев
+            result = fire(args.port, path, args.requests, args.concurrency)
+            print(f"{path:<8} {result['rps']:9.1f} запр/с  p50 {result['p50'] * 1000:8.1f} мс  "
+                  f"p95 {result['p95'] * 1000:8.1f} мс  ошибок {result['errors']}")
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
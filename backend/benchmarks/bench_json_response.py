@@ -0,0 +1,103 @@
+"""
+Бенчмарк сериализации больших ответов API.
+
+Сравнивает стандартный путь FastAPI (JSONResponse поверх json.dumps) с FastJSONResponse
+(orjson) на синтетическом плане с активной версией и N позициями.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_json_response --items 2000 --repeat 20
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.schemas import plan as plan_schema
+from src.utils.responses import FastJSONResponse
+
+
+def build_plan(items_count: int) -> plan_schema.ProcurementPlanWithFullActiveVersion:
+    now = datetime.now(timezone.utc)
+    version = {
+        "id": 1, "plan_id": 1, "version_number": 1, "status": "DRAFT",
+        "total_amount": Decimal("0.00"), "import_percentage": Decimal("12.50"),
+        "vc_percentage": Decimal("87.50"), "vc_amount": Decimal("0.00"),
+        "is_active": True, "is_executed": False, "created_at": now,
+        "creator": {"id": 1, "full_name": "Тестовый пользователь"},
+    }
+    lookups = {
+        "enstru": {"id": 1, "code": "271013.000.000001", "name_rus": "Трансформатор силовой", "name_kaz": "Күштік трансформатор",
+                   "type_name": "GOODS", "detail_rus": "Масляный, 10 кВ", "uom": "796"},
+        "unit": {"id": 1, "code": "796", "name_ru": "Штука", "name_kz": "Дана"},
+        "expense_item": {"id": 1, "name_ru": "Прочие расходы", "name_kz": "Басқа шығыстар"},
+        "funding_source": {"id": 1, "name_ru": "Собственные средства", "name_kz": "Меншікті қаражат"},
+        "kato_purchase": {"id": 1, "code": "750000000", "name_ru": "г. Алматы", "name_kz": "Алматы қ."},
+        "kato_delivery": {"id": 1, "code": "750000000", "name_ru": "г. Алматы", "name_kz": "Алматы қ."},
+    }
+    items = []
+    for i in range(1, items_count + 1):
+        items.append({
+            "id": i, "version_id": 1, "item_number": i, "need_type": "Товар", "trucode": "271013.000.000001",
+            "quantity": Decimal("12.500"), "price_per_unit": Decimal("15400.00"), "total_amount": Decimal("192500.00"),
+            "is_ktp": bool(i % 2), "resident_share": Decimal("100.00"), "is_deleted": False, "created_at": now,
+            "root_item_id": i, "source_version_id": 1, "revision_number": 0,
+            "executed_quantity": Decimal("0.000"), "executed_amount": Decimal("0.00"),
+            "min_dvc_percent": Decimal("55.50"), "vc_amount": Decimal("106837.50"), "start_version_number": 1,
+            "additional_specs": "Дополнительная характеристика позиции", "additional_specs_kz": "Қосымша сипаттама",
+            "version": version, **lookups,
+        })
+    plan = {
+        "id": 1, "plan_name": "Синтетический план", "year": 2025, "created_by": 1, "created_at": now,
+        "versions": [{**version, "items": items}],
+    }
+    return plan_schema.ProcurementPlanWithFullActiveVersion.model_validate(plan)
+
+
+def measure(fn, repeat: int) -> float:
+    fn()  # прогрев
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение JSONResponse и FastJSONResponse")
+    parser.add_argument("--items", type=int, default=2000, help="Количество позиций в версии")
+    parser.add_argument("--repeat", type=int, default=20, help="Количество повторов")
+    args = parser.parse_args()
+
+    plan = build_plan(args.items)
+    adapter = TypeAdapter(plan_schema.ProcurementPlanWithFullActiveVersion)
+    # Так FastAPI готовит содержимое ответа при заданном response_model
+    content = adapter.dump_python(plan, mode="json")
+    # А так — для эндпоинтов без response_model
+    raw_content = plan.model_dump()
+
+    standard_body = JSONResponse(content).body
+    fast_body = FastJSONResponse(content).body
+    assert json.loads(standard_body) == json.loads(fast_body), "Ответы различаются"
+    assert json.loads(FastJSONResponse(raw_content).body) == json.loads(JSONResponse(jsonable_encoder(raw_content)).body)
+
+    results = [
+        ("response_model -> JSONResponse", measure(lambda: JSONResponse(adapter.dump_python(plan, mode="json")), args.repeat)),
+        ("response_model -> FastJSONResponse", measure(lambda: FastJSONResponse(adapter.dump_python(plan, mode="json")), args.repeat)),
+        ("render only: JSONResponse", measure(lambda: JSONResponse(content), args.repeat)),
+        ("render only: FastJSONResponse", measure(lambda: FastJSONResponse(content), args.repeat)),
+        ("dict -> jsonable_encoder -> JSONResponse", measure(lambda: JSONResponse(jsonable_encoder(raw_content)), args.repeat)),
+        ("dict -> FastJSONResponse", measure(lambda: FastJSONResponse(raw_content), args.repeat)),
+    ]
+
+    size_mb = len(standard_body) / 1024 / 1024
+    print(f"Позиций: {args.items}, размер ответа: {size_mb:.2f} МБ, повторов: {args.repeat}")
+    for name, seconds in results:
+        print(f"{name:<45} {seconds * 1000:9.2f} мс  {size_mb / seconds:8.1f} МБ/с")
+
+
+if __name__ == "__main__":
+    main()
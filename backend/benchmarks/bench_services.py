@@ -0,0 +1,388 @@
+"""
+Бенчмарк горячих путей сервисного слоя на синтетических наборах данных разного размера.
+
+Для каждого масштаба (scripts.generate_dataset) набор генерируется один раз в --data-dir,
+а замеры идут на его рабочей копии в отдельном процессе: часть сценариев пишет в БД
+(новая версия, импорт). Каждый сценарий выполняется --repeat раз; в отчете — медиана,
+95-й процентиль и минимум времени, число SQL-запросов и пик выделенной памяти
+(tracemalloc, отдельный прогон). --cases оставляет только сценарии с указанными префиксами.
+
+Результат сравнивается с сохраненной базой (--baseline). Регрессией считается рост
+числа запросов и рост пика памяти больше чем на --tolerance: они от машины почти не зависят.
+Медиана времени сравнивается только с --compare-latency и только с базой, записанной
+(--save-baseline) на той же машине: база в репозитории снята на одной машине с одним CPU.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_services --scales small medium
+    python -m benchmarks.bench_services --scales small --save-baseline
+    python -m benchmarks.bench_services --scales small --compare-latency   # после --save-baseline здесь же
+    # Поиск на полном каталоге справочников (набор в --data-dir; планы уменьшены, генерация — минуты)
+    DATABASE_URL=sqlite:////tmp/baiterek_bench/dataset_full.db python -m scripts.generate_dataset \
+        --scale full --users 5 --large-plans 1 --large-plan-items 1000
+    python -m benchmarks.bench_services --scales full --cases search. --repeat 200
+    python -m benchmarks.bench_services --database-url postgresql://...   # готовая БД (изменяется!)
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_services.json")
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "baiterek_bench")
+# Изменения времени меньше этого порога (мс) не считаются регрессией: шум измерения
+MIN_LATENCY_DELTA_MS = 5.0
+
+
+# ========= Сценарии (выполняются в процессе-исполнителе) =========
+
+class Case(NamedTuple):
+    name: str
+    call: Callable
+    # После каждого повтора: возвращает данные в исходное состояние
+    restore: Callable | None = None
+    # До и после всех повторов сценария
+    setup: Callable | None = None
+    teardown: Callable | None = None
+
+
+def build_import_file(db, version_id: int, rows: int) -> bytes:
+    """Excel в формате шаблона импорта из позиций версии."""
+    import openpyxl
+    from sqlalchemy.orm import aliased
+
+    from src.models import models
+
+    kato_purchase = aliased(models.Kato)
+    kato_delivery = aliased(models.Kato)
+    items = db.query(
+        models.PlanItemVersion, models.Mkei.code, kato_purchase.code, kato_delivery.code
+    ).outerjoin(models.Mkei, models.PlanItemVersion.unit_id == models.Mkei.id).join(
+        kato_purchase, models.PlanItemVersion.kato_purchase_id == kato_purchase.id
+    ).join(
+        kato_delivery, models.PlanItemVersion.kato_delivery_id == kato_delivery.id
+    ).filter(models.PlanItemVersion.version_id == version_id).order_by(models.PlanItemVersion.id).limit(rows).all()
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Позиции для загрузки"
+    ws.append([f"Колонка {index}" for index in range(1, 17)])
+    for number, (item, unit_code, kato_p, kato_d) in enumerate(items, start=1):
+        ws.append([
+            number, item.trucode, None, item.additional_specs or "Характеристика", item.additional_specs_kz or "Сипаттама",
+            f"{unit_code} - ед." if unit_code else None, float(item.quantity), float(item.price_per_unit), None,
+            f"{kato_p} - КАТО", f"{kato_d} - КАТО", f"{item.expense_item_id} - статья", f"{item.funding_source_id} - источник",
+            "Прайс-лист", float(item.resident_share), item.non_resident_reason,
+        ])
+    body = io.BytesIO()
+    wb.save(body)
+    return body.getvalue()
+
+
+def build_cases(db, import_rows: int) -> tuple[dict, list]:
+    """
+    Готовит данные и возвращает (описание выборки, сценарии).
+    Замеры идут на самом большом плане; его активная версия переводится в APPROVED,
+    потому что новая версия создается только из утвержденной.
+    """
+    from fastapi import UploadFile
+    from sqlalchemy import func
+
+    from src.models import models
+    from src.services import (
+        execution_service, import_service, kato_service, kato_tree, plan_service, search_service
+    )
+    from src.utils.auth import Principal
+
+    # Самый большой план по числу позиций активной версии
+    largest = db.query(
+        models.ProcurementPlanVersion, func.count(models.PlanItemVersion.id).label("items")
+    ).join(models.PlanItemVersion, models.PlanItemVersion.version_id == models.ProcurementPlanVersion.id).filter(
+        models.ProcurementPlanVersion.is_active == True
+    ).group_by(models.ProcurementPlanVersion.id).order_by(func.count(models.PlanItemVersion.id).desc()).first()
+    if largest is None:
+        raise SystemExit("В БД нет планов с позициями: сначала заполните ее (scripts.generate_dataset)")
+    version, items_count = largest
+    plan_id = version.plan_id
+    version_id = version.id
+    # Снимок пользователя не привязан к сессии, которую сценарии очищают
+    user = Principal.from_user(version.plan.creator)
+    version.status = models.PlanStatus.APPROVED
+    db.commit()
+
+    item_id = db.query(models.PlanItemExecution.plan_item_id).order_by(models.PlanItemExecution.id).limit(1).scalar()
+    execution_user = Principal.from_user(db.get(models.PlanItemVersion, item_id).version.plan.creator) if item_id else user
+    region_id = db.query(models.Kato.id).filter(models.Kato.parent_id == 0).order_by(models.Kato.id).limit(1).scalar()
+    district_id = db.query(models.Kato.id).filter(models.Kato.parent_id == region_id).order_by(models.Kato.id).limit(1).scalar()
+    leaf_id = db.query(func.max(models.Kato.id)).scalar()
+    import_body = build_import_file(db, version_id, import_rows)
+
+    def with_kato_sql(call):
+        def run():
+            enabled = kato_tree.KATO_TREE_ENABLED
+            kato_tree.KATO_TREE_ENABLED = False
+            try:
+                return call()
+            finally:
+                kato_tree.KATO_TREE_ENABLED = enabled
+        return run
+
+    def new_version():
+        plan_service.create_new_version_for_editing(db, plan_id, user)
+
+    def drop_new_version():
+        plan_service.delete_latest_version(db, plan_id, user)
+
+    def reset_draft():
+        # Черновик без импортированных позиций для следующего повтора
+        drop_new_version()
+        new_version()
+
+    def import_file():
+        upload = UploadFile(file=io.BytesIO(import_body), filename="import.xlsx")
+        return import_service.process_import_file(db, plan_id, upload, user)
+
+    cases = [
+        Case("plan.get_plan_with_active_version", lambda: plan_service.get_plan_with_active_version(db, plan_id)),
+        Case("plan._recalculate_version_metrics", lambda: plan_service._recalculate_version_metrics(db, version_id)),
+        Case("plan.create_new_version_for_editing", new_version, restore=drop_new_version),
+        Case("plan.export_plan_to_excel", lambda: plan_service.export_plan_to_excel(db, plan_id, version_id)),
+        Case("import.generate_import_template", lambda: import_service.generate_import_template(db)),
+        # Импорт возможен только в черновик
+        Case("import.process_import_file", import_file, restore=reset_draft, setup=new_version, teardown=drop_new_version),
+        Case("execution.get_executions_by_item",
+             lambda: execution_service.get_executions_by_item(db, item_id, execution_user) if item_id else None),
+        Case("kato.get_kato_children (tree)", lambda: kato_service.get_kato_children(db, 0)),
+        Case("kato.get_kato_children (sql)", with_kato_sql(lambda: kato_service.get_kato_children(db, district_id))),
+        Case("kato.get_kato_parents (tree)", lambda: kato_service.get_kato_parents(db, leaf_id)),
+        Case("kato.get_kato_parents (sql)", with_kato_sql(lambda: kato_service.get_kato_parents(db, leaf_id))),
+        Case("search.enstru text", lambda: search_service.search(db, "enstru", "кабель силовой")),
+        Case("search.enstru code", lambda: search_service.search(db, "enstru", "1000")),
+        Case("search.kato text", lambda: search_service.search(db, "kato", "район")),
+        Case("search.agsk text", lambda: search_service.search(db, "agsk", "строительный")),
+        Case("search.mkei text", lambda: search_service.search(db, "mkei", "метр")),
+    ]
+    sample = {"plan_id": plan_id, "items": items_count, "import_rows": import_rows}
+    return sample, cases
+
+
+def measure(db, case: Case, repeat: int) -> dict:
+    from src.utils import query_stats
+
+    latencies = []
+    queries = []
+    for _ in range(repeat):
+        stats, token = query_stats.start_request()
+        started = time.perf_counter()
+        try:
+            case.call()
+        finally:
+            elapsed = time.perf_counter() - started
+            query_stats.finish_request(token)
+        db.rollback()
+        db.expunge_all()
+        latencies.append(elapsed * 1000)
+        queries.append(stats.count)
+        if case.restore is not None:
+            case.restore()
+            db.expunge_all()
+
+    tracemalloc.start()
+    try:
+        case.call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    db.rollback()
+    db.expunge_all()
+    if case.restore is not None:
+        case.restore()
+        db.expunge_all()
+
+    return {
+        "median_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0], 2),
+        "min_ms": round(min(latencies), 2),
+        "queries": max(queries),
+        "peak_kb": round(peak / 1024),
+    }
+
+
+def run_worker(repeat: int, import_rows: int, case_prefixes: list[str] | None = None) -> dict:
+    from src.database.database import SessionLocal
+    from src.services import code_index, kato_tree, reference_service
+
+    db = SessionLocal()
+    try:
+        reference_service.load_in_memory_indexes(db)
+        # Проверка поколения справочников раз в несколько секунд делала бы число запросов случайным
+        kato_tree.KATO_TREE_POLL_INTERVAL = float("inf")
+        code_index.CODE_INDEX_POLL_INTERVAL = float("inf")
+        sample, cases = build_cases(db, import_rows)
+        results = {}
+        for case in cases:
+            if case_prefixes and not case.name.startswith(tuple(case_prefixes)):
+                continue
+            if case.setup is not None:
+                case.setup()
+            results[case.name] = result = measure(db, case, repeat)
+            if case.teardown is not None:
+                case.teardown()
+            db.expunge_all()
+            print(f"  {case.name:<40} {result['median_ms']:>10.2f} мс  p95 {result['p95_ms']:>8.2f} мс  запросов {result['queries']:>6}", file=sys.stderr)
+        return {"sample": sample, "cases": results}
+    finally:
+        db.close()
+
+
+# ========= Управляющий процесс =========
+
+def _run(args: list[str], database_url: str, capture: bool = False) -> str:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    result = subprocess.run(
+        [sys.executable, "-m", *args], cwd=BACKEND_DIR, env=env, check=True,
+        stdout=subprocess.PIPE if capture else None, text=True
+    )
+    return result.stdout if capture else ""
+
+
+def ensure_dataset(scale: str, data_dir: str) -> str:
+    """Путь к набору SQLite масштаба scale; генерирует его при первом обращении."""
+    dataset = os.path.join(data_dir, f"dataset_{scale}.db")
+    if not os.path.exists(dataset):
+        print(f"Генерация набора {scale}...", file=sys.stderr)
+        os.makedirs(data_dir, exist_ok=True)
+        partial = f"{dataset}.partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        _run(["scripts.generate_dataset", "--scale", scale], f"sqlite:///{partial}")
+        os.replace(partial, dataset)
+    return dataset
+
+
+def working_copy(dataset: str, name: str) -> str:
+    """Копия набора, которую можно изменять; удаляется через remove_database."""
+    work = os.path.join(os.path.dirname(dataset), name)
+    shutil.copyfile(dataset, work)
+    return work
+
+
+def remove_database(path: str):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def worker_args(repeat: int, import_rows: int, case_prefixes: list[str] | None) -> list[str]:
+    args = ["benchmarks.bench_services", "--worker", "--repeat", str(repeat), "--import-rows", str(import_rows)]
+    if case_prefixes:
+        args += ["--cases", *case_prefixes]
+    return args
+
+
+def run_scale(scale: str, data_dir: str, repeat: int, import_rows: int, case_prefixes: list[str] | None = None) -> dict:
+    work = working_copy(ensure_dataset(scale, data_dir), f"work_{scale}.db")
+    try:
+        output = _run(worker_args(repeat, import_rows, case_prefixes), f"sqlite:///{work}", capture=True)
+    finally:
+        remove_database(work)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, tolerance: float, compare_latency: bool = False) -> list[str]:
+    regressions = []
+    for scale, scale_result in results.items():
+        for name, current in scale_result["cases"].items():
+            base = baseline.get(scale, {}).get("cases", {}).get(name)
+            if base is None:
+                continue
+            if current["queries"] > base["queries"]:
+                regressions.append(f"{scale} / {name}: запросов {base['queries']} -> {current['queries']}")
+            if (compare_latency
+                    and current["median_ms"] > base["median_ms"] * (1 + tolerance)
+                    and current["median_ms"] - base["median_ms"] > MIN_LATENCY_DELTA_MS):
+                regressions.append(f"{scale} / {name}: медиана {base['median_ms']} -> {current['median_ms']} мс")
+            if current["peak_kb"] > base["peak_kb"] * (1 + tolerance) and current["peak_kb"] - base["peak_kb"] > 1024:
+                regressions.append(f"{scale} / {name}: пик памяти {base['peak_kb']} -> {current['peak_kb']} КиБ")
+    return regressions
+
+
+def print_report(results: dict, baseline: dict):
+    for scale, scale_result in results.items():
+        sample = scale_result["sample"]
+        print(f"\n{scale}: план {sample['plan_id']}, позиций {sample['items']}, строк импорта {sample['import_rows']}")
+        print(f"  {'сценарий':<40} {'медиана, мс':>12} {'база':>10} {'p95, мс':>10} {'мин, мс':>10} "
+              f"{'запросов':>9} {'база':>6} {'пик, КиБ':>10}")
+        for name, current in scale_result["cases"].items():
+            base = baseline.get(scale, {}).get("cases", {}).get(name, {})
+            print(f"  {name:<40} {current['median_ms']:>12.2f} {base.get('median_ms', '-'):>10} "
+                  f"{current.get('p95_ms', '-'):>10} {current['min_ms']:>10.2f} {current['queries']:>9} {base.get('queries', '-'):>6} {current['peak_kb']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк горячих путей сервисного слоя")
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"], help="Масштабы scripts.generate_dataset")
+    parser.add_argument("--database-url", help="Готовая БД вместо сгенерированных наборов (будет изменена)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Каталог для сгенерированных наборов SQLite")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--import-rows", type=int, default=500, help="Строк в файле импорта")
+    parser.add_argument("--cases", nargs="+", help="Только сценарии с этими префиксами имени (например, search.)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Записать результаты как новую базу")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Допустимый относительный рост времени и памяти")
+    parser.add_argument("--compare-latency", action="store_true",
+                        help="Сравнивать и медиану времени (база должна быть записана на этой же машине)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.repeat, args.import_rows, args.cases)))
+        return
+
+    results = {}
+    if args.database_url:
+        output = _run(worker_args(args.repeat, args.import_rows, args.cases), args.database_url, capture=True)
+        results["custom"] = json.loads(output.strip().splitlines()[-1])
+    else:
+        for scale in args.scales:
+            print(f"Масштаб {scale}", file=sys.stderr)
+            results[scale] = run_scale(scale, args.data_dir, args.repeat, args.import_rows, args.cases)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        for scale, scale_result in results.items():
+            if args.cases and scale in baseline:
+                # Сценарии, не попавшие в --cases, остаются в базе как были
+                baseline[scale]["cases"].update(scale_result["cases"])
+            else:
+                baseline[scale] = scale_result
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nБаза сохранена: {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance, args.compare_latency)
+    if regressions:
+        print("\nРегрессии:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nРегрессий нет" if baseline else "\nБазы нет: запустите с --save-baseline")
+
+
+if __name__ == "__main__":
+    main()
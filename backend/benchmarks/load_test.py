@@ -0,0 +1,465 @@
+"""
+Нагрузочный сценарий: типичные сессии пользователей портала против uvicorn с приложением main.
+
+Каждый виртуальный пользователь (поток + http.client) входит по ИИН своего пользователя
+из БД и выполняет случайные действия с весами, близкими к реальной работе со сметой:
+список планов, открытие плана, автодополнение справочников (несколько запросов по мере
+набора текста), дерево КАТО, добавление и правка позиций черновика, импорт Excel,
+экспорт и отчеты об исполнении утвержденных позиций. Между действиями — пауза
+(экспоненциальная, в среднем --think секунд). После --session-actions действий
+пользователь входит заново.
+
+Данные — синтетический набор scripts.generate_dataset: по умолчанию берется рабочая копия
+набора --scale из каталога benchmarks.bench_services (сценарий пишет в БД), с --database-url —
+готовая БД, которая будет изменена. Запросы первых --ramp-up секунд (постепенный старт
+пользователей) в отчет не попадают. В отчете — пропускная способность, p50/p95/p99
+и доля ошибок по каждому эндпоинту.
+
+Запуск из каталога backend:
+    python -m benchmarks.load_test --scale small --users 20 --duration 120
+    python -m benchmarks.load_test --database-url postgresql://... --users 100 --workers 4
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from benchmarks.bench_services import (
+    BACKEND_DIR, DEFAULT_DATA_DIR, build_import_file, ensure_dataset, remove_database, working_copy
+)
+
+# Относительная частота действий в сессии
+ACTION_WEIGHTS = {
+    "plan_list": 10,
+    "open_plan": 15,
+    "lookup": 35,
+    "kato_tree": 5,
+    "add_item": 8,
+    "update_item": 10,
+    "import_file": 1,
+    "export": 3,
+    "execution": 8,
+}
+LOOKUP_TABLES = ("enstru", "kato", "mkei", "agsk", "cost-items", "source-funding")
+# Пауза между нажатиями клавиш при автодополнении (с учетом debounce на фронтенде)
+KEYSTROKE_PAUSE = 0.3
+IMPORT_ROWS = 10
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# ========= Данные для сценария =========
+
+@dataclass
+class UserData:
+    iin: str
+    # (plan_id, id активной версии)
+    plans: list = field(default_factory=list)
+    # plan_id -> id позиций активной версии-черновика
+    draft_items: dict = field(default_factory=dict)
+    # Тело для добавления позиции в черновик: копия существующей позиции
+    item_templates: dict = field(default_factory=dict)
+    import_files: dict = field(default_factory=dict)
+    # Позиции утвержденных версий: id -> [остаток количества, цена за единицу]
+    approved_items: dict = field(default_factory=dict)
+
+
+def load_users(count: int, seed: int) -> tuple[list[UserData], dict]:
+    """Пользователи с планами и поисковые строки для автодополнения."""
+    from sqlalchemy import func
+
+    from src.database.database import SessionLocal
+    from src.models import models
+
+    rng = random.Random(seed)
+    db = SessionLocal()
+    try:
+        user_ids = [row[0] for row in db.query(models.ProcurementPlan.created_by).distinct().order_by(
+            models.ProcurementPlan.created_by
+        )]
+        if not user_ids:
+            raise SystemExit("В БД нет планов: сначала заполните ее (scripts.generate_dataset)")
+        users = []
+        for user in db.query(models.User).filter(models.User.id.in_(rng.sample(user_ids, min(count, len(user_ids))))):
+            data = UserData(iin=user.iin)
+            versions = db.query(models.ProcurementPlanVersion).join(models.ProcurementPlan).filter(
+                models.ProcurementPlan.created_by == user.id, models.ProcurementPlanVersion.is_active == True
+            ).all()
+            for version in versions:
+                data.plans.append((version.plan_id, version.id))
+                items = db.query(models.PlanItemVersion).filter(
+                    models.PlanItemVersion.version_id == version.id, models.PlanItemVersion.is_deleted == False
+                ).order_by(models.PlanItemVersion.id).limit(200).all()
+                if not items:
+                    continue
+                if version.status == models.PlanStatus.DRAFT:
+                    data.draft_items[version.plan_id] = [item.id for item in items]
+                    data.item_templates[version.plan_id] = _item_body(items[0])
+                    if not data.import_files:
+                        data.import_files[version.plan_id] = build_import_file(db, version.id, IMPORT_ROWS)
+                elif version.status == models.PlanStatus.APPROVED:
+                    for item in items:
+                        remaining = item.quantity - item.executed_quantity
+                        if remaining >= 1:
+                            data.approved_items[item.id] = [remaining, item.price_per_unit]
+            users.append(data)
+
+        # Поисковые строки: слова из наименований и префиксы кодов
+        terms = {}
+        for table, column, code_column in (
+            ("enstru", models.Enstru.name_rus, models.Enstru.code),
+            ("kato", models.Kato.name_ru, models.Kato.code),
+            ("mkei", models.Mkei.name_ru, models.Mkei.code),
+            ("agsk", models.Agsk.name_ru, models.Agsk.code),
+        ):
+            names = [row[0] for row in db.query(column).order_by(func.random()).limit(200) if row[0]]
+            words = [word for name in names for word in name.split() if len(word) >= 4]
+            codes = [row[0][:4] for row in db.query(code_column).order_by(func.random()).limit(50) if row[0]]
+            terms[table] = words + codes
+        terms["cost-items"] = terms["source-funding"] = []
+        return users, terms
+    finally:
+        db.close()
+
+
+def _item_body(item) -> dict:
+    body = {
+        "trucode": item.trucode, "unit_id": item.unit_id, "expense_item_id": item.expense_item_id,
+        "funding_source_id": item.funding_source_id, "agsk_id": item.agsk_id,
+        "kato_purchase_id": item.kato_purchase_id, "kato_delivery_id": item.kato_delivery_id,
+        "additional_specs": item.additional_specs, "additional_specs_kz": item.additional_specs_kz,
+        "quantity": str(item.quantity), "price_per_unit": str(item.price_per_unit), "is_ktp": item.is_ktp,
+        "resident_share": str(item.resident_share), "non_resident_reason": item.non_resident_reason,
+    }
+    return {key: value for key, value in body.items() if value is not None}
+
+
+# ========= Клиент =========
+
+class Stats:
+    """Задержки и ошибки по эндпоинтам (шаблон пути, а не конкретный URL)."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint: str, started: float, elapsed: float, status: int | None):
+        if started < self.measure_from:
+            return
+        with self.lock:
+            if status is None or status >= 400:
+                self.errors[endpoint][status or "сеть"] += 1
+            else:
+                self.latencies[endpoint].append(elapsed)
+
+
+class VirtualUser:
+    def __init__(self, port: int, data: UserData, terms: dict, stats: Stats, args, rng: random.Random):
+        self.port = port
+        self.data = data
+        self.terms = terms
+        self.stats = stats
+        self.args = args
+        self.rng = rng
+        self.conn = None
+        self.token = None
+        actions = {
+            "plan_list": True, "open_plan": bool(data.plans), "lookup": True, "kato_tree": True,
+            "add_item": bool(data.item_templates), "update_item": bool(data.draft_items),
+            "import_file": bool(data.import_files), "export": bool(data.plans), "execution": bool(data.approved_items),
+        }
+        self.actions = [name for name, available in actions.items() if available]
+        self.weights = [ACTION_WEIGHTS[name] for name in self.actions]
+
+    def request(self, method: str, endpoint: str, path: str, body: bytes | None = None,
+                content_type: str | None = None) -> tuple[int | None, bytes]:
+        headers = {"Accept-Encoding": "gzip"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if content_type:
+            headers["Content-Type"] = content_type
+        started = time.perf_counter()
+        status, payload = None, b""
+        # Сервер закрывает простаивающие keep-alive соединения: как и браузер,
+        # повторяем запрос один раз на новом соединении
+        for _ in range(2):
+            reused = self.conn is not None
+            try:
+                if self.conn is None:
+                    self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=300)
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                payload = response.read()
+                status = response.status
+                break
+            except (OSError, http.client.HTTPException):
+                if self.conn is not None:
+                    self.conn.close()
+                self.conn = None
+                if not reused:
+                    break
+        self.stats.add(f"{method} {endpoint}", started, time.perf_counter() - started, status)
+        return status, payload
+
+    def json_request(self, method: str, endpoint: str, path: str, body: dict):
+        return self.request(method, endpoint, path, json.dumps(body).encode(), "application/json")
+
+    def login(self):
+        self.token = None
+        form = urllib.parse.urlencode({"username": self.data.iin, "password": "load-test"}).encode()
+        status, payload = self.request(
+            "POST", "/api/auth/login", "/api/auth/login", form, "application/x-www-form-urlencoded"
+        )
+        if status == 200:
+            self.token = json.loads(payload)["access_token"]
+
+    def think(self, deadline: float):
+        pause = self.rng.expovariate(1 / self.args.think) if self.args.think > 0 else 0
+        time.sleep(max(0.0, min(pause, deadline - time.monotonic())))
+
+    def run(self, deadline: float):
+        while time.monotonic() < deadline:
+            self.login()
+            self.plan_list()
+            for _ in range(self.args.session_actions):
+                self.think(deadline)
+                if time.monotonic() >= deadline:
+                    break
+                action = self.rng.choices(self.actions, weights=self.weights)[0]
+                getattr(self, action)()
+        if self.conn is not None:
+            self.conn.close()
+
+    # ----- Действия -----
+
+    def plan_list(self):
+        self.request("GET", "/api/plans/summary", "/api/plans/summary?limit=20")
+        if self.rng.random() < 0.3:
+            self.request("GET", "/api/plans/", "/api/plans/?limit=20")
+
+    def open_plan(self):
+        plan_id, _ = self.rng.choice(self.data.plans)
+        self.request("GET", "/api/plans/{plan_id}", f"/api/plans/{plan_id}")
+
+    def lookup(self):
+        table = self.rng.choice(LOOKUP_TABLES)
+        terms = self.terms[table]
+        if not terms:
+            # Небольшие справочники загружаются целиком
+            self.request("GET", f"/api/lookups/{table}", f"/api/lookups/{table}")
+            return
+        term = self.rng.choice(terms)
+        # Запрос на каждое изменение строки, начиная с третьего символа
+        for length in range(3, min(len(term), 6) + 1):
+            query = urllib.parse.quote(term[:length])
+            self.request("GET", f"/api/lookups/{table}", f"/api/lookups/{table}?q={query}")
+            time.sleep(KEYSTROKE_PAUSE)
+
+    def kato_tree(self):
+        status, payload = self.request("GET", "/api/kato/", "/api/kato/?parent_id=0")
+        # Раскрываем ветку на один-два уровня вниз
+        for _ in range(2):
+            if status != 200:
+                return
+            children = json.loads(payload)
+            if not children:
+                return
+            kato_id = self.rng.choice(children)["id"]
+            status, payload = self.request("GET", "/api/kato/", f"/api/kato/?parent_id={kato_id}")
+
+    def add_item(self):
+        plan_id = self.rng.choice(list(self.data.item_templates))
+        body = dict(self.data.item_templates[plan_id], quantity=str(self.rng.randint(1, 100)))
+        status, payload = self.json_request("POST", "/api/plans/{plan_id}/items", f"/api/plans/{plan_id}/items", body)
+        if status == 201:
+            self.data.draft_items[plan_id].append(json.loads(payload)["id"])
+
+    def update_item(self):
+        plan_id = self.rng.choice(list(self.data.draft_items))
+        item_id = self.rng.choice(self.data.draft_items[plan_id])
+        self.request("GET", "/api/items/{item_id}", f"/api/items/{item_id}")
+        self.json_request(
+            "PUT", "/api/items/{item_id}", f"/api/items/{item_id}", {"quantity": str(self.rng.randint(1, 100))}
+        )
+
+    def import_file(self):
+        plan_id = self.rng.choice(list(self.data.import_files))
+        boundary = uuid.uuid4().hex
+        body = b"".join((
+            f"--{boundary}\r\n".encode(),
+            b'Content-Disposition: form-data; name="file"; filename="import.xlsx"\r\n',
+            f"Content-Type: {XLSX_TYPE}\r\n\r\n".encode(),
+            self.data.import_files[plan_id],
+            f"\r\n--{boundary}--\r\n".encode(),
+        ))
+        self.request(
+            "POST", "/api/plans/{plan_id}/import", f"/api/plans/{plan_id}/import",
+            body, f"multipart/form-data; boundary={boundary}"
+        )
+
+    def export(self):
+        plan_id, version_id = self.rng.choice(self.data.plans)
+        self.request(
+            "GET", "/api/plans/{plan_id}/versions/{version_id}/export-excel",
+            f"/api/plans/{plan_id}/versions/{version_id}/export-excel"
+        )
+
+    def execution(self):
+        item_id = self.rng.choice(list(self.data.approved_items))
+        remaining, price = self.data.approved_items[item_id]
+        self.request("GET", "/api/executions/by-item/{plan_item_id}", f"/api/executions/by-item/{item_id}")
+        quantity = Decimal(1)
+        status, _ = self.json_request("POST", "/api/executions/", "/api/executions/", {
+            "plan_item_id": item_id,
+            "supplier_name": "ТОО Нагрузочный тест",
+            "supplier_bin": f"{self.rng.randrange(10 ** 12):012d}",
+            "residency_code": "KZ",
+            "origin_code": "KZ",
+            "contract_number": f"LT-{uuid.uuid4().hex[:12]}",
+            "contract_date": time.strftime("%Y-%m-%d"),
+            "contract_quantity": str(quantity),
+            "contract_price_per_unit": str(price),
+            "supply_volume_physical": str(quantity),
+            "supply_volume_value": str(quantity * price),
+        })
+        if status == 201:
+            remaining -= quantity
+            if remaining >= 1 or len(self.data.approved_items) == 1:
+                self.data.approved_items[item_id][0] = remaining
+            else:
+                del self.data.approved_items[item_id]
+
+
+# ========= Управляющий процесс =========
+
+def percentile(values: list[float], share: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(len(values) * share + 0.5) - 1))]
+
+
+def build_report(stats: Stats, elapsed: float) -> dict:
+    endpoints = {}
+    for endpoint in sorted(set(stats.latencies) | set(stats.errors)):
+        latencies = sorted(stats.latencies.get(endpoint, []))
+        errors = dict(stats.errors.get(endpoint, {}))
+        total = len(latencies) + sum(errors.values())
+        endpoints[endpoint] = {
+            "requests": total,
+            "rps": round(total / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+            "errors": {str(status): count for status, count in errors.items()},
+        }
+    total = sum(item["requests"] for item in endpoints.values())
+    failed = sum(sum(item["errors"].values()) for item in endpoints.values())
+    return {
+        "duration_s": round(elapsed, 1),
+        "requests": total,
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict):
+    print(f"\nЗа {report['duration_s']} с: запросов {report['requests']}, {report['rps']} запр/с, "
+          f"ошибок {report['error_rate'] * 100:.2f}%")
+    print(f"  {'эндпоинт':<62} {'запросов':>8} {'запр/с':>7} {'p50, мс':>9} {'p95, мс':>9} "
+          f"{'p99, мс':>9} {'ошибок':>7}")
+    for endpoint, item in report["endpoints"].items():
+        errors = ", ".join(f"{status}: {count}" for status, count in item["errors"].items())
+        print(f"  {endpoint:<62} {item['requests']:>8} {item['rps']:>7} {item['p50_ms']:>9} {item['p95_ms']:>9} "
+              f"{item['p99_ms']:>9} {item['error_rate'] * 100:>6.1f}%" + (f"  ({errors})" if errors else ""))
+
+
+def run_load(args, database_url: str) -> dict:
+    # Модули приложения читают DATABASE_URL при импорте
+    os.environ["DATABASE_URL"] = database_url
+    from benchmarks.bench_async_endpoints import wait_for_server
+
+    users, terms = load_users(args.users, args.seed)
+    if len(users) < args.users:
+        print(f"Пользователей с планами в БД: {len(users)}", file=sys.stderr)
+
+    server_log = open(args.server_log, "w", encoding="utf-8") if args.server_log else subprocess.DEVNULL
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_URL=database_url), stderr=server_log
+    )
+    try:
+        wait_for_server(args.port, timeout=120)
+        started = time.monotonic()
+        deadline = started + args.ramp_up + args.duration
+        stats = Stats(measure_from=time.perf_counter() + args.ramp_up)
+        threads = []
+        for index, data in enumerate(users):
+            user = VirtualUser(args.port, data, terms, stats, args, random.Random(args.seed + index))
+            thread = threading.Thread(target=user.run, args=(deadline,), daemon=True)
+            # Пользователи подключаются равномерно в течение ramp-up
+            time.sleep(max(0.0, started + args.ramp_up * index / len(users) - time.monotonic()))
+            thread.start()
+            threads.append(thread)
+        print(f"Пользователей: {len(users)}, воркеров uvicorn: {args.workers}, "
+              f"замер {args.duration} с после разгона {args.ramp_up} с", file=sys.stderr)
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started - args.ramp_up
+    finally:
+        server.terminate()
+        server.wait()
+        if args.server_log:
+            server_log.close()
+    return build_report(stats, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный сценарий пользовательских сессий")
+    parser.add_argument("--scale", default="small", help="Масштаб scripts.generate_dataset")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Каталог сгенерированных наборов SQLite")
+    parser.add_argument("--database-url", help="Готовая БД вместо сгенерированного набора (будет изменена)")
+    parser.add_argument("--users", type=int, default=20, help="Количество виртуальных пользователей")
+    parser.add_argument("--duration", type=float, default=60, help="Длительность замера, с")
+    parser.add_argument("--ramp-up", type=float, default=10, help="Время постепенного старта пользователей, с")
+    parser.add_argument("--think", type=float, default=1.0, help="Средняя пауза между действиями, с")
+    parser.add_argument("--session-actions", type=int, default=30, help="Действий до повторного входа")
+    parser.add_argument("--workers", type=int, default=1, help="Воркеров uvicorn")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--server-log", help="Файл для вывода сервера (предупреждения о N+1 и ошибки)")
+    parser.add_argument("--output", help="Записать отчет в JSON")
+    args = parser.parse_args()
+
+    if args.database_url:
+        report = run_load(args, args.database_url)
+    else:
+        work = working_copy(ensure_dataset(args.scale, args.data_dir), f"load_{args.scale}.db")
+        try:
+            report = run_load(args, f"sqlite:///{work}")
+        finally:
+            remove_database(work)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
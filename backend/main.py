@@ -1,11 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.routers import auth, plans, items, lookups, kato_router, execution_router
-from src.database.database import engine
+from src.routers import auth, plans, items, lookups, kato_router, execution_router, monitoring, metrics_router
+from src.database.database import engine, SessionLocal
+from src.database.async_database import dispose_async_engine
 from src.database.base import Base
+from src.services import search_service, reference_service
+from src.utils.middleware import (
+    metrics_middleware, profiling_middleware, query_stats_middleware, read_your_writes_middleware
+)
 
 # Создаём таблицы в БД (если их нет)
 Base.metadata.create_all(bind=engine)
+# Какие поисковые индексы справочников (pg_trgm / FTS5) созданы миграциями
+search_service.detect_search_indexes(engine)
 
 app = FastAPI(
     title="Байтерек — Портал Смет Закупок",
@@ -22,6 +29,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Чтение из основной БД сразу после записи, если настроена реплика
+app.middleware("http")(read_your_writes_middleware)
+# Число SQL-запросов и время в БД на каждый запрос (Server-Timing, /api/monitoring/queries)
+app.middleware("http")(query_stats_middleware)
+# HTTP-метрики для /metrics
+app.middleware("http")(metrics_middleware)
+# Профилирование отдельного запроса по токену PROFILING_TOKEN (по умолчанию выключено)
+app.middleware("http")(profiling_middleware)
+
 # Подключение роутеров
 api_router = FastAPI()
 api_router.include_router(auth.router)
@@ -30,8 +46,23 @@ api_router.include_router(items.router)
 api_router.include_router(lookups.router)
 api_router.include_router(kato_router.router, prefix="/kato", tags=["kato"])
 api_router.include_router(execution_router.router) # Добавляем новый роутер
+api_router.include_router(monitoring.router)
 
 app.mount("/api", api_router)
+# Метрики Prometheus — вне /api, по стандартному пути
+app.include_router(metrics_router.router)
+
+@app.on_event("startup")
+def load_reference_indexes():
+    db = SessionLocal()
+    try:
+        reference_service.prepare_references(db)
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
 
 @app.get("/")
 def root():
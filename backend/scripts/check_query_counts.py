@@ -0,0 +1,301 @@
+"""
+Проверка числа SQL-запросов эндпоинтов на маленьком и большом плане.
+
+Лишняя ленивая загрузка после изменения связи или поля схемы заметна только
+на больших планах: число запросов начинает расти вместе с числом позиций.
+Скрипт поднимает uvicorn с приложением main на БД из DATABASE_URL, выполняет
+каждый запрос для самого маленького и самого большого плана (для KATO — для узла
+с малым и большим числом потомков, у корня и в глубине дерева) и берет число запросов
+из заголовка Server-Timing (utils.query_stats). Оно должно быть одинаковым: число
+запросов эндпоинта не зависит от размера плана. Иначе скрипт завершается с кодом 1.
+Эндпоинты KATO проверяются дважды: с деревом в памяти и на втором сервере
+с KATO_TREE_ENABLED=0 (SQL-путь). GET /api/kato/tree, кроме того, не должен
+выполнять больше KATO_TREE_MAX_QUERIES запросов.
+
+Скрипт меняет данные (статусы версий, импорт, отчеты об исполнении), поэтому
+запускается на отдельной БД с синтетическим набором. Из каталога backend:
+    DATABASE_URL=sqlite:////tmp/query_counts.db python -m scripts.generate_dataset --scale small
+    DATABASE_URL=sqlite:////tmp/query_counts.db python -m scripts.check_query_counts
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.parse
+import uuid
+from typing import Callable, NamedTuple
+
+from sqlalchemy import func
+
+from benchmarks.bench_async_endpoints import wait_for_server
+from benchmarks.bench_services import BACKEND_DIR, build_import_file
+from src.database.database import SessionLocal
+from src.models import models
+
+# Дерево KATO отдается из снимка: читается только поколение справочников
+KATO_TREE_MAX_QUERIES = 1
+# Меньше позиций в «маленьком» плане — и расхождение может потеряться в шуме
+MIN_SMALL_ITEMS = 5
+# Большой план должен быть хотя бы во столько раз больше маленького
+MIN_SIZE_RATIO = 10
+IMPORT_ROWS = 20
+
+_QUERY_COUNT = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+class Target(NamedTuple):
+    """План (или узел KATO), на котором выполняется запрос."""
+    label: str
+    plan_id: int | None = None
+    version_id: int | None = None
+    item_id: int | None = None
+    price: str | None = None
+    iin: str | None = None
+    kato_id: int | None = None
+
+
+class Check(NamedTuple):
+    name: str
+    # Статус активной версии плана, нужный для запроса
+    status: models.PlanStatus | None
+    # Target -> (метод, путь, тело, Content-Type)
+    request: Callable
+
+
+# ========= Данные =========
+
+def _plan_target(db, version, label: str) -> Target:
+    item = db.query(models.PlanItemVersion).filter(
+        models.PlanItemVersion.version_id == version.id,
+        models.PlanItemVersion.is_deleted == False,
+        models.PlanItemVersion.quantity - models.PlanItemVersion.executed_quantity >= 2,
+    ).order_by(models.PlanItemVersion.id).first()
+    if item is None:
+        raise SystemExit(f"В плане {version.plan_id} нет позиций с неисполненным количеством")
+    return Target(
+        label=label, plan_id=version.plan_id, version_id=version.id, item_id=item.id,
+        price=str(item.price_per_unit), iin=version.plan.creator.iin,
+    )
+
+
+def find_plans(db) -> tuple[Target, Target, int, int]:
+    """Самый маленький (не меньше MIN_SMALL_ITEMS позиций) и самый большой план."""
+    sizes = db.query(
+        models.ProcurementPlanVersion, func.count(models.PlanItemVersion.id)
+    ).join(models.PlanItemVersion, models.PlanItemVersion.version_id == models.ProcurementPlanVersion.id).filter(
+        models.ProcurementPlanVersion.is_active == True, models.PlanItemVersion.is_deleted == False
+    ).group_by(models.ProcurementPlanVersion.id).having(
+        func.count(models.PlanItemVersion.id) >= MIN_SMALL_ITEMS
+    ).order_by(func.count(models.PlanItemVersion.id), models.ProcurementPlanVersion.id).all()
+    if len(sizes) < 2:
+        raise SystemExit("В БД нет двух планов с позициями: заполните ее (scripts.generate_dataset)")
+    (small, small_items), (large, large_items) = sizes[0], sizes[-1]
+    if large_items < small_items * MIN_SIZE_RATIO:
+        raise SystemExit(f"Планы слишком похожи по размеру ({small_items} и {large_items} позиций)")
+    return _plan_target(db, small, "small"), _plan_target(db, large, "large"), small_items, large_items
+
+
+def find_kato(db) -> list[tuple[str, Callable, Target, Target, int | None]]:
+    """
+    Узлы KATO: с малым и большим числом дочерних, у корня и в глубине дерева.
+    Последний элемент — предельное число запросов (None — без предела).
+    """
+    parents = db.query(models.Kato.id).filter(models.Kato.child_count > 0)
+    few = parents.order_by(models.Kato.child_count, models.Kato.id).first()
+    many = parents.order_by(models.Kato.child_count.desc(), models.Kato.id).first()
+    shallow = db.query(models.Kato.id).filter(models.Kato.parent_id == 0).order_by(models.Kato.id).first()
+    deep = db.query(models.Kato.id).order_by(func.length(models.Kato.path).desc(), models.Kato.id).first()
+    if few is None or shallow is None:
+        raise SystemExit("Справочник KATO пуст: заполните БД (scripts.generate_dataset)")
+    # У дерева целиком нет «малого» и «большого» варианта: сравниваются два запроса подряд
+    whole = Target("tree")
+    return [
+        ("GET /api/kato/", lambda t: ("GET", f"/api/kato/?parent_id={t.kato_id}", None, None),
+         Target("few", kato_id=few[0]), Target("many", kato_id=many[0]), None),
+        ("GET /api/kato/{kato_id}/parents", lambda t: ("GET", f"/api/kato/{t.kato_id}/parents", None, None),
+         Target("shallow", kato_id=shallow[0]), Target("deep", kato_id=deep[0]), None),
+        ("GET /api/kato/tree", lambda t: ("GET", "/api/kato/tree", None, None), whole, whole, KATO_TREE_MAX_QUERIES),
+    ]
+
+
+def set_status(db, targets: list[Target], status: models.PlanStatus):
+    db.query(models.ProcurementPlanVersion).filter(
+        models.ProcurementPlanVersion.id.in_([target.version_id for target in targets])
+    ).update({models.ProcurementPlanVersion.status: status}, synchronize_session=False)
+    db.commit()
+
+
+# ========= Запросы =========
+
+def _multipart(content: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = b"".join((
+        f"--{boundary}\r\n".encode(),
+        b'Content-Disposition: form-data; name="file"; filename="import.xlsx"\r\n',
+        b"Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n",
+        content,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ))
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _execution(target: Target):
+    body = {
+        "plan_item_id": target.item_id,
+        "supplier_name": "ТОО Проверка запросов",
+        "supplier_bin": "000000000000",
+        "residency_code": "KZ",
+        "origin_code": "KZ",
+        "contract_number": f"QC-{uuid.uuid4().hex[:12]}",
+        "contract_date": time.strftime("%Y-%m-%d"),
+        "contract_quantity": "1",
+        "contract_price_per_unit": target.price,
+        "supply_volume_physical": "1",
+        "supply_volume_value": target.price,
+    }
+    return "POST", "/api/executions/", json.dumps(body).encode(), "application/json"
+
+
+def build_checks(import_file: bytes) -> list[Check]:
+    approved, draft = models.PlanStatus.APPROVED, models.PlanStatus.DRAFT
+    return [
+        Check("GET /api/plans/{plan_id}", None, lambda t: ("GET", f"/api/plans/{t.plan_id}", None, None)),
+        Check("GET /api/plans/{plan_id}/versions/{version_id}/export-excel", None, lambda t: (
+            "GET", f"/api/plans/{t.plan_id}/versions/{t.version_id}/export-excel", None, None
+        )),
+        Check("GET /api/items/{item_id}", None, lambda t: ("GET", f"/api/items/{t.item_id}", None, None)),
+        Check("GET /api/executions/by-item/{plan_item_id}", approved, lambda t: (
+            "GET", f"/api/executions/by-item/{t.item_id}", None, None
+        )),
+        Check("POST /api/executions/", approved, _execution),
+        Check("POST /api/plans/{plan_id}/import", draft, lambda t: (
+            "POST", f"/api/plans/{t.plan_id}/import", *_multipart(import_file)
+        )),
+    ]
+
+
+class Client:
+    def __init__(self, port: int):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+        self.tokens = {}
+
+    def login(self, iin: str) -> str:
+        if iin not in self.tokens:
+            form = urllib.parse.urlencode({"username": iin, "password": "check"}).encode()
+            status, payload, _ = self.send("POST", "/api/auth/login", form, "application/x-www-form-urlencoded")
+            if status != 200:
+                raise SystemExit(f"Не удалось войти как {iin}: {status}")
+            self.tokens[iin] = json.loads(payload)["access_token"]
+        return self.tokens[iin]
+
+    def send(self, method: str, path: str, body: bytes | None, content_type: str | None, iin: str | None = None):
+        headers = {}
+        if iin:
+            headers["Authorization"] = f"Bearer {self.login(iin)}"
+        if content_type:
+            headers["Content-Type"] = content_type
+        self.conn.request(method, path, body=body, headers=headers)
+        response = self.conn.getresponse()
+        return response.status, response.read(), response.getheader("Server-Timing")
+
+    def count_queries(self, request: tuple, iin: str | None) -> int:
+        method, path, body, content_type = request
+        status, payload, timing = self.send(method, path, body, content_type, iin)
+        if status >= 400:
+            raise SystemExit(f"{method} {path}: {status} {payload[:300].decode(errors='replace')}")
+        match = _QUERY_COUNT.search(timing or "")
+        if match is None:
+            raise SystemExit("Нет заголовка Server-Timing: включите SQL_STATS_ENABLED=1")
+        return int(match.group(1))
+
+
+def measure(client: Client, request: Callable, small: Target, large: Target) -> tuple[int, int]:
+    # Первые запросы прогревают кэши процесса (справочники, пользователи) и не учитываются
+    client.count_queries(request(small), small.iin)
+    client.count_queries(request(large), large.iin)
+    return client.count_queries(request(small), small.iin), client.count_queries(request(large), large.iin)
+
+
+@contextlib.contextmanager
+def running_server(port: int, **env):
+    """uvicorn с приложением main и статистикой запросов; env дополняет окружение."""
+    # Фоновая сверка поколения справочников добавляла бы запрос в случайный момент
+    env = dict(
+        os.environ, SQL_STATS_ENABLED="1", KATO_TREE_POLL_INTERVAL="inf", CODE_INDEX_POLL_INTERVAL="inf", **env
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server(port, timeout=120)
+        yield Client(port)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Число SQL-запросов эндпоинтов на маленьком и большом плане")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        small, large, small_items, large_items = find_plans(db)
+        kato_targets = find_kato(db)
+        import_file = build_import_file(db, small.version_id, IMPORT_ROWS)
+        original_status = {
+            target.version_id: db.get(models.ProcurementPlanVersion, target.version_id).status
+            for target in (small, large)
+        }
+    finally:
+        db.close()
+
+    # (название, число запросов на малом и большом, предел)
+    results = []
+    with running_server(args.port) as client:
+        print(f"Планы: {small.plan_id} ({small_items} позиций) и {large.plan_id} ({large_items} позиций)")
+        db = SessionLocal()
+        try:
+            for check in build_checks(import_file):
+                if check.status is not None:
+                    set_status(db, [small, large], check.status)
+                results.append((check.name, *measure(client, check.request, small, large), None))
+            for target in (small, large):
+                set_status(db, [target], original_status[target.version_id])
+        finally:
+            db.close()
+        for name, request, few, many, limit in kato_targets:
+            results.append((f"{name} ({few.label}/{many.label})", *measure(client, request, few, many), limit))
+    with running_server(args.port, KATO_TREE_ENABLED="0") as client:
+        for name, request, few, many, limit in kato_targets:
+            results.append((f"{name} ({few.label}/{many.label}, SQL)", *measure(client, request, few, many), limit))
+
+    failures = 0
+    print(f"\n  {'эндпоинт':<70} {'малый':>7} {'большой':>8}")
+    for name, small_count, large_count, limit in results:
+        if small_count != large_count:
+            mark = "FAIL"
+            failures += 1
+        elif limit is not None and large_count > limit:
+            mark = f"FAIL: больше {limit}"
+            failures += 1
+        else:
+            mark = "ok"
+        print(f"  {name:<70} {small_count:>7} {large_count:>8}  {mark}")
+
+    if failures:
+        print(f"\nЧисло запросов зависит от размера плана или превышает предел: {failures}")
+        sys.exit(1)
+    print("\nЧисло запросов не зависит от размера плана")
+
+
+if __name__ == "__main__":
+    main()
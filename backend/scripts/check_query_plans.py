@@ -0,0 +1,160 @@
+"""
+Проверка планов выполнения ключевых запросов сервисов.
+
+Вызывает функции сервисов на реальной БД (DATABASE_URL), перехватывает
+выполненные SQL-запросы и получает для каждого EXPLAIN (SQLite: EXPLAIN QUERY PLAN,
+PostgreSQL: EXPLAIN (FORMAT JSON)). Если хотя бы один запрос читает большую таблицу
+полным сканированием, скрипт завершается с кодом 1.
+
+PostgreSQL выбирает Seq Scan для маленьких таблиц независимо от индексов,
+поэтому проверку нужно запускать на большом синтетическом наборе данных.
+
+Запуск из каталога backend:
+    python -m scripts.check_query_plans [--verbose]
+"""
+import argparse
+import json
+import re
+import sys
+from contextlib import contextmanager
+
+from sqlalchemy import event, func
+
+from src.database.database import SessionLocal, engine
+from src.models import models
+from src.schemas import lookup as lookup_schema
+from src.services import (
+    execution_service, item_service, kato_service, kato_tree, lookup_service, plan_service
+)
+
+# Таблицы, полное сканирование которых считается регрессией
+LARGE_TABLES = {
+    "procurement_plans", "procurement_plan_versions", "plan_item_versions",
+    "plan_item_executions", "reestr_ktp", "kato", "enstru", "agsk",
+}
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+@contextmanager
+def capture_statements(target_engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(target_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(target_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(connection, statement: str, parameters) -> tuple[list[str], list[str]]:
+    """Возвращает (строки плана, таблицы с полным сканированием)."""
+    if connection.dialect.name == "postgresql":
+        raw = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        plan = raw if isinstance(raw, list) else json.loads(raw)
+        lines, seq_scans = [], []
+
+        def walk(node, depth=0):
+            relation = node.get("Relation Name")
+            lines.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else ""))
+            if node["Node Type"] == "Seq Scan" and relation in LARGE_TABLES:
+                seq_scans.append(relation)
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"])
+        return lines, seq_scans
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    lines = [row[-1] for row in rows]
+    seq_scans = []
+    for detail in lines:
+        match = _SQLITE_SCAN.match(detail)
+        if match and match.group(1) in LARGE_TABLES and "COVERING INDEX" not in detail:
+            seq_scans.append(match.group(1))
+    return lines, seq_scans
+
+
+def build_checks(db):
+    """Ключевые запросы сервисов на данных из БД: (название, функция)."""
+    item = db.query(models.PlanItemVersion).filter(models.PlanItemVersion.is_deleted == False).order_by(
+        models.PlanItemVersion.id.desc()
+    ).first()
+    if item is None:
+        raise SystemExit("В БД нет позиций планов: сначала заполните ее")
+    version = item.version
+    plan = version.plan
+    user = plan.creator
+    kato = db.query(models.Kato).filter(models.Kato.id == item.kato_delivery_id).first()
+    region_id = int(kato.path.strip("/").split("/")[0]) if kato is not None and kato.path else None
+    enstru_codes = [code for code, in db.query(models.PlanItemVersion.trucode).filter(
+        models.PlanItemVersion.version_id == version.id
+    ).limit(50)]
+
+    return [
+        ("plan_service._get_active_version", lambda: plan_service._get_active_version(db, plan.id)),
+        ("plan_service.get_plan_with_active_version", lambda: plan_service.get_plan_with_active_version(db, plan.id)),
+        ("plan_service.get_plan_etag", lambda: plan_service.get_plan_etag(db, plan.id)),
+        ("plan_service.get_plans_by_user", lambda: plan_service.get_plans_by_user(db, user)),
+        ("plan_service.get_plans_etag", lambda: plan_service.get_plans_etag(db, user, skip=0, limit=100)),
+        ("plan_service.get_plan_summaries_by_user", lambda: plan_service.get_plan_summaries_by_user(db, user)),
+        ("item_service.get_item", lambda: item_service.get_item(db, item.id)),
+        ("item_service.get_items_by_user", lambda: item_service.get_items_by_user(db, user)),
+        ("item_service.get_items_by_user (регион поставки)",
+         lambda: item_service.get_items_by_user(db, user, kato_delivery_id=region_id) if region_id else None),
+        ("item_service: последний номер позиции", lambda: db.query(func.max(models.PlanItemVersion.item_number)).filter(
+            models.PlanItemVersion.version_id == version.id,
+            models.PlanItemVersion.need_type == item.need_type
+        ).scalar()),
+        ("execution_service.get_executions_by_item", lambda: execution_service.get_executions_by_item(db, item.id, user)),
+        ("lookup_service.resolve_codes", lambda: lookup_service.resolve_codes(
+            db, lookup_schema.ResolveRequest(enstru_codes=enstru_codes, kato_ids=[item.kato_delivery_id or 0])
+        )),
+        ("kato_service.get_kato_children", lambda: kato_service.get_kato_children(db, kato.parent_id if kato else 0)),
+        ("kato_service.get_kato_parents", lambda: kato_service.get_kato_parents(db, kato.id if kato else 0)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка планов выполнения ключевых запросов")
+    parser.add_argument("--verbose", action="store_true", help="Печатать планы всех запросов")
+    args = parser.parse_args()
+
+    # Проверяем SQL-путь KATO, а не дерево в памяти
+    kato_tree.KATO_TREE_ENABLED = False
+    db = SessionLocal()
+    failures = 0
+    try:
+        checks = build_checks(db)
+        for name, call in checks:
+            with capture_statements(engine) as statements:
+                call()
+            db.rollback()
+            with engine.connect() as connection:
+                for statement, parameters in statements:
+                    lines, seq_scans = explain(connection, statement, parameters)
+                    status = "FAIL" if seq_scans else "ok"
+                    if seq_scans:
+                        failures += 1
+                    if seq_scans or args.verbose:
+                        print(f"[{status}] {name}: {' '.join(statement.split())[:200]}")
+                        for line in lines:
+                            print(f"        {line}")
+                        if seq_scans:
+                            print(f"        полное сканирование: {', '.join(sorted(set(seq_scans)))}")
+            print(f"{name}: запросов {len(statements)}")
+    finally:
+        db.close()
+
+    if failures:
+        print(f"\nЗапросов с полным сканированием больших таблиц: {failures}")
+        sys.exit(1)
+    print("\nПолных сканирований больших таблиц нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+"""
+Генератор синтетического набора данных для нагрузочного и масштабного тестирования.
+
+Заполняет все таблицы models.py в заданном масштабе: справочники (ЕНС ТРУ, KATO,
+МКЕИ, АГСК, статьи затрат, источники финансирования, реестр КТП с несколькими
+поставщиками на код), пользователей, планы с версиями и позициями и отчеты об исполнении.
+Данные детерминированы (--seed): повторный запуск на пустой БД дает тот же набор,
+поэтому результаты бенчмарков сопоставимы между прогонами, на SQLite и на PostgreSQL.
+
+Вставка идет пачками через Core insert с явными id; производные данные справочников
+(search_text, счетчики и пути KATO, FTS-индексы) пересчитываются в конце через
+reference_service.reload_references. Схема создается через create_all, а поисковые
+индексы — той же миграцией, что и в рабочей БД (b6d2e8f4a017), примененной напрямую.
+
+Запуск из каталога backend (БД — DATABASE_URL):
+    python -m scripts.generate_dataset --scale small --drop
+    python -m scripts.generate_dataset --scale full --users 5000 --large-plans 50
+"""
+import argparse
+import contextlib
+import importlib.util
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import func, insert, text
+
+from src.database.base import Base
+from src.database.database import SessionLocal, engine
+from src.models import models
+from src.services import reference_service, search_service
+
+# Масштабы по умолчанию; любой параметр можно переопределить из командной строки
+SCALES = {
+    "small": dict(
+        enstru=5_000, kato_regions=4, mkei=100, agsk=2_000, ktp_share=0.2, ktp_max_suppliers=8,
+        users=20, plans_per_user=2, versions_per_plan=2, items_per_version=50,
+        large_plans=1, large_plan_items=1_000, execution_share=0.3,
+    ),
+    "medium": dict(
+        enstru=50_000, kato_regions=20, mkei=300, agsk=10_000, ktp_share=0.2, ktp_max_suppliers=8,
+        users=200, plans_per_user=3, versions_per_plan=2, items_per_version=100,
+        large_plans=5, large_plan_items=10_000, execution_share=0.3,
+    ),
+    "full": dict(
+        enstru=500_000, kato_regions=20, mkei=500, agsk=50_000, ktp_share=0.2, ktp_max_suppliers=8,
+        users=2_000, plans_per_user=3, versions_per_plan=2, items_per_version=100,
+        large_plans=20, large_plan_items=10_000, execution_share=0.3,
+    ),
+}
+
+SEARCH_INDEXES_MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "alembic", "versions", "b6d2e8f4a017_add_search_indexes.py"
+)
+
+# Разветвление KATO ниже области: районы, сельские округа, населенные пункты.
+# 20 областей дают ~17,5 тыс. записей — размер реального справочника
+KATO_FANOUT = (12, 8, 8)
+
+BASE_DATETIME = datetime(2024, 1, 1, 9, 0, 0)
+CENT = Decimal("0.01")
+
+NOUNS = {
+    "GOODS": [
+        "Кабель", "Бумага", "Труба", "Краска", "Цемент", "Ноутбук", "Монитор", "Стол", "Кресло", "Перчатки",
+        "Фильтр", "Насос", "Клапан", "Провод", "Лампа", "Картридж", "Бензин", "Дизельное топливо", "Мыло", "Шкаф",
+    ],
+    "WORKS": [
+        "Ремонт кровли", "Монтаж освещения", "Строительство склада", "Прокладка кабеля", "Покраска фасада",
+        "Устройство фундамента", "Демонтаж перегородок", "Ремонт дорожного покрытия",
+    ],
+    "SERVICES": [
+        "Услуги связи", "Охрана объекта", "Уборка помещений", "Техническое обслуживание", "Аудит",
+        "Консультационные услуги", "Перевозка грузов", "Обучение персонала", "Аренда оборудования",
+    ],
+}
+ADJECTIVES = [
+    "силовой", "офисная", "стальная", "водоэмульсионная", "портландский", "промышленный", "медный",
+    "светодиодная", "защитные", "универсальный", "высокого давления", "морозостойкий", "капитальный", "текущий",
+]
+SUFFIXES = ["ГОСТ", "тип А", "тип Б", "класс 1", "класс 2", "исполнение У1", "для помещений", "для улицы"]
+UNITS = [
+    ("796", "дана", "штука"), ("166", "килограмм", "килограмм"), ("006", "метр", "метр"),
+    ("112", "литр", "литр"), ("055", "шаршы метр", "квадратный метр"), ("113", "текше метр", "кубический метр"),
+    ("168", "тонна", "тонна"), ("839", "жиынтық", "комплект"), ("356", "сағат", "час"), ("778", "орама", "упаковка"),
+]
+PLACE_ROOTS = ["Ак", "Кара", "Сары", "Жана", "Кок", "Алма", "Бай", "Шал", "Есиль", "Тал", "Ор", "Кен"]
+PLACE_ENDINGS = ["тобе", "су", "арка", "коль", "бұлақ", "терек", "аул", "кент", "шокы", "жар"]
+COST_ITEMS = [
+    "Товары", "Работы", "Услуги", "СМР (строительно-монтажные работы)", "Капитальный ремонт",
+    "Текущий ремонт", "Приобретение основных средств", "Услуги связи", "Коммунальные услуги",
+    "Командировочные расходы", "Обучение", "Информационные технологии",
+]
+FUNDING_SOURCES = ["Собственные средства", "Республиканский бюджет", "Местный бюджет", "Заемные средства", "Гранты"]
+COMPANY_FORMS = ["ТОО", "АО", "ИП"]
+
+
+class Writer:
+    """Буфер строк по таблицам: пишет пачками в порядке внешних ключей."""
+
+    def __init__(self, db, batch_size: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.buffers: dict = {}
+        self.counts: dict = {}
+
+    def add(self, model, row: dict):
+        self.buffers.setdefault(model, []).append(row)
+
+    def flush(self, *order, force: bool = False):
+        """Сбрасывает буферы моделей order (в этом порядке), если набралась пачка или force."""
+        if not force and sum(len(self.buffers.get(model, ())) for model in order) < self.batch_size:
+            return
+        for model in order:
+            rows = self.buffers.pop(model, [])
+            for start in range(0, len(rows), self.batch_size):
+                self.db.execute(insert(model.__table__), rows[start:start + self.batch_size])
+            self.counts[model] = self.counts.get(model, 0) + len(rows)
+        self.db.commit()
+
+
+def _place_name(rng: random.Random) -> str:
+    return rng.choice(PLACE_ROOTS) + rng.choice(PLACE_ENDINGS)
+
+
+def _company(rng: random.Random, index: int) -> tuple[str, str]:
+    return f"{rng.choice(COMPANY_FORMS)} «{_place_name(rng).capitalize()} {index}»", f"{100140000000 + index:012d}"
+
+
+def generate_references(writer: Writer, rng: random.Random, params: dict) -> dict:
+    """Справочники. Возвращает то, что нужно для генерации позиций."""
+    for index, (code, name_kz, name_ru) in enumerate(UNITS, start=1):
+        writer.add(models.Mkei, {"id": index, "code": code, "name_kz": name_kz, "name_ru": name_ru})
+    for index in range(len(UNITS) + 1, params["mkei"] + 1):
+        writer.add(models.Mkei, {"id": index, "code": f"9{index:04d}", "name_kz": f"бірлік {index}",
+                                 "name_ru": f"единица {index}"})
+
+    names = COST_ITEMS + [f"Прочие расходы {index}" for index in range(1, 19)]
+    for index, name in enumerate(names, start=1):
+        writer.add(models.Cost_Item, {"id": index, "name_ru": name, "name_kz": f"{name} (каз)"})
+    for index, name in enumerate(FUNDING_SOURCES, start=1):
+        writer.add(models.Source_Funding, {"id": index, "name_ru": name, "name_kz": f"{name} (каз)"})
+    writer.flush(models.Mkei, models.Cost_Item, models.Source_Funding, force=True)
+
+    # KATO: области -> районы -> сельские округа -> населенные пункты, корни с parent_id = 0
+    kato_id = 0
+    leaves = []
+    levels = [(None, "", 0)]
+    for level in range(len(KATO_FANOUT) + 1):
+        next_levels = []
+        for parent_id, parent_code, _ in levels:
+            fanout = params["kato_regions"] if level == 0 else KATO_FANOUT[level - 1]
+            for number in range(1, fanout + 1):
+                kato_id += 1
+                if level == 0:
+                    code = f"{9 + number:02d}0000000"
+                    name_ru = f"{_place_name(rng)}ская область"
+                elif level == 1:
+                    code = f"{parent_code[:2]}{number:02d}00000"
+                    name_ru = f"{_place_name(rng)}ский район"
+                elif level == 2:
+                    code = f"{parent_code[:4]}{number:02d}000"
+                    name_ru = f"{_place_name(rng)}ский сельский округ"
+                else:
+                    code = f"{parent_code[:6]}{number:03d}"
+                    name_ru = f"село {_place_name(rng)}"
+                writer.add(models.Kato, {"id": kato_id, "parent_id": parent_id or 0, "code": code,
+                                         "name_kz": name_ru.replace("ская область", " облысы"), "name_ru": name_ru})
+                next_levels.append((kato_id, code, level))
+        if level == len(KATO_FANOUT):
+            leaves = [node_id for node_id, _, _ in next_levels]
+        levels = next_levels
+        writer.flush(models.Kato)
+    writer.flush(models.Kato, force=True)
+
+    # ЕНС ТРУ: группы по 50 кодов, тип по группе
+    enstru_codes = {"GOODS": [], "WORKS": [], "SERVICES": []}
+    for index in range(params["enstru"]):
+        group = index // 50
+        type_name = ("GOODS", "GOODS", "GOODS", "GOODS", "WORKS", "SERVICES")[group % 6]
+        code = f"{100000 + group:06d}.{(index % 50) // 10 * 100:03d}.{index + 1:06d}"
+        noun = rng.choice(NOUNS[type_name])
+        name_rus = f"{noun} {rng.choice(ADJECTIVES)}" if type_name == "GOODS" else noun
+        unit = rng.choice(UNITS)
+        writer.add(models.Enstru, {
+            "id": index + 1, "code": code, "type_name": type_name, "type": "1", "is_active": True,
+            "name_rus": name_rus, "name_kaz": f"{name_rus} (каз)", "name_eng": None,
+            "detail_rus": f"{name_rus}, {rng.choice(SUFFIXES)}", "detail_kaz": None,
+            "uom": f"{unit[0]},0{unit[0]}" if type_name == "GOODS" else None,
+            "purchasing_group_name": noun, "purchasing_subgroup_name": name_rus,
+            "create_datetime": BASE_DATETIME, "modify_datetime": BASE_DATETIME,
+        })
+        enstru_codes[type_name].append(code)
+        writer.flush(models.Enstru)
+    writer.flush(models.Enstru, force=True)
+
+    agsk_codes = []
+    for index in range(1, params["agsk"] + 1):
+        code = f"{200000 + index // 100:06d}-{index:06d}"
+        writer.add(models.Agsk, {
+            "id": index, "group": f"Группа {index // 100}", "code": code,
+            "name_ru": f"{rng.choice(NOUNS['GOODS'])} строительный {rng.choice(SUFFIXES)}",
+            "standart": f"ГОСТ {rng.randint(1000, 39999)}-{rng.randint(70, 99)}", "unit": rng.choice(UNITS)[2],
+        })
+        agsk_codes.append(code)
+        writer.flush(models.Agsk)
+    writer.flush(models.Agsk, force=True)
+
+    # Реестр КТП: часть кодов товаров, по нескольку поставщиков на код
+    ktp_min_dvc: dict[str, Decimal] = {}
+    companies = max(100, int(len(enstru_codes["GOODS"]) * params["ktp_share"] / 3))
+    ktp_id = 0
+    for code in enstru_codes["GOODS"]:
+        if rng.random() >= params["ktp_share"]:
+            continue
+        for _ in range(rng.randint(1, params["ktp_max_suppliers"])):
+            ktp_id += 1
+            company_name, bin_iin = _company(rng, rng.randrange(companies))
+            dvc = round(rng.uniform(10, 95), 2)
+            ktp_min_dvc[code] = min(ktp_min_dvc.get(code, Decimal(100)), Decimal(str(dvc)))
+            writer.add(models.Reestr_KTP, {
+                "id": ktp_id, "bin_iin": bin_iin, "company_name": company_name, "enstru_code": code,
+                "product_name": f"Продукция по коду {code}", "registration_number": f"KTP-{ktp_id:08d}",
+                "region_kato": f"{rng.randint(10, 9 + params['kato_regions']):02d}0000000",
+                "dvc_percent": dvc, "localization_level": rng.choice(["I", "II", "III"]),
+                "registry_inclusion_date": date(2023, 1, 1) + timedelta(days=rng.randrange(700)),
+            })
+            writer.flush(models.Reestr_KTP)
+    writer.flush(models.Reestr_KTP, force=True)
+
+    return {
+        "enstru_codes": enstru_codes,
+        "ktp_min_dvc": ktp_min_dvc,
+        "agsk_codes": agsk_codes,
+        "kato_ids": leaves,
+        "mkei": params["mkei"],
+        "cost_items": len(names),
+        "funding_sources": len(FUNDING_SOURCES),
+    }
+
+
+class PlanGenerator:
+    """Пользователи, планы, версии, позиции и отчеты об исполнении."""
+
+    def __init__(self, writer: Writer, rng: random.Random, params: dict, refs: dict):
+        self.writer = writer
+        self.rng = rng
+        self.params = params
+        self.refs = refs
+        self.ids = {"plan": 0, "version": 0, "item": 0, "execution": 0}
+
+    def _next_id(self, name: str) -> int:
+        self.ids[name] += 1
+        return self.ids[name]
+
+    def _new_item(self, version_id: int, numbers: dict) -> dict:
+        rng = self.rng
+        type_name = rng.choices(("GOODS", "WORKS", "SERVICES"), weights=(70, 15, 15))[0]
+        need_type = models.NeedType[type_name]
+        trucode = rng.choice(self.refs["enstru_codes"][type_name] or self.refs["enstru_codes"]["GOODS"])
+        numbers[need_type] = numbers.get(need_type, 0) + 1
+        quantity = Decimal(rng.randint(1, 1000))
+        price = Decimal(rng.randint(1_000, 5_000_000)) / 100
+        if need_type == models.NeedType.GOODS:
+            resident_share = Decimal(100)
+            min_dvc = self.refs["ktp_min_dvc"].get(trucode, Decimal(0))
+        else:
+            resident_share = Decimal(rng.choice((100, 100, 100, 80, 50)))
+            min_dvc = resident_share
+        total = (quantity * price).quantize(CENT)
+        item_id = self._next_id("item")
+        return {
+            "id": item_id, "version_id": version_id, "item_number": numbers[need_type], "need_type": need_type,
+            "trucode": trucode,
+            "unit_id": rng.randint(1, self.refs["mkei"]) if need_type == models.NeedType.GOODS else None,
+            "expense_item_id": rng.randint(1, self.refs["cost_items"]),
+            "funding_source_id": rng.randint(1, self.refs["funding_sources"]),
+            "agsk_id": rng.choice(self.refs["agsk_codes"]) if self.refs["agsk_codes"] and rng.random() < 0.1 else None,
+            "kato_purchase_id": rng.choice(self.refs["kato_ids"]),
+            "kato_delivery_id": rng.choice(self.refs["kato_ids"]),
+            "additional_specs": f"Характеристика позиции {item_id}",
+            "additional_specs_kz": f"Позиция сипаттамасы {item_id}",
+            "quantity": quantity, "price_per_unit": price, "total_amount": total,
+            "is_ktp": trucode in self.refs["ktp_min_dvc"],
+            "resident_share": resident_share,
+            "non_resident_reason": "Отсутствие отечественных производителей" if resident_share < 100 else None,
+            "is_deleted": False, "root_item_id": item_id, "source_version_id": version_id, "revision_number": 0,
+            "executed_quantity": Decimal(0), "executed_amount": Decimal(0),
+            "min_dvc_percent": min_dvc, "vc_amount": (total * min_dvc / 100).quantize(CENT),
+            "created_at": BASE_DATETIME,
+        }
+
+    def _revise(self, item: dict, version_id: int) -> dict:
+        """Копия позиции в следующей версии; часть позиций изменена или удалена."""
+        copy = dict(item, id=self._next_id("item"), version_id=version_id)
+        roll = self.rng.random()
+        if roll < 0.1:
+            copy["quantity"] = item["quantity"] + self.rng.randint(1, 100)
+            copy["total_amount"] = (copy["quantity"] * copy["price_per_unit"]).quantize(CENT)
+            copy["vc_amount"] = (copy["total_amount"] * copy["min_dvc_percent"] / 100).quantize(CENT)
+            copy["revision_number"] = item["revision_number"] + 1
+            copy["source_version_id"] = version_id
+        elif roll < 0.13:
+            copy["is_deleted"] = True
+        return copy
+
+    def _execute(self, item: dict):
+        """Отчеты об исполнении: один-три договора в пределах планового количества."""
+        remaining = item["quantity"]
+        for number in range(self.rng.randint(1, 3)):
+            if remaining <= 0:
+                break
+            quantity = Decimal(self.rng.randint(1, int(remaining)))
+            price = (item["price_per_unit"] * Decimal(self.rng.uniform(0.8, 1.0))).quantize(CENT)
+            contract_sum = (quantity * price).quantize(CENT)
+            company_name, bin_iin = _company(self.rng, self.rng.randrange(10_000))
+            self.writer.add(models.PlanItemExecution, {
+                "id": self._next_id("execution"), "plan_item_id": item["id"],
+                "supplier_name": company_name, "supplier_bin": bin_iin,
+                "residency_code": self.rng.choice(("RESIDENT", "RESIDENT", "NON_RESIDENT")),
+                "origin_code": self.rng.choice(("KZ", "KZ", "RU", "CN")),
+                "contract_number": f"Д-{item['id']}-{number + 1}",
+                "contract_date": date(2025, 1, 1) + timedelta(days=self.rng.randrange(300)),
+                "contract_quantity": quantity, "contract_price_per_unit": price, "contract_sum": contract_sum,
+                "supply_volume_physical": quantity, "supply_volume_value": contract_sum,
+            })
+            item["executed_quantity"] += quantity
+            item["executed_amount"] += contract_sum
+            remaining -= quantity
+
+    def generate_plan(self, user_id: int, org_name: str, items_count: int):
+        rng = self.rng
+        plan_id = self._next_id("plan")
+        self.writer.add(models.ProcurementPlan, {
+            "id": plan_id, "plan_name": f"План закупок {org_name} №{plan_id}", "year": rng.choice((2024, 2025, 2026)),
+            "created_by": user_id, "created_at": BASE_DATETIME,
+        })
+        versions_count = rng.randint(1, self.params["versions_per_plan"])
+        active_status = rng.choices(
+            (models.PlanStatus.DRAFT, models.PlanStatus.PRE_APPROVED, models.PlanStatus.APPROVED), weights=(50, 15, 35)
+        )[0]
+        items = []
+        for version_number in range(1, versions_count + 1):
+            version_id = self._next_id("version")
+            is_active = version_number == versions_count
+            if version_number == 1:
+                numbers = {}
+                items = [self._new_item(version_id, numbers) for _ in range(items_count)]
+            else:
+                items = [self._revise(item, version_id) for item in items if not item["is_deleted"]]
+            status = active_status if is_active else models.PlanStatus.APPROVED
+            if is_active and status == models.PlanStatus.APPROVED:
+                for item in items:
+                    if not item["is_deleted"] and rng.random() < self.params["execution_share"]:
+                        self._execute(item)
+
+            live = [item for item in items if not item["is_deleted"]]
+            total = sum((item["total_amount"] for item in live), Decimal(0))
+            vc_total = sum((item["vc_amount"] for item in live), Decimal(0))
+            self.writer.add(models.ProcurementPlanVersion, {
+                "id": version_id, "plan_id": plan_id, "version_number": version_number, "status": status,
+                "total_amount": total,
+                "import_percentage": ((total - vc_total) / total * 100).quantize(CENT) if total else Decimal(0),
+                "vc_percentage": (vc_total / total * 100).quantize(CENT) if total else Decimal(0),
+                "vc_amount": vc_total, "is_active": is_active,
+                "is_executed": bool(live) and all(item["executed_quantity"] >= item["quantity"] for item in live),
+                "modification_counter": 0, "created_by": user_id,
+                "created_at": BASE_DATETIME + timedelta(days=version_number),
+            })
+            for item in items:
+                self.writer.add(models.PlanItemVersion, dict(item))
+        self.writer.flush(
+            models.ProcurementPlan, models.ProcurementPlanVersion, models.PlanItemVersion, models.PlanItemExecution
+        )
+
+    def generate(self):
+        params = self.params
+        large_left = params["large_plans"]
+        for user_id in range(1, params["users"] + 1):
+            company_name, bin_iin = _company(self.rng, user_id)
+            self.writer.add(models.User, {
+                "id": user_id, "iin": f"{800101300000 + user_id:012d}", "full_name": f"Пользователь {user_id}",
+                "bin": bin_iin, "org_name": company_name, "email": f"user{user_id}@example.kz",
+                "phone": f"+7701{user_id:07d}", "is_active": True, "created_at": BASE_DATETIME,
+            })
+        self.writer.flush(models.User, force=True)
+
+        for user_id in range(1, params["users"] + 1):
+            org_name = f"организации {user_id}"
+            for _ in range(params["plans_per_user"]):
+                if large_left > 0:
+                    large_left -= 1
+                    items_count = params["large_plan_items"]
+                else:
+                    items_count = self.rng.randint(params["items_per_version"] // 2, params["items_per_version"] * 3 // 2)
+                self.generate_plan(user_id, org_name, items_count)
+        self.writer.flush(
+            models.ProcurementPlan, models.ProcurementPlanVersion, models.PlanItemVersion, models.PlanItemExecution,
+            force=True
+        )
+
+
+def _reset_sequences(db):
+    """После вставки с явными id сдвигает последовательности PostgreSQL."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in Base.metadata.sorted_tables:
+        if "id" in table.c and table.c.id.autoincrement and table.c.id.primary_key:
+            db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+            ))
+    db.commit()
+
+
+def run_search_indexes_migration(direction: str = "upgrade"):
+    """Применяет (или откатывает) миграцию поисковых индексов к БД, созданной через create_all."""
+    spec = importlib.util.spec_from_file_location("search_indexes_migration", SEARCH_INDEXES_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            getattr(migration, direction)()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетического набора данных")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Строк в одной пачке вставки")
+    parser.add_argument("--drop", action="store_true", help="Удалить и пересоздать все таблицы")
+    for name, value in SCALES["small"].items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=None)
+    args = parser.parse_args()
+
+    params = dict(SCALES[args.scale])
+    for name in params:
+        value = getattr(args, name)
+        if value is not None:
+            params[name] = value
+
+    if args.drop:
+        # FTS5-таблицы SQLite не входят в metadata и drop_all их не удаляет; индексов может и не быть
+        with contextlib.suppress(Exception):
+            run_search_indexes_migration("downgrade")
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        for model in (models.User, models.Enstru, models.Kato, models.ProcurementPlan):
+            if db.query(func.count(model.id)).scalar():
+                raise SystemExit(f"Таблица {model.__tablename__} не пуста: запустите с --drop")
+
+        started = time.perf_counter()
+        rng = random.Random(args.seed)
+        writer = Writer(db, args.batch_size)
+        refs = generate_references(writer, rng, params)
+        print(f"Справочники: {time.perf_counter() - started:.1f} с")
+        PlanGenerator(writer, rng, params, refs).generate()
+        print(f"Планы: {time.perf_counter() - started:.1f} с")
+
+        _reset_sequences(db)
+        run_search_indexes_migration()
+        search_service.detect_search_indexes(engine)
+        reference_service.reload_references(db)
+        print(f"Производные данные справочников: {time.perf_counter() - started:.1f} с")
+
+        for model, count in writer.counts.items():
+            print(f"  {model.__tablename__:<28} {count:>10}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Обновление производных данных справочников после их загрузки в БД.
+
+Пересчитывает поисковые колонки, счетчики дочерних и пути KATO, поисковые индексы
+в БД и начинает новое поколение справочников (reference_service.reload_references).
+Запущенные воркеры приложения увидят новое поколение и перезагрузят свои индексы
+и кэши в памяти сами.
+
+Запуск из каталога backend (БД — DATABASE_URL):
+    python -m scripts.reload_references
+"""
+import time
+
+from src.database.database import SessionLocal
+from src.services import reference_generation, reference_service
+
+
+def main():
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        reference_service.reload_references(db)
+        print(f"Справочники обновлены за {time.perf_counter() - started:.1f} с, "
+              f"поколение {reference_generation.get_generation(db)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
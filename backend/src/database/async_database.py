@@ -0,0 +1,98 @@
+# src/database/async_database.py
+import os
+
+import anyio
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .database import (
+    DATABASE_READ_URL, DATABASE_URL, engine_options, install_engine_events,
+    read_primary_requested, replica_monitor
+)
+
+# Синхронные драйверы и их асинхронные аналоги
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Заменяет синхронный драйвер в URL БД на асинхронный (aiosqlite / asyncpg)."""
+    scheme, separator, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+ASYNC_DATABASE_READ_URL = os.getenv("ASYNC_DATABASE_READ_URL") or (
+    to_async_url(DATABASE_READ_URL) if DATABASE_READ_URL else None
+)
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    """Асинхронный Engine с теми же настройками пула и PRAGMA, что и синхронный."""
+    new_engine = create_async_engine(url, **engine_options(url, poolclass=AsyncAdaptedQueuePool))
+    install_engine_events(new_engine.sync_engine, url)
+    return new_engine
+
+
+# Движки создаются при первом обращении: CLI-скриптам, которые работают
+# через синхронный SessionLocal, асинхронные драйверы не нужны
+_URLS = {"primary": ASYNC_DATABASE_URL, "replica": ASYNC_DATABASE_READ_URL}
+_async_engines: dict[str, AsyncEngine] = {}
+_async_session_factories: dict[str, async_sessionmaker] = {}
+
+
+def get_async_engine(name: str = "primary") -> AsyncEngine:
+    if name not in _async_engines:
+        _async_engines[name] = create_async_db_engine(_URLS[name])
+        _async_session_factories[name] = async_sessionmaker(
+            _async_engines[name], class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_engines[name]
+
+
+def created_async_engines() -> dict[str, AsyncEngine]:
+    """Уже созданные асинхронные движки (для мониторинга; новые не создает)."""
+    return dict(_async_engines)
+
+
+def AsyncSessionLocal(name: str = "primary") -> AsyncSession:
+    get_async_engine(name)
+    return _async_session_factories[name]()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def _replica_available() -> bool:
+    cached = replica_monitor.cached()
+    if cached is not None:
+        return cached
+    # Проверка отставания — блокирующий запрос, выполняем его вне event loop
+    return await anyio.to_thread.run_sync(replica_monitor.check)
+
+
+async def get_async_read_db(request: Request):
+    """Асинхронная сессия только для чтения: реплика или основная БД (см. get_read_db)."""
+    use_replica = (
+        ASYNC_DATABASE_READ_URL is not None
+        and replica_monitor is not None
+        and not read_primary_requested(request)
+        and await _replica_available()
+    )
+    async with AsyncSessionLocal("replica" if use_replica else "primary") as db:
+        yield db
+
+
+async def dispose_async_engine():
+    """Закрывает соединения асинхронных пулов (при остановке приложения)."""
+    for new_engine in _async_engines.values():
+        await new_engine.dispose()
+    _async_engines.clear()
+    _async_session_factories.clear()
@@ -1,8 +1,13 @@
 # src/database/database.py
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from pydantic_settings import BaseSettings
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Загружаем .env
@@ -11,21 +16,252 @@ load_dotenv()
 # Больше НЕ используем Settings() для DATABASE_URL — читаем напрямую!
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./baiterek.db")
 
-# Для SQLite — обязательно!
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Пул соединений (для SQLite в памяти не применяется)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Пересоздавать соединения старше N секунд (-1 — не пересоздавать)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Проверять соединение перед выдачей из пула (после failover PostgreSQL)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+# PRAGMA для SQLite, выполняются на каждом новом соединении
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+# Отрицательное значение — размер в КиБ (здесь 64 МиБ)
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "1") == "1"
+
+# Необязательная реплика только для чтения
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+# При отставании реплики больше порога чтение идет в основную БД
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# Как часто перепроверять отставание реплики
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+# Cookie "читать из основной БД до" — ставится после записи (read-your-writes)
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return _is_sqlite(url) and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"))
+
+
+def _sqlite_pragmas() -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        f"PRAGMA foreign_keys = {'ON' if SQLITE_FOREIGN_KEYS else 'OFF'}",
+    ]
+    if SQLITE_JOURNAL_MODE:
+        pragmas.insert(0, f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+class PoolCounters:
+    """Счетчики событий пула соединений (для мониторинга)."""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def increment(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def engine_options(url: str, poolclass=QueuePool) -> dict:
+    """
+    Параметры create_engine / create_async_engine по настройкам окружения.
+    poolclass задается явно: асинхронные драйверы SQLite по умолчанию используют NullPool.
+    """
+    options = {"echo": False}
+    if _is_sqlite(url):
+        # Для SQLite — обязательно!
+        options["connect_args"] = {"check_same_thread": False}
+    if not _is_sqlite_memory(url):
+        options.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    return options
+
+
+def install_engine_events(target_engine: Engine, url: str):
+    """
+    Подключает PRAGMA для SQLite и счетчики пула (target_engine.pool_counters).
+    Для асинхронного движка передается его sync_engine.
+    """
+    counters = PoolCounters()
+    target_engine.pool_counters = counters
+
+    @event.listens_for(target_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        counters.increment("connects")
+        if _is_sqlite(url):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in _sqlite_pragmas():
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+    @event.listens_for(target_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters.increment("checkouts")
+
+    @event.listens_for(target_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        counters.increment("invalidations")
+
+
+def create_db_engine(url: str) -> Engine:
+    """
+    Создает Engine по настройкам из окружения: параметры пула соединений
+    и PRAGMA для SQLite. Счетчики пула доступны в engine.pool_counters.
+    """
+    new_engine = create_engine(url, **engine_options(url))
+    install_engine_events(new_engine, url)
+    return new_engine
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    echo=False
-)
+
+def get_pool_stats(target_engine: Engine) -> dict:
+    """Состояние пула соединений: размер, занятые/свободные соединения и счетчики событий."""
+    pool = target_engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout=pool.timeout(),
+        )
+    counters = getattr(target_engine, "pool_counters", None)
+    if counters is not None:
+        stats.update(
+            connects=counters.connects,
+            checkouts=counters.checkouts,
+            invalidations=counters.invalidations,
+        )
+    return stats
+
+
+# Отставание реплики PostgreSQL в секундах; 0, если реплика догнала основную БД
+# (при простое основной БД pg_last_xact_replay_timestamp "стареет" без реального отставания)
+_PG_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaMonitor:
+    """
+    Следит за доступностью и отставанием реплики. Результат проверки кэшируется
+    на REPLICA_LAG_CHECK_INTERVAL секунд; недоступная реплика считается отставшей.
+    Для реплик не на PostgreSQL отставание не измеряется (считается нулевым).
+    """
+
+    def __init__(self, target_engine: Engine, max_lag: float, interval: float):
+        self.engine = target_engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: float | None = None
+        self._available = False
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
+    def cached(self) -> bool | None:
+        """Результат последней проверки или None, если пора проверять заново."""
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at >= self.interval:
+            return None
+        return self._available
+
+    def check(self) -> bool:
+        """Измеряет отставание реплики (блокирующий запрос к реплике)."""
+        with self._lock:
+            cached = self.cached()
+            if cached is not None:
+                return cached
+            try:
+                with self.engine.connect() as connection:
+                    if self.engine.dialect.name == "postgresql":
+                        lag = float(connection.execute(_PG_REPLICA_LAG_SQL).scalar() or 0)
+                    else:
+                        connection.execute(text("SELECT 1"))
+                        lag = 0.0
+                self.lag = lag
+                self._available = lag <= self.max_lag
+            except Exception:
+                self.lag = None
+                self._available = False
+            self._checked_at = time.monotonic()
+            return self._available
+
+    def available(self) -> bool:
+        cached = self.cached()
+        return cached if cached is not None else self.check()
+
+
+engine = create_db_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine = create_db_engine(DATABASE_READ_URL) if DATABASE_READ_URL else None
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine is not None else None
+)
+replica_monitor = (
+    ReplicaMonitor(read_engine, REPLICA_MAX_LAG_SECONDS, REPLICA_LAG_CHECK_INTERVAL)
+    if read_engine is not None else None
+)
+
+
+def read_primary_requested(request: Request) -> bool:
+    """Клиент недавно писал данные: читаем из основной БД, чтобы он увидел свои изменения."""
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db(request: Request):
+    """
+    Сессия только для чтения: реплика, если она настроена и не отстает,
+    иначе основная БД. Эндпоинты с записью используют get_db.
+    """
+    use_replica = (
+        replica_monitor is not None
+        and not read_primary_requested(request)
+        and replica_monitor.available()
+    )
+    db = ReadSessionLocal() if use_replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
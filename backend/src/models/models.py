@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Text, Boolean, DateTime, Date,
-    ForeignKey, Numeric, SmallInteger, UniqueConstraint, Enum, and_, Float, text
+    ForeignKey, Numeric, SmallInteger, UniqueConstraint, Enum, and_, Float, text, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -39,7 +39,7 @@ class ProcurementPlan(Base):
     id = Column(Integer, primary_key=True)
     plan_name = Column(String(500), nullable=False)
     year = Column(SmallInteger, nullable=False)
-    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     creator = relationship("User")
@@ -71,6 +71,9 @@ class ProcurementPlanVersion(Base):
     is_active = Column(Boolean, default=True)
     is_executed = Column(Boolean, default=False, nullable=False)
 
+    # Счетчик изменений версии (позиции, исполнение, статус) — из него строится ETag
+    modification_counter = Column(Integer, default=0, server_default=text("0"), nullable=False)
+
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -85,6 +88,7 @@ class ProcurementPlanVersion(Base):
 
     __table_args__ = (
         UniqueConstraint("plan_id", "version_number", name="uq_plan_version"),
+        Index("ix_procurement_plan_versions_plan_active", "plan_id", "is_active"),
     )
     creator = relationship("User")
 
@@ -155,6 +159,16 @@ class PlanItemVersion(Base):
 
     __table_args__ = (
         UniqueConstraint("version_id", "item_number", "need_type", name="uq_version_item_type"),
+        # Последний номер позиции по типу потребности (добавление позиций, импорт)
+        Index("ix_plan_item_versions_version_type_number", "version_id", "need_type", "item_number"),
+        # Неудаленные позиции версии; частичный индекс там, где он поддерживается
+        Index(
+            "ix_plan_item_versions_version_not_deleted", "version_id",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0"),
+        ),
+        Index("ix_plan_item_versions_kato_delivery_id", "kato_delivery_id"),
+        Index("ix_plan_item_versions_kato_purchase_id", "kato_purchase_id"),
     )
     
     @property
@@ -170,7 +184,7 @@ class PlanItemExecution(Base):
     __tablename__ = "plan_item_executions"
 
     id = Column(Integer, primary_key=True)
-    plan_item_id = Column(Integer, ForeignKey("plan_item_versions.id", ondelete="CASCADE"), nullable=False)
+    plan_item_id = Column(Integer, ForeignKey("plan_item_versions.id", ondelete="CASCADE"), nullable=False, index=True)
     
     supplier_name = Column(String(500), nullable=False)
     supplier_bin = Column(String(12), nullable=False)
@@ -198,14 +212,25 @@ class Mkei(Base):
     code = Column(String(20), unique=True, nullable=False)
     name_kz = Column(Text, nullable=False)
     name_ru = Column(Text, nullable=False)
+    search_text = Column(Text, nullable=True)  # нормализованные код и наименования для поиска
 
 class Kato(Base):
     __tablename__ = "kato"
     id = Column(Integer, primary_key=True)
-    parent_id = Column(Integer)
+    parent_id = Column(Integer, index=True)
+    # Количество дочерних элементов, пересчитывается при загрузке справочника
+    child_count = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    # Материализованный путь от корня вида /1/17/1702/, пересчитывается при загрузке справочника
+    path = Column(String(255), nullable=True)
     code = Column(String(20), unique=True, nullable=False)
     name_kz = Column(Text, nullable=False)
     name_ru = Column(Text, nullable=False)
+    search_text = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # text_pattern_ops нужен PostgreSQL для LIKE 'prefix%' по индексу
+        Index("ix_kato_path", "path", postgresql_ops={"path": "text_pattern_ops"}),
+    )
 
 class Agsk(Base):
     __tablename__ = "agsk"
@@ -215,18 +240,21 @@ class Agsk(Base):
     name_ru = Column(Text, nullable=False)
     standart = Column(Text, nullable=True)
     unit = Column(Text, nullable=True)
+    search_text = Column(Text, nullable=True)
 
 class Cost_Item(Base):
     __tablename__ = "cost_items"
     id = Column(Integer, primary_key=True)
     name_ru = Column(Text, nullable=False)
     name_kz = Column(Text, nullable=False)
+    search_text = Column(Text, nullable=True)
 
 class Source_Funding(Base):
     __tablename__ = "source_funding"
     id = Column(Integer, primary_key=True)
     name_ru = Column(Text, nullable=False)
     name_kz = Column(Text, nullable=False)
+    search_text = Column(Text, nullable=True)
 
 class Enstru(Base):
     __tablename__ = "enstru"
@@ -249,6 +277,7 @@ class Enstru(Base):
     new_code = Column(String(35), nullable=True)  # new_code
     purchasing_group_name = Column(Text, nullable=True)  # purchasing_group_name
     purchasing_subgroup_name = Column(Text, nullable=True)  # purchasing_subgroup_name
+    search_text = Column(Text, nullable=True)
 
 class Reestr_KTP(Base):
     __tablename__ = "reestr_ktp"
@@ -270,10 +299,24 @@ class Reestr_KTP(Base):
     tnved_code_10 = Column(String(10), nullable=True)
     kpved_code = Column(String(20), nullable=True)
     kpved_name = Column(Text, nullable=True)
-    enstru_code = Column(String(50), nullable=True)
+    enstru_code = Column(String(50), nullable=True, index=True)
     enstru_name = Column(Text, nullable=True)
     agsk3_code = Column(String(50), nullable=True)
     agsk3_name = Column(Text, nullable=True)
     dvc_percent = Column(Float, nullable=True)
     localization_level = Column(String(20), nullable=True)
     registry_inclusion_date = Column(Date, nullable=True)
+
+
+class ReferenceGeneration(Base):
+    """
+    Поколение справочников: увеличивается при каждой перезагрузке справочников.
+    Единственная строка (id=1), общая для всех воркеров; token уникален для каждого
+    поколения и любой базы, поэтому подходит для ключей кэшей на диске и ETag.
+    """
+    __tablename__ = "reference_generation"
+
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=1)
+    token = Column(String(32), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,41 +1,44 @@
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from ..database.database import get_db
+from ..database.async_database import get_async_read_db
 from ..schemas import execution_schema
-from ..services import execution_service
-from ..utils.auth import get_current_user
-from ..models import models
+from ..services import execution_service, async_service
+from ..utils.auth import Principal, get_current_user
+from ..utils.responses import FastJSONResponse
 
 router = APIRouter(
     prefix="/executions",
     tags=["Plan Executions (Reports)"],
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_user)],
+    default_response_class=FastJSONResponse
 )
 
 @router.post("/", response_model=execution_schema.Execution, status_code=status.HTTP_201_CREATED)
 def create_execution(
     execution_in: execution_schema.ExecutionCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Создать запись об исполнении (отчет) для позиции плана."""
     return execution_service.create_execution(db=db, execution_in=execution_in, user=current_user)
 
 @router.get("/by-item/{plan_item_id}", response_model=List[execution_schema.Execution])
-def read_executions_by_item(
+async def read_executions_by_item(
     plan_item_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Получить все записи об исполнении для конкретной позиции плана."""
-    return execution_service.get_executions_by_item(db=db, plan_item_id=plan_item_id, user=current_user)
+    return await async_service.get_executions_by_item(db, plan_item_id=plan_item_id, user=current_user)
 
 @router.delete("/{execution_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_execution(
     execution_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Удалить запись об исполнении."""
     execution_service.delete_execution(db=db, execution_id=execution_id, user=current_user)
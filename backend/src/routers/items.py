@@ -1,40 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database.database import get_db
+from ..database.async_database import get_async_read_db
 from ..schemas import plan as plan_schema
-from ..services import item_service
-from ..utils.auth import get_current_user
-from ..models import models
+from ..services import item_service, async_service
+from ..utils.auth import Principal, get_current_user
+from ..utils.responses import FastJSONResponse
 
 router = APIRouter(
     prefix="/items",
     tags=["Plan Items"],
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_user)],
+    default_response_class=FastJSONResponse
 )
 
+@router.get("/", response_model=List[plan_schema.PlanItem])
+async def read_plan_items(
+    kato_delivery_id: Optional[int] = None,
+    kato_purchase_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Позиции активных версий всех планов пользователя.
+    kato_delivery_id / kato_purchase_id — узел КАТО (регион): в выборку попадают
+    позиции с любым КАТО из его поддерева. Пагинация: before_id = id последней полученной позиции.
+    """
+    limit = max(1, min(limit, 500))
+    return await async_service.get_items_by_user(
+        db, user=current_user,
+        kato_delivery_id=kato_delivery_id, kato_purchase_id=kato_purchase_id,
+        before_id=before_id, limit=limit
+    )
+
 @router.get("/{item_id}", response_model=plan_schema.PlanItem)
-def read_plan_item(
+async def read_plan_item(
     item_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Получить конкретную позицию сметы по ID вместе с информацией о ее версии."""
-    db_item = item_service.get_item(db, item_id=item_id)
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Позиция не найдена")
-    
-    # Проверка прав доступа через план
-    if db_item.version.plan.created_by != current_user.id:
-        raise HTTPException(status_code=403, detail="Нет прав для доступа к этой позиции")
-        
-    return db_item
+    # Проверка прав доступа через план выполняется в сервисе (404 / 403)
+    return await async_service.get_item_for_user(db, item_id=item_id, user=current_user)
 
 @router.put("/{item_id}", response_model=plan_schema.PlanItem)
 def update_plan_item(
     item_id: int,
     item_in: plan_schema.PlanItemUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Обновить позицию сметы.
@@ -47,7 +65,7 @@ def update_plan_item(
 def delete_plan_item(
     item_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Удалить позицию сметы.
@@ -60,7 +78,7 @@ def delete_plan_item(
 def revert_plan_item(
     item_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Откатить изменения позиции к состоянию из предыдущей версии плана.
@@ -1,25 +1,50 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from ..database.database import get_db
-from ..services import kato_service
+from ..database.database import get_read_db
+from ..services import kato_service, kato_snapshot, reference_generation
 from ..schemas.kato_schema import KatoSchema
+from ..utils.etag import etag_matches
 
+# Эндпоинты KATO синхронные: сборка дерева и сжатие снимка после смены поколения
+# справочников нагружают CPU и должны идти в пуле потоков, а не в event loop
 router = APIRouter()
 
 @router.get("/", response_model=List[KatoSchema])
-def read_kato_children(parent_id: int | None = 0, db: Session = Depends(get_db)):
+def read_kato_children(parent_id: int | None = 0, db: Session = Depends(get_read_db)):
     kato_items = kato_service.get_kato_children(db, parent_id=parent_id)
     return [KatoSchema(**kato) for kato in kato_items]
 
+@router.get("/tree")
+def read_kato_tree(request: Request, db: Session = Depends(get_read_db)):
+    """
+    Все дерево KATO одним ответом в колоночном виде (параллельные массивы
+    id, parent_id, code, name_ru, name_kz), сжатое gzip, если клиент его принимает.
+    У сжатого и несжатого ответа разные ETag; оба меняются только при перезагрузке справочников.
+    """
+    snapshot = kato_snapshot.get_snapshot(db, reference_generation.get_generation(db))
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+    etag = snapshot.etag if use_gzip else snapshot.identity_etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={kato_snapshot.KATO_SNAPSHOT_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+    return Response(content=snapshot.identity_body, media_type="application/json", headers=headers)
+
 @router.get("/{kato_id}", response_model=KatoSchema)
-def read_kato_by_id(kato_id: int, db: Session = Depends(get_db)):
+def read_kato_by_id(kato_id: int, db: Session = Depends(get_read_db)):
     kato = kato_service.get_kato_by_id(db, kato_id)
     if kato is None:
         raise HTTPException(status_code=404, detail="Kato not found")
     return KatoSchema(**kato)
 
 @router.get("/{kato_id}/parents", response_model=List[KatoSchema])
-def read_kato_parents(kato_id: int, db: Session = Depends(get_db)):
+def read_kato_parents(kato_id: int, db: Session = Depends(get_read_db)):
     parents = kato_service.get_kato_parents(db, kato_id)
     return [KatoSchema(**parent) for parent in parents]
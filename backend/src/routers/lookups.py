@@ -1,103 +1,64 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ..database.database import get_db
+from ..database.async_database import get_async_read_db
 from ..schemas import lookup as lookup_schema
-from ..models import models
+from ..services import lookup_cache, async_service
+from ..utils.responses import FastJSONResponse
+from ..utils.etag import etag_matches
 
 router = APIRouter(
     prefix="/lookups",
     tags=["Lookups"],
+    default_response_class=FastJSONResponse
 )
 
+async def _cached_lookup(request: Request, db: AsyncSession, table: str, q: Optional[str], schema) -> Response:
+    """
+    Результат поиска по справочнику через кэш процесса с заголовками ETag/Cache-Control,
+    чтобы небольшие справочники кэшировались также браузером и обратным прокси.
+    """
+    cached = await async_service.cached_lookup(db, table, q, schema)
+    headers = {"ETag": cached.etag, "Cache-Control": f"public, max-age={lookup_cache.LOOKUP_CACHE_TTL}"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FastJSONResponse(content=cached.payload, headers=headers)
+
 @router.get("/check-ktp/{enstru_code}")
-def check_ktp_by_enstru(enstru_code: str, db: Session = Depends(get_db)):
+async def check_ktp_by_enstru(enstru_code: str, db: AsyncSession = Depends(get_async_read_db)):
     """Проверяет, есть ли код ЕНС ТРУ в реестре КТП."""
-    exists = db.query(models.Reestr_KTP).filter(models.Reestr_KTP.enstru_code == enstru_code).first()
-    return {"is_ktp": exists is not None}
+    return {"is_ktp": await async_service.is_ktp(db, enstru_code)}
+
+@router.post("/resolve", response_model=lookup_schema.ResolveResponse)
+async def resolve_codes(request_in: lookup_schema.ResolveRequest, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Пакетно разрешает коды ЕНС ТРУ, КАТО (по id и коду), МКЕИ и АГСК.
+    Заменяет множество запросов check-ktp и поиска по одному коду при открытии плана.
+    """
+    return await async_service.resolve_codes(db, request_in)
 
 @router.get("/mkei", response_model=List[lookup_schema.Mkei])
-def get_mkei_list(q: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.Mkei)
-    if q:
-        search_term = f"%{q}%"
-        query = query.filter(or_(
-            models.Mkei.code.ilike(search_term),
-            models.Mkei.name_ru.ilike(search_term),
-            models.Mkei.name_kz.ilike(search_term)
-        ))
-    
-    result = query.limit(50).all()
-    return result
+async def get_mkei_list(request: Request, q: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached_lookup(request, db, "mkei", q, lookup_schema.Mkei)
 
 @router.get("/kato", response_model=List[lookup_schema.Kato])
-def get_kato_list(q: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.Kato)
-    if q:
-        search_term = f"%{q}%"
-        query = query.filter(or_(
-            models.Kato.code.ilike(search_term),
-            models.Kato.name_ru.ilike(search_term),
-            models.Kato.name_kz.ilike(search_term)
-        ))
-    
-    result = query.limit(50).all()
-    return result
+async def get_kato_list(request: Request, q: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached_lookup(request, db, "kato", q, lookup_schema.Kato)
 
 @router.get("/agsk", response_model=List[lookup_schema.Agsk])
-def get_agsk_list(q: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.Agsk)
-    if q:
-        search_term = f"%{q}%"
-        query = query.filter(or_(
-            models.Agsk.group.ilike(search_term),
-            models.Agsk.code.ilike(search_term),
-            models.Agsk.name_ru.ilike(search_term)
-        ))
-    
-    result = query.limit(50).all()
-    return result
+async def get_agsk_list(q: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    return await async_service.search(db, "agsk", q, lookup_schema.Agsk)
 
 @router.get("/cost-items", response_model=List[lookup_schema.CostItem])
-def get_cost_item_list(q: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.Cost_Item)
-    if q:
-        search_term = f"%{q}%"
-        query = query.filter(or_(
-            models.Cost_Item.name_ru.ilike(search_term),
-            models.Cost_Item.name_kz.ilike(search_term)
-        ))
-    
-    result = query.limit(50).all()
-    return result
+async def get_cost_item_list(request: Request, q: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached_lookup(request, db, "cost_items", q, lookup_schema.CostItem)
 
 @router.get("/source-funding", response_model=List[lookup_schema.SourceFunding])
-def get_source_funding_list(q: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.Source_Funding)
-    if q:
-        search_term = f"%{q}%"
-        query = query.filter(or_(
-            models.Source_Funding.name_ru.ilike(search_term),
-            models.Source_Funding.name_kz.ilike(search_term)
-        ))
-    
-    result = query.limit(50).all()
-    return result
+async def get_source_funding_list(request: Request, q: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached_lookup(request, db, "source_funding", q, lookup_schema.SourceFunding)
 
 @router.get("/enstru", response_model=List[lookup_schema.Enstru])
-def get_enstru_list(q: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.Enstru)
-    if q:
-        search_term = f"%{q}%"
-        query = query.filter(
-            or_(
-                models.Enstru.code.ilike(search_term),
-                models.Enstru.name_rus.ilike(search_term),
-                models.Enstru.name_kaz.ilike(search_term),
-            )
-        )
-    
-    result = query.limit(50).all()
-    return result
\ No newline at end of file
+async def get_enstru_list(q: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    """Поиск ЕНС ТРУ: сначала совпадения по префиксу кода, затем по наименованию."""
+    return await async_service.search(db, "enstru", q, lookup_schema.Enstru)
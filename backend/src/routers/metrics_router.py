@@ -0,0 +1,56 @@
+import os
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from ..database.async_database import created_async_engines
+from ..database.database import engine, get_pool_stats, read_engine
+from ..utils import metrics
+
+# Если задан, /metrics требует заголовок Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+router = APIRouter(tags=["Monitoring"])
+
+
+def _engines() -> dict:
+    engines = {"primary": engine}
+    if read_engine is not None:
+        engines["replica"] = read_engine
+    for name, async_engine in created_async_engines().items():
+        engines[f"async_{name}"] = async_engine.sync_engine
+    return engines
+
+
+@metrics.register_collector
+def _collect_pools() -> list[metrics.CollectedMetric]:
+    pool_stats = {name: get_pool_stats(target) for name, target in _engines().items()}
+    gauges = (
+        ("size", "Размер пула соединений"),
+        ("checked_out", "Занятые соединения пула"),
+        ("checked_in", "Свободные соединения пула"),
+        ("overflow", "Соединения сверх размера пула (отрицательное — запас до pool_size)"),
+    )
+    result = [
+        metrics.CollectedMetric(
+            f"baiterek_db_pool_{key}", "gauge", documentation,
+            [(f"baiterek_db_pool_{key}", {"engine": name}, stats[key])
+             for name, stats in pool_stats.items() if key in stats]
+        )
+        for key, documentation in gauges
+    ]
+    result.append(metrics.CollectedMetric(
+        "baiterek_db_pool_connects_total", "counter", "Новые соединения с БД",
+        [("baiterek_db_pool_connects_total", {"engine": name}, stats["connects"])
+         for name, stats in pool_stats.items() if "connects" in stats]
+    ))
+    return result
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics(authorization: str | None = Header(None)):
+    """Метрики процесса в текстовом формате Prometheus."""
+    if METRICS_TOKEN and not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный токен метрик")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,63 @@
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from ..database.database import engine, get_pool_stats, read_engine, replica_monitor
+from ..utils import profiling, query_stats
+from ..utils.auth import get_current_user
+
+router = APIRouter(
+    prefix="/monitoring",
+    tags=["Monitoring"],
+    dependencies=[Depends(get_current_user)]
+)
+
+def require_profile_token(x_profile_token: str | None = Header(None)):
+    """
+    Доступ к тексту SQL и профилям — только с токеном профилирования (PROFILING_TOKEN):
+    вход в приложение принимает любого пользователя.
+    """
+    if not profiling.is_requested({profiling.PROFILE_TOKEN_HEADER: x_profile_token}):
+        raise HTTPException(status_code=403, detail="Профилирование недоступно")
+
+
+@router.get("/pool")
+def read_pool_stats():
+    """Состояние пулов соединений с основной БД и репликой (если настроена)."""
+    stats = {"primary": get_pool_stats(engine)}
+    if read_engine is not None:
+        stats["replica"] = {
+            **get_pool_stats(read_engine),
+            "available": replica_monitor.available(),
+            "lag_seconds": replica_monitor.lag,
+        }
+    return stats
+
+
+@router.get("/queries", dependencies=[Depends(require_profile_token)])
+@profiling.not_profiled
+def read_query_stats(limit: int = Query(10, ge=1, le=100)):
+    """
+    Маршруты с наибольшим средним числом SQL-запросов и самые повторяющиеся
+    запросы каждого из них (кандидаты на N+1). Статистика с момента запуска процесса.
+    Доступны только с токеном профилирования.
+    """
+    return {
+        "enabled": query_stats.SQL_STATS_ENABLED,
+        "repeat_warn_threshold": query_stats.SQL_REPEAT_WARN_THRESHOLD,
+        "routes": query_stats.get_offenders(limit),
+    }
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profile_token)])
+@profiling.not_profiled
+def download_profile(profile_id: str):
+    """
+    Профиль запроса в формате collapsed stacks (id — из заголовка X-Profile-Id).
+    Доступен только с токеном профилирования.
+    """
+    path = profiling.profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=os.path.basename(path))
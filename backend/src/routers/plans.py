@@ -1,27 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response
 from fastapi.responses import StreamingResponse, JSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 import io
-from ..database.database import get_db
+from ..database.database import get_db, get_read_db
+from ..database.async_database import get_async_read_db
 from ..schemas import plan as plan_schema
-from ..services import plan_service, import_service
-from ..utils.auth import get_current_user
-from ..models import models
+from ..services import plan_service, import_service, async_service
+from ..utils.auth import Principal, get_current_user
+from ..utils.responses import FastJSONResponse
+from ..utils.etag import etag_matches
 
 router = APIRouter(
     prefix="/plans",
     tags=["Procurement Plans & Versions"],
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_user)],
+    default_response_class=FastJSONResponse
 )
 
+def _etag_headers(etag: str) -> dict:
+    # no-cache: браузер хранит ответ, но каждый раз перепроверяет его через If-None-Match
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
 # ========= Эндпоинты для Планов (ProcurementPlan) =========
 
 @router.post("/", response_model=plan_schema.ProcurementPlan, status_code=status.HTTP_201_CREATED)
 def create_procurement_plan(
     plan_in: plan_schema.ProcurementPlanCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Создать новый план закупок.
@@ -30,39 +38,74 @@ def create_procurement_plan(
     return plan_service.create_plan(db=db, plan_in=plan_in, user=current_user)
 
 @router.get("/", response_model=List[plan_schema.ProcurementPlanWithVersions])
-def read_user_procurement_plans(
+async def read_user_procurement_plans(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Получить список планов закупок для текущего пользователя со всеми их версиями.
+    Поддерживает условный GET: при совпадении If-None-Match возвращается 304.
+    Главная страница использует /plans/summary.
     """
-    plans = plan_service.get_plans_by_user(db, user=current_user, skip=skip, limit=limit)
+    etag = await async_service.get_plans_etag(db, user=current_user, skip=skip, limit=limit)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_etag_headers(etag))
+
+    plans = await async_service.get_plans_by_user(db, user=current_user, skip=skip, limit=limit)
+    response.headers.update(_etag_headers(etag))
     return plans
 
+@router.get("/summary", response_model=plan_schema.ProcurementPlanSummaryPage)
+async def read_user_plan_summaries(
+    before_id: Optional[int] = None,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Получить страницу сводок по планам пользователя: статус активной версии,
+    количество позиций, общая и исполненная сумма, процент исполнения.
+    Для следующей страницы передайте next_cursor в параметре before_id.
+    """
+    limit = max(1, min(limit, 200))
+    return await async_service.get_plan_summaries_by_user(db, user=current_user, before_id=before_id, limit=limit)
+
 @router.get("/{plan_id}", response_model=plan_schema.ProcurementPlanWithFullActiveVersion)
-def read_procurement_plan_with_active_version(
+async def read_procurement_plan_with_active_version(
     plan_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Получить конкретный план по ID с его активной версией и всеми позициями.
+    ETag строится по счетчикам изменений версий; если он совпадает с If-None-Match,
+    возвращается 304 без загрузки позиций.
     """
-    db_plan = plan_service.get_plan_with_active_version(db, plan_id=plan_id)
-    if db_plan is None:
+    created_by, etag = await async_service.get_plan_etag(db, plan_id=plan_id)
+    if created_by is None:
         raise HTTPException(status_code=404, detail="План не найден")
-    if db_plan.created_by != current_user.id:
+    if created_by != current_user.id:
         raise HTTPException(status_code=403, detail="Нет прав для доступа к этому плану")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_etag_headers(etag))
+
+    db_plan = await async_service.get_plan_with_active_version(db, plan_id=plan_id)
+    if db_plan is None:
+        raise HTTPException(status_code=404, detail="План не найден")
+    response.headers.update(_etag_headers(etag))
     return db_plan
 
 @router.delete("/{plan_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_procurement_plan(
     plan_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Удалить план закупок.
@@ -80,11 +123,25 @@ def delete_procurement_plan(
 
 # ========= Эндпоинты для Версий Плана (ProcurementPlanVersion) =========
 
+@router.get("/{plan_id}/versions", response_model=List[plan_schema.ProcurementPlanVersion])
+def read_plan_versions(
+    plan_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """История версий плана (без позиций) — для раскрытой строки списка планов."""
+    db_plan = plan_service.get_plan_versions(db, plan_id=plan_id)
+    if db_plan is None:
+        raise HTTPException(status_code=404, detail="План не найден")
+    if db_plan.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Нет прав для доступа к этому плану")
+    return db_plan.versions
+
 @router.post("/{plan_id}/versions", response_model=plan_schema.ProcurementPlanVersion)
 def create_new_version(
     plan_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Создать новую версию (v+1) для редактирования из последней одобренной.
@@ -101,7 +158,7 @@ def update_active_version_status(
     plan_id: int,
     status_in: plan_schema.ProcurementPlanStatusUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Обновить статус активной версии плана (DRAFT -> PRE_APPROVED -> APPROVED).
@@ -117,7 +174,7 @@ def update_active_version_status(
 def delete_latest_plan_version(
     plan_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Удалить последнюю версию, если она в статусе DRAFT.
@@ -134,8 +191,8 @@ def delete_latest_plan_version(
 def export_version_to_excel(
     plan_id: int,
     version_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Экспортировать конкретную версию сметы в Excel."""
     db_plan = plan_service.get_plan_with_active_version(db, plan_id=plan_id)
@@ -157,7 +214,7 @@ def create_plan_item_for_active_version(
     plan_id: int,
     item_in: plan_schema.PlanItemCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Добавить новую позицию в активную версию сметы.
@@ -171,7 +228,7 @@ def create_plan_item_for_active_version(
 # ========= Эндпоинты для Импорта =========
 
 @router.get("/template/download", tags=["Import"])
-def download_import_template(db: Session = Depends(get_db)):
+def download_import_template(db: Session = Depends(get_read_db)):
     """Скачать Excel-шаблон для импорта позиций."""
     excel_data = import_service.generate_import_template(db)
     return StreamingResponse(
@@ -185,7 +242,7 @@ def import_items_from_file(
     plan_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Импортировать позиции из Excel файла в активную версию плана."""
     return import_service.process_import_file(db=db, plan_id=plan_id, file=file, user=current_user)
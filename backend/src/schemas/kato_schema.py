@@ -7,6 +7,7 @@ class KatoSchema(BaseModel):
     name_kz: str
     name_ru: str
     has_children: bool
+    child_count: int = 0
 
     class Config:
         from_attributes = True
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 # Схема для User (для отображения в других схемах)
@@ -111,3 +111,27 @@ class InitialOptions(BaseModel):
     cost_item: Optional[CostItem] = None
     source_funding: Optional[SourceFunding] = None
     mkei: Optional[Mkei] = None
+
+
+# --- Схемы для пакетного разрешения кодов ---
+
+# Ограничение на размер каждого списка, чтобы IN-запрос оставался разумным
+RESOLVE_MAX_CODES = 1000
+
+class ResolveRequest(BaseModel):
+    enstru_codes: List[str] = Field(default_factory=list, max_length=RESOLVE_MAX_CODES)
+    kato_ids: List[int] = Field(default_factory=list, max_length=RESOLVE_MAX_CODES)
+    kato_codes: List[str] = Field(default_factory=list, max_length=RESOLVE_MAX_CODES)
+    mkei_codes: List[str] = Field(default_factory=list, max_length=RESOLVE_MAX_CODES)
+    agsk_codes: List[str] = Field(default_factory=list, max_length=RESOLVE_MAX_CODES)
+
+class EnstruResolved(Enstru):
+    """ЕНС ТРУ вместе с признаком наличия в реестре КТП и минимальным % ВЦ по реестру."""
+    is_ktp: bool = False
+    min_dvc_percent: Optional[float] = None
+
+class ResolveResponse(BaseModel):
+    enstru: List[EnstruResolved] = []
+    kato: List[Kato] = []
+    mkei: List[Mkei] = []
+    agsk: List[Agsk] = []
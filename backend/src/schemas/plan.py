@@ -149,6 +149,24 @@ class ProcurementPlanWithVersions(ProcurementPlan):
     """План со списком всех его версий (без позиций)."""
     versions: List[ProcurementPlanVersion] = []
 
+class ProcurementPlanSummary(ProcurementPlan):
+    """Строка списка планов: показатели активной версии, посчитанные на стороне БД."""
+    active_version_id: Optional[int] = None
+    active_version_number: Optional[int] = None
+    status: Optional[PlanStatus] = None
+    is_executed: bool = False
+    items_count: int = 0
+    total_amount: Decimal = Field(default=0)
+    executed_amount: Decimal = Field(default=0)
+    executed_percent: Decimal = Field(default=0)
+    versions_count: int = 0
+    has_approved_versions: bool = False
+
+class ProcurementPlanSummaryPage(BaseModel):
+    """Страница списка планов. next_cursor передается как before_id для следующей страницы."""
+    items: List[ProcurementPlanSummary] = []
+    next_cursor: Optional[int] = None
+
 class ProcurementPlanWithFullActiveVersion(ProcurementPlan):
     """План с полной информацией по активной версии, включая все ее позиции."""
     versions: List[ProcurementPlanVersionWithItems] = []
@@ -0,0 +1,133 @@
+"""
+Асинхронные версии сервисов для эндпоинтов на AsyncSession.
+
+Бизнес-логика остается в синхронных сервисах: она выполняется через
+AsyncSession.run_sync в greenlet асинхронного драйвера. Результат там же
+превращается в Pydantic-схему — ленивые загрузки ORM вне run_sync недоступны.
+run_sync выполняется в потоке event loop, поэтому сервисы здесь не должны
+держать threading.Lock на время запросов к БД, а тяжелые по CPU операции
+(экспорт/импорт Excel, дерево KATO) сюда не переносятся. Большие ответы
+(план со всеми позициями, списки) валидируются в пуле потоков: все связи
+для них загружаются заранее, и ленивой загрузки там не будет.
+"""
+from functools import lru_cache, partial
+from typing import Any, Callable, List
+
+import anyio
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import models
+from ..schemas import execution_schema, lookup as lookup_schema, plan as plan_schema
+from . import execution_service, item_service, lookup_cache, lookup_service, plan_service, search_service
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+async def run_sync_service(db: AsyncSession, func: Callable, *args, schema=None, **kwargs) -> Any:
+    """
+    Вызывает синхронную функцию сервиса func(session, *args, **kwargs) на AsyncSession.
+    Если указана schema, результат сериализуется в нее внутри того же вызова.
+    """
+    def call(session: Session):
+        result = func(session, *args, **kwargs)
+        if schema is None or result is None:
+            return result
+        return _adapter(schema).validate_python(result, from_attributes=True)
+
+    return await db.run_sync(call)
+
+
+async def run_sync_service_in_thread(db: AsyncSession, func: Callable, *args, schema, **kwargs) -> Any:
+    """
+    Как run_sync_service, но результат валидируется в schema в пуле потоков, а не в event loop.
+    Все, что читает схема, func должна загрузить заранее: ленивая загрузка в потоке пула упадет
+    с MissingGreenlet, а не выполнит незаметный запрос.
+    """
+    result = await run_sync_service(db, func, *args, **kwargs)
+    if result is None:
+        return None
+    return await anyio.to_thread.run_sync(partial(_adapter(schema).validate_python, result, from_attributes=True))
+
+
+# ========= Планы =========
+
+async def get_plans_etag(db: AsyncSession, user: models.User, **params) -> str:
+    return await run_sync_service(db, plan_service.get_plans_etag, user, **params)
+
+async def get_plans_by_user(db: AsyncSession, user: models.User, skip: int = 0, limit: int = 100):
+    return await run_sync_service_in_thread(
+        db, plan_service.get_plans_by_user, user, skip=skip, limit=limit,
+        schema=List[plan_schema.ProcurementPlanWithVersions]
+    )
+
+async def get_plan_summaries_by_user(db: AsyncSession, user: models.User, before_id: int | None = None, limit: int = 50):
+    return await run_sync_service(db, plan_service.get_plan_summaries_by_user, user, before_id=before_id, limit=limit)
+
+async def get_plan_etag(db: AsyncSession, plan_id: int) -> tuple[int | None, str | None]:
+    return await run_sync_service(db, plan_service.get_plan_etag, plan_id)
+
+async def get_plan_with_active_version(db: AsyncSession, plan_id: int):
+    return await run_sync_service_in_thread(
+        db, plan_service.get_plan_with_active_version, plan_id,
+        schema=plan_schema.ProcurementPlanWithFullActiveVersion
+    )
+
+
+# ========= Позиции =========
+
+def _get_item_for_user(db: Session, item_id: int, user: models.User) -> models.PlanItemVersion:
+    db_item = item_service.get_item(db, item_id=item_id)
+    if db_item is None:
+        raise HTTPException(status_code=404, detail="Позиция не найдена")
+    if db_item.version.plan.created_by != user.id:
+        raise HTTPException(status_code=403, detail="Нет прав для доступа к этой позиции")
+    return db_item
+
+async def get_item_for_user(db: AsyncSession, item_id: int, user: models.User):
+    """Позиция плана с проверкой прав (404 / 403)."""
+    return await run_sync_service(db, _get_item_for_user, item_id, user, schema=plan_schema.PlanItem)
+
+async def get_items_by_user(db: AsyncSession, user: models.User, **params):
+    return await run_sync_service_in_thread(
+        db, item_service.get_items_by_user, user, schema=List[plan_schema.PlanItem], **params
+    )
+
+
+# ========= Исполнение =========
+
+async def get_executions_by_item(db: AsyncSession, plan_item_id: int, user: models.User):
+    return await run_sync_service(
+        db, execution_service.get_executions_by_item, plan_item_id, user,
+        schema=List[execution_schema.Execution]
+    )
+
+
+# ========= Справочники =========
+
+async def search(db: AsyncSession, name: str, q: str | None, schema) -> list:
+    return await run_sync_service(db, search_service.search, name, q, schema=List[schema])
+
+def _cached_lookup(db: Session, table: str, q: str | None, schema) -> lookup_cache.CachedLookup:
+    return lookup_cache.get_or_load(
+        db, table, q,
+        lambda: [schema.model_validate(row).model_dump(mode="json") for row in search_service.search(db, table, q)]
+    )
+
+async def cached_lookup(db: AsyncSession, table: str, q: str | None, schema) -> lookup_cache.CachedLookup:
+    """Результат поиска по справочнику через кэш процесса (см. lookup_cache)."""
+    return await run_sync_service(db, _cached_lookup, table, q, schema)
+
+async def resolve_codes(db: AsyncSession, request: lookup_schema.ResolveRequest) -> lookup_schema.ResolveResponse:
+    return await run_sync_service(db, lookup_service.resolve_codes, request, schema=lookup_schema.ResolveResponse)
+
+def _is_ktp(db: Session, enstru_code: str) -> bool:
+    return db.query(models.Reestr_KTP.id).filter(models.Reestr_KTP.enstru_code == enstru_code).first() is not None
+
+async def is_ktp(db: AsyncSession, enstru_code: str) -> bool:
+    return await run_sync_service(db, _is_ktp, enstru_code)
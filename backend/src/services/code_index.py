@@ -0,0 +1,97 @@
+import os
+import time
+from array import array
+from bisect import bisect_left
+
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .reference_generation import get_generation
+
+# Как и дерево KATO, индексы сверяются с поколением справочников
+# не чаще раза в CODE_INDEX_POLL_INTERVAL секунд
+CODE_INDEX_POLL_INTERVAL = float(os.getenv("CODE_INDEX_POLL_INTERVAL", "5"))
+
+
+class CodePrefixIndex:
+    """
+    Отсортированный массив кодов справочника в памяти процесса.
+    Поиск по префиксу кода — двоичный поиск и проход по соседним элементам,
+    без запроса в БД. Хранятся только коды и id, сами записи догружаются по первичному ключу.
+    Индекс помнит поколение справочников, для которого загружен, и перезагружается,
+    если справочники обновил другой воркер.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        # (ключи, id, поколение) заменяются одним присваиванием, чтобы читатели не видели
+        # половину данных. Загрузка идет без блокировки по той же причине, что и в kato_tree
+        self._data: tuple[list[str], array, str | None] = ([], array("q"), None)
+        self._checked_at = 0.0
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._data[0])
+
+    @property
+    def generation(self) -> str | None:
+        return self._data[2]
+
+    def load(self, db: Session, generation: str | None = None):
+        """Загружает (или перезагружает) все коды справочника для текущего поколения справочников."""
+        if generation is None:
+            generation = get_generation(db)
+        rows = db.query(self.model.code, self.model.id).all()
+        pairs = sorted((code.casefold(), row_id) for code, row_id in rows if code)
+        self._data = ([key for key, _ in pairs], array("q", (row_id for _, row_id in pairs)), generation)
+        self._checked_at = time.monotonic()
+        self.loaded = True
+
+    def refresh(self, db: Session):
+        """Перезагружает индекс, если поколение справочников сменилось с момента загрузки."""
+        if time.monotonic() - self._checked_at < CODE_INDEX_POLL_INTERVAL:
+            return
+        generation = get_generation(db)
+        if generation != self.generation:
+            self.load(db, generation)
+        self._checked_at = time.monotonic()
+
+    def find_prefix(self, prefix: str, limit: int = 50) -> list[int]:
+        """Возвращает id записей, код которых начинается с prefix, в порядке кодов."""
+        keys, ids, _ = self._data
+        prefix = prefix.casefold()
+        start = bisect_left(keys, prefix)
+        result = []
+        for position in range(start, min(start + limit, len(keys))):
+            if not keys[position].startswith(prefix):
+                break
+            result.append(ids[position])
+        return result
+
+
+INDEXES = {
+    "enstru": CodePrefixIndex(models.Enstru),
+    "agsk": CodePrefixIndex(models.Agsk),
+}
+
+
+def load_all(db: Session):
+    generation = get_generation(db)
+    for index in INDEXES.values():
+        index.load(db, generation)
+
+
+def find_by_prefix(db: Session, name: str, prefix: str, limit: int = 50) -> list | None:
+    """
+    Записи справочника с кодом, начинающимся с prefix, в порядке кодов.
+    Возвращает None, если для справочника нет загруженного индекса.
+    """
+    index = INDEXES.get(name)
+    if index is None or not index.loaded:
+        return None
+    index.refresh(db)
+    ids = index.find_prefix(prefix, limit)
+    if not ids:
+        return []
+    rows_by_id = {row.id: row for row in db.query(index.model).filter(index.model.id.in_(ids)).all()}
+    return [rows_by_id[row_id] for row_id in ids if row_id in rows_by_id]
@@ -3,6 +3,7 @@ from sqlalchemy import func
 from fastapi import HTTPException, status
 from ..models import models
 from ..schemas import execution_schema
+from .plan_service import _touch_version
 
 def _recalculate_item_execution_status(db: Session, item_id: int):
     """
@@ -39,6 +40,8 @@ def _check_and_update_plan_execution_status(db: Session, version_id: int):
         models.PlanItemVersion.is_deleted == False
     ).all()
 
+    _touch_version(version)
+
     if not items:
         version.is_executed = False
         db.commit()
@@ -1,7 +1,9 @@
 import io
+import time
 from decimal import Decimal
+from typing import NamedTuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 from fastapi import UploadFile, HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
 import openpyxl
@@ -10,7 +12,8 @@ from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.workbook.defined_name import DefinedName
 from openpyxl.utils import quote_sheetname
 from ..models import models
-from ..services import plan_service
+from ..services import plan_service, kato_service
+from ..utils import metrics
 
 def generate_import_template(db: Session) -> bytes:
     """Генерирует Excel-шаблон с отдельными листами для справочников и именованными диапазонами."""
@@ -163,9 +166,52 @@ def generate_error_report(errors: list) -> bytes:
     return virtual_workbook.getvalue()
 
 
+class _ImportReferences(NamedTuple):
+    enstru: dict
+    mkei: dict
+    agsk_codes: set
+    kato_ids: dict
+    cost_items: dict
+    min_dvc_by_code: dict
+
+
+def _load_references(db: Session, rows: list, extract_code) -> _ImportReferences:
+    """Записи справочников, на которые ссылаются строки файла импорта: по одному запросу на таблицу."""
+    def codes(column):
+        return {code for code in (extract_code(row_data[column]) for _, row_data in rows) if code}
+
+    trucodes = {str(row_data[1]).strip() for _, row_data in rows if row_data[1] and str(row_data[1]).strip()}
+    agsk_codes = {str(row_data[13]).strip() for _, row_data in rows if row_data[13] and str(row_data[13]).strip()}
+    unit_codes = codes(5)
+    cost_item_ids = set()
+    for code in codes(11):
+        try:
+            cost_item_ids.add(int(code))
+        except ValueError:
+            pass
+
+    # Минимальный % ВЦ по реестру КТП (тот же, что потом выставит _recalculate_version_metrics)
+    ktp_rows = db.query(
+        models.Reestr_KTP.enstru_code,
+        func.min(models.Reestr_KTP.dvc_percent)
+    ).filter(
+        models.Reestr_KTP.enstru_code.in_(trucodes)
+    ).group_by(models.Reestr_KTP.enstru_code).all() if trucodes else []
+
+    return _ImportReferences(
+        enstru={e.code: e for e in db.query(models.Enstru).filter(models.Enstru.code.in_(trucodes)).all()} if trucodes else {},
+        mkei={u.code: u for u in db.query(models.Mkei).filter(models.Mkei.code.in_(unit_codes)).all()} if unit_codes else {},
+        agsk_codes={code for code, in db.query(models.Agsk.code).filter(models.Agsk.code.in_(agsk_codes)).all()} if agsk_codes else set(),
+        kato_ids=kato_service.get_kato_ids_by_codes(db, codes(9) | codes(10)),
+        cost_items={c.id: c for c in db.query(models.Cost_Item).filter(models.Cost_Item.id.in_(cost_item_ids)).all()} if cost_item_ids else {},
+        min_dvc_by_code={code: min_dvc for code, min_dvc in ktp_rows}
+    )
+
+
 def process_import_file(db: Session, plan_id: int, file: UploadFile, user: models.User):
     """Читает Excel и создает позиции."""
-    
+    started = time.perf_counter()
+
     active_version = plan_service._get_active_version(db, plan_id)
     if not active_version:
         raise HTTPException(status_code=404, detail="Активная версия плана не найдена")
@@ -213,6 +259,7 @@ def process_import_file(db: Session, plan_id: int, file: UploadFile, user: model
             return val_str.split(" - ")[0].strip()
         return val_str
 
+    rows = []
     for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
         # Проверяем, пустая ли строка
         is_empty = True
@@ -225,8 +272,13 @@ def process_import_file(db: Session, plan_id: int, file: UploadFile, user: model
             continue
 
         # Приводим строку к фиксированной длине (16 колонок)
-        row_data = list(row) + [None] * max(0, 16 - len(row))
+        rows.append((row_idx, list(row) + [None] * max(0, 16 - len(row))))
 
+    # Справочники для всех строк файла загружаются заранее, по одному IN-запросу на таблицу,
+    # чтобы число запросов не зависело от размера файла
+    refs = _load_references(db, rows, extract_code)
+
+    for row_idx, row_data in rows:
         trucode_val = row_data[1]
         if not trucode_val or not str(trucode_val).strip():
             errors.append({"row": row_idx, "message": "Не указан код ЕНС ТРУ"})
@@ -234,7 +286,7 @@ def process_import_file(db: Session, plan_id: int, file: UploadFile, user: model
         trucode = str(trucode_val).strip()
 
         # Валидация в БД
-        enstru = db.query(models.Enstru).filter(models.Enstru.code == trucode).first()
+        enstru = refs.enstru.get(trucode)
         if not enstru:
             errors.append({"row": row_idx, "message": f"Не найден ЕНС ТРУ {trucode}"})
             continue
@@ -269,7 +321,7 @@ def process_import_file(db: Session, plan_id: int, file: UploadFile, user: model
             if not unit_code:
                 errors.append({"row": row_idx, "message": "Не указан код ед. изм. (обязательно для товаров)"})
                 continue
-            unit = db.query(models.Mkei).filter(models.Mkei.code == unit_code).first()
+            unit = refs.mkei.get(unit_code)
             if not unit:
                 errors.append({"row": row_idx, "message": f"Не найден код ед. изм. {unit_code}"})
                 continue
@@ -328,23 +380,22 @@ def process_import_file(db: Session, plan_id: int, file: UploadFile, user: model
             if agsk_code_from_file.lower() == "прайс-лист":
                 agsk_code = None
             else:
-                agsk_exists = db.query(models.Agsk).filter(models.Agsk.code == agsk_code_from_file).first()
-                if not agsk_exists:
+                if agsk_code_from_file not in refs.agsk_codes:
                     errors.append({"row": row_idx, "message": f"Код АГСК '{agsk_code_from_file}' не найден в базе данных."})
                     continue
                 agsk_code = agsk_code_from_file
 
-        kato_purchase = db.query(models.Kato).filter(models.Kato.code == kato_p_code).first()
-        if not kato_purchase:
+        kato_purchase_id = refs.kato_ids.get(kato_p_code)
+        if not kato_purchase_id:
             errors.append({"row": row_idx, "message": f"Не найден КАТО закупки {kato_p_code}"})
             continue
 
-        kato_delivery = db.query(models.Kato).filter(models.Kato.code == kato_d_code).first()
-        if not kato_delivery:
+        kato_delivery_id = refs.kato_ids.get(kato_d_code)
+        if not kato_delivery_id:
             errors.append({"row": row_idx, "message": f"Не найден КАТО поставки {kato_d_code}"})
             continue
 
-        expense_item = db.query(models.Cost_Item).filter(models.Cost_Item.id == expense_id).first()
+        expense_item = refs.cost_items.get(expense_id)
         if not expense_item:
             errors.append({"row": row_idx, "message": f"Не найдена статья затрат {expense_id}"})
             continue
@@ -386,10 +437,10 @@ def process_import_file(db: Session, plan_id: int, file: UploadFile, user: model
         min_dvc = Decimal(0)
         
         if need_type == models.NeedType.GOODS:
-            reestr_record = db.query(models.Reestr_KTP).filter(models.Reestr_KTP.enstru_code == trucode).first()
-            if reestr_record:
+            if trucode in refs.min_dvc_by_code:
                 is_ktp = True
-                min_dvc = Decimal(str(reestr_record.dvc_percent)) if reestr_record.dvc_percent is not None else 0
+                dvc_percent = refs.min_dvc_by_code[trucode]
+                min_dvc = Decimal(str(dvc_percent)) if dvc_percent is not None else 0
         else:
             # Для работ и услуг min_dvc равен resident_share
             min_dvc = resident_share
@@ -407,8 +458,8 @@ def process_import_file(db: Session, plan_id: int, file: UploadFile, user: model
             expense_item_id=expense_id,
             funding_source_id=source_id,
             agsk_id=agsk_code,
-            kato_purchase_id=kato_purchase.id,
-            kato_delivery_id=kato_delivery.id,
+            kato_purchase_id=kato_purchase_id,
+            kato_delivery_id=kato_delivery_id,
             additional_specs=additional_specs,
             additional_specs_kz=additional_specs_kz,
             quantity=quantity,
@@ -446,5 +497,6 @@ def process_import_file(db: Session, plan_id: int, file: UploadFile, user: model
     db.commit()
     
     plan_service._recalculate_version_metrics(db, active_version.id)
-    
+
+    metrics.observe_job("import", time.perf_counter() - started, len(new_items))
     return JSONResponse(content={"message": f"Успешно импортировано {len(new_items)} позиций"})
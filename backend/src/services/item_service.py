@@ -1,10 +1,11 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload, aliased
 from sqlalchemy import func, desc
 from decimal import Decimal
 from fastapi import HTTPException, status
 from ..models import models
 from ..schemas import plan as plan_schema
 from .plan_service import _recalculate_version_metrics
+from . import kato_service
 
 def get_item(db: Session, item_id: int) -> models.PlanItemVersion | None:
     """Получает конкретную позицию плана по ее ID, если она не удалена."""
@@ -22,6 +23,58 @@ def get_item(db: Session, item_id: int) -> models.PlanItemVersion | None:
         models.PlanItemVersion.is_deleted == False
     ).first()
 
+def get_items_by_user(
+    db: Session,
+    user: models.User,
+    kato_delivery_id: int | None = None,
+    kato_purchase_id: int | None = None,
+    before_id: int | None = None,
+    limit: int = 100
+) -> list[models.PlanItemVersion]:
+    """
+    Позиции активных версий всех планов пользователя (новые первыми) с keyset-пагинацией по id.
+    Фильтры КАТО принимают любой узел (например, область) и охватывают все его поддерево
+    одним диапазонным условием по kato.path.
+    """
+    Item = models.PlanItemVersion
+    Version = models.ProcurementPlanVersion
+    query = db.query(Item).options(
+        joinedload(Item.version).joinedload(Version.plan),
+        joinedload(Item.version).joinedload(Version.creator),
+        joinedload(Item.enstru),
+        joinedload(Item.unit),
+        joinedload(Item.expense_item),
+        joinedload(Item.funding_source),
+        joinedload(Item.agsk),
+        joinedload(Item.kato_purchase),
+        joinedload(Item.kato_delivery),
+        selectinload(Item.source_version).joinedload(Version.creator),
+        selectinload(Item.root_item).joinedload(Item.version)
+    ).join(
+        Version, Item.version_id == Version.id
+    ).join(
+        models.ProcurementPlan, Version.plan_id == models.ProcurementPlan.id
+    ).filter(
+        models.ProcurementPlan.created_by == user.id,
+        Version.is_active == True,
+        Item.is_deleted == False
+    )
+
+    for kato_id, kato_column in ((kato_delivery_id, Item.kato_delivery_id), (kato_purchase_id, Item.kato_purchase_id)):
+        if kato_id is None:
+            continue
+        path = kato_service.get_kato_path(db, kato_id)
+        if path is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"КАТО {kato_id} не найден")
+        region = aliased(models.Kato)
+        query = query.join(region, region.id == kato_column).filter(
+            kato_service.subtree_condition(db, region.path, path)
+        )
+
+    if before_id is not None:
+        query = query.filter(Item.id < before_id)
+    return query.order_by(desc(Item.id)).limit(limit).all()
+
 def update_item(db: Session, item_id: int, item_in: plan_schema.PlanItemUpdate, user: models.User) -> models.PlanItemVersion:
     """Обновляет позицию плана."""
     db_item = get_item(db, item_id)
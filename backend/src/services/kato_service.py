@@ -1,65 +1,160 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, exists, func, literal, select, update
+from sqlalchemy.orm import Session, aliased
 from ..models.models import Kato
+from . import kato_tree
+
+# Ограничение глубины обхода на случай циклов в загруженных данных
+MAX_KATO_DEPTH = 16
+PATH_BATCH_SIZE = 5000
+
+
+def _has_children_expression():
+    """Коррелированный EXISTS: есть ли у элемента KATO дочерние элементы (по индексу parent_id)."""
+    child = aliased(Kato)
+    return exists().where(child.parent_id == Kato.id).label("has_children")
+
+
+def _kato_to_dict(item: Kato, has_children: bool) -> dict:
+    return {
+        "id": item.id,
+        "parent_id": item.parent_id,
+        "code": item.code,
+        "name_kz": item.name_kz,
+        "name_ru": item.name_ru,
+        "has_children": bool(has_children),
+        "child_count": item.child_count or 0,
+    }
+
 
 def get_kato_children(db: Session, parent_id: int | None = 0):
     """
-    Получает дочерние элементы KATO и для каждого из них определяет,
-    есть ли у него свои дочерние элементы.
+    Получает дочерние элементы KATO вместе с признаком наличия у каждого
+    своих дочерних элементов — из дерева в памяти или одним запросом.
     """
-    # Сначала получаем все дочерние элементы для указанного родителя
-    kato_items = db.query(Kato).filter(Kato.parent_id == parent_id).all()
-
-    results = []
-    for item in kato_items:
-        # Для каждого элемента делаем простой запрос, чтобы проверить наличие его детей
-        has_children = db.query(Kato.id).filter(Kato.parent_id == item.id).first() is not None
-        results.append({
-            "id": item.id,
-            "parent_id": item.parent_id,
-            "code": item.code,
-            "name_kz": item.name_kz,
-            "name_ru": item.name_ru,
-            "has_children": has_children,
-        })
-    return results
+    if kato_tree.KATO_TREE_ENABLED:
+        return kato_tree.get_tree(db).children(parent_id)
+    rows = db.query(Kato, _has_children_expression()).filter(Kato.parent_id == parent_id).all()
+    return [_kato_to_dict(item, has_children) for item, has_children in rows]
 
 def get_kato_by_id(db: Session, kato_id: int):
     """
     Получает один элемент KATO по его ID и определяет, есть ли у него дочерние элементы.
     """
-    kato_item = db.query(Kato).filter(Kato.id == kato_id).first()
-    if not kato_item:
+    if kato_tree.KATO_TREE_ENABLED:
+        return kato_tree.get_tree(db).by_id(kato_id)
+    row = db.query(Kato, _has_children_expression()).filter(Kato.id == kato_id).first()
+    if not row:
         return None
-    
-    has_children = db.query(Kato.id).filter(Kato.parent_id == kato_item.id).first() is not None
-    
-    return {
-        "id": kato_item.id,
-        "parent_id": kato_item.parent_id,
-        "code": kato_item.code,
-        "name_kz": kato_item.name_kz,
-        "name_ru": kato_item.name_ru,
-        "has_children": has_children,
-    }
+    return _kato_to_dict(*row)
 
 def get_kato_parents(db: Session, kato_id: int):
     """
-    Получает всех родительских элементов для указанного KATO.
+    Получает всех родительских элементов для указанного KATO (от корня к элементу)
+    из дерева в памяти или одним рекурсивным запросом.
     """
-    parents = []
-    # Используем get() для безопасного доступа к ключам словаря
-    current_kato_dict = get_kato_by_id(db, kato_id)
-    
-    # Проверяем, что parent_id существует и не равен 0
-    while current_kato_dict and current_kato_dict.get('parent_id'):
-        parent_id = current_kato_dict.get('parent_id')
-        if not parent_id:
-            break
-        
-        parent_dict = get_kato_by_id(db, parent_id)
-        if parent_dict:
-            parents.insert(0, parent_dict)
-            current_kato_dict = parent_dict
-        else:
-            break
-    return parents
+    if kato_tree.KATO_TREE_ENABLED:
+        return kato_tree.get_tree(db).parents(kato_id)
+    ancestors = (
+        select(Kato.id, Kato.parent_id, literal(0).label("depth"))
+        .where(Kato.id == kato_id)
+        .cte("kato_ancestors", recursive=True)
+    )
+    parent = aliased(Kato)
+    ancestors = ancestors.union_all(
+        select(parent.id, parent.parent_id, ancestors.c.depth + 1)
+        .where(parent.id == ancestors.c.parent_id, ancestors.c.depth < MAX_KATO_DEPTH)
+    )
+    rows = (
+        db.query(Kato, _has_children_expression())
+        .join(ancestors, ancestors.c.id == Kato.id)
+        .filter(ancestors.c.depth > 0)
+        .order_by(ancestors.c.depth.desc())
+        .all()
+    )
+    return [_kato_to_dict(item, has_children) for item, has_children in rows]
+
+def get_kato_id_by_code(db: Session, code: str) -> int | None:
+    """ID элемента KATO по коду (из дерева в памяти или запросом)."""
+    if kato_tree.KATO_TREE_ENABLED:
+        return kato_tree.get_tree(db).id_by_code(code)
+    return db.query(Kato.id).filter(Kato.code == code).scalar()
+
+def get_kato_ids_by_codes(db: Session, codes) -> dict[str, int]:
+    """ID элементов KATO по набору кодов одним обращением: {код: id}, ненайденных кодов нет в словаре."""
+    codes = set(codes)
+    if not codes:
+        return {}
+    if kato_tree.KATO_TREE_ENABLED:
+        tree = kato_tree.get_tree(db)
+        found = {code: tree.id_by_code(code) for code in codes}
+        return {code: kato_id for code, kato_id in found.items() if kato_id is not None}
+    return dict(db.query(Kato.code, Kato.id).filter(Kato.code.in_(codes)).all())
+
+def get_kato_path(db: Session, kato_id: int) -> str | None:
+    """Материализованный путь элемента KATO (None, если элемент не найден)."""
+    return db.query(Kato.path).filter(Kato.id == kato_id).scalar()
+
+def subtree_condition(db: Session, path_column, path: str):
+    """
+    Условие "элемент входит в поддерево узла с путем path (включая сам узел)" —
+    один диапазонный предикат по индексу path. path_column — колонка path
+    таблицы kato или ее псевдонима в запросе.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # В пути только цифры и '/', экранирование для LIKE не требуется; индекс text_pattern_ops
+        return path_column.like(f"{path}%")
+    return and_(path_column >= path, path_column < path + "\U0010ffff")
+
+def get_kato_descendants(db: Session, kato_id: int):
+    """
+    Получает все дочерние элементы KATO на любой глубине одним запросом по индексу path.
+    Возвращает None, если элемент не найден.
+    """
+    path = get_kato_path(db, kato_id)
+    if path is None:
+        return None
+    return (
+        db.query(Kato)
+        .filter(subtree_condition(db, Kato.path, path), Kato.id != kato_id)
+        .order_by(Kato.path)
+        .all()
+    )
+
+def refresh_child_counts(db: Session):
+    """Пересчитывает child_count для всего справочника KATO одним UPDATE (после загрузки справочника)."""
+    child = aliased(Kato)
+    actual_count = select(func.count(child.id)).where(child.parent_id == Kato.id).scalar_subquery()
+    db.execute(
+        update(Kato).where(Kato.child_count != actual_count).values(child_count=actual_count),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+
+def _build_paths(rows) -> dict[int, str]:
+    """Строит материализованные пути по парам (id, parent_id)."""
+    parents = {kato_id: parent_id for kato_id, parent_id in rows}
+    paths: dict[int, str] = {}
+    for kato_id in parents:
+        chain = []
+        current = kato_id
+        while current in parents and current not in paths and len(chain) <= MAX_KATO_DEPTH:
+            chain.append(current)
+            current = parents[current]
+        prefix = paths.get(current, "/")
+        for node in reversed(chain):
+            prefix = f"{prefix}{node}/"
+            paths[node] = prefix
+    return paths
+
+def refresh_paths(db: Session):
+    """Пересчитывает материализованные пути KATO, обновляя только изменившиеся строки."""
+    rows = db.query(Kato.id, Kato.parent_id, Kato.path).all()
+    paths = _build_paths((kato_id, parent_id) for kato_id, parent_id, _ in rows)
+    changed = [
+        {"id": kato_id, "path": paths[kato_id]}
+        for kato_id, _, current_path in rows
+        if paths[kato_id] != current_path
+    ]
+    for start in range(0, len(changed), PATH_BATCH_SIZE):
+        db.execute(update(Kato), changed[start:start + PATH_BATCH_SIZE])
+    db.commit()
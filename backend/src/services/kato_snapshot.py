@@ -0,0 +1,105 @@
+import gzip
+import os
+import tempfile
+from typing import NamedTuple
+
+import orjson
+from sqlalchemy.orm import Session
+
+from ..models.models import Kato
+from ..utils.etag import make_etag
+
+# Снимок дерева KATO строится один раз на поколение справочников и хранится
+# в памяти процесса и на диске, чтобы перезапуск воркеров не требовал пересборки
+KATO_SNAPSHOT_DIR = os.getenv(
+    "KATO_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "baiterek_kato_snapshot")
+)
+KATO_SNAPSHOT_MAX_AGE = int(os.getenv("KATO_SNAPSHOT_MAX_AGE", "3600"))
+
+COLUMNS = ("id", "parent_id", "code", "name_ru", "name_kz")
+FILE_PREFIX = "kato_tree_"
+FILE_SUFFIX = ".json.gz"
+
+
+class KatoSnapshot(NamedTuple):
+    generation: str
+    etag: str
+    body: bytes  # JSON, сжатый gzip
+    # Несжатое представление — другие байты, поэтому и ETag у него свой
+    identity_etag: str
+    identity_body: bytes
+
+
+_snapshot: KatoSnapshot | None = None
+
+
+def _snapshot_path(generation: str) -> str:
+    return os.path.join(KATO_SNAPSHOT_DIR, f"{FILE_PREFIX}{generation}{FILE_SUFFIX}")
+
+
+def _build_body(db: Session, generation: str) -> bytes:
+    """
+    Дерево KATO в колоночном виде: параллельные массивы id, parent_id, code, name_ru, name_kz.
+    """
+    rows = db.query(Kato.id, Kato.parent_id, Kato.code, Kato.name_ru, Kato.name_kz).order_by(Kato.id).all()
+    columns = list(zip(*rows)) if rows else [() for _ in COLUMNS]
+    payload = {"generation": generation, "columns": list(COLUMNS), "count": len(rows)}
+    for name, values in zip(COLUMNS, columns):
+        payload[name] = list(values)
+    # mtime=0 — одинаковые данные дают одинаковые байты
+    return gzip.compress(orjson.dumps(payload), compresslevel=9, mtime=0)
+
+
+def _read_from_disk(generation: str) -> bytes | None:
+    try:
+        with open(_snapshot_path(generation), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_to_disk(generation: str, body: bytes):
+    """Атомарно сохраняет снимок и удаляет снимки прошлых поколений. Ошибки диска не критичны."""
+    try:
+        os.makedirs(KATO_SNAPSHOT_DIR, exist_ok=True)
+        target = _snapshot_path(generation)
+        fd, tmp_path = tempfile.mkstemp(dir=KATO_SNAPSHOT_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, target)
+        for name in os.listdir(KATO_SNAPSHOT_DIR):
+            path = os.path.join(KATO_SNAPSHOT_DIR, name)
+            if name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX) and path != target:
+                os.remove(path)
+    except OSError:
+        pass
+
+
+def get_snapshot(db: Session, generation: str) -> KatoSnapshot:
+    """
+    Снимок дерева KATO для указанного поколения справочников: из памяти, с диска или из БД.
+    Сборка идет без блокировки (см. kato_tree): параллельные запросы после смены
+    поколения в худшем случае соберут одинаковый снимок дважды.
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.generation == generation:
+        return snapshot
+    body = _read_from_disk(generation)
+    if body is None:
+        body = _build_body(db, generation)
+        _write_to_disk(generation, body)
+    _snapshot = snapshot = KatoSnapshot(
+        generation=generation,
+        etag=make_etag("kato-tree", generation),
+        body=body,
+        identity_etag=make_etag("kato-tree-identity", generation),
+        identity_body=gzip.decompress(body)
+    )
+    return snapshot
+
+
+def invalidate():
+    """Сбрасывает снимок в памяти процесса (после перезагрузки справочников)."""
+    global _snapshot
+    _snapshot = None
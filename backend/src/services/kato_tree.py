@@ -0,0 +1,128 @@
+import os
+import time
+from array import array
+
+from sqlalchemy.orm import Session
+
+from ..models.models import Kato
+from .reference_generation import get_generation
+
+# KATO (~17 тыс. строк) почти не меняется, поэтому все дерево держится в памяти процесса.
+# Актуальность проверяется по поколению справочников не чаще раза в KATO_TREE_POLL_INTERVAL секунд
+KATO_TREE_ENABLED = os.getenv("KATO_TREE_ENABLED", "1") == "1"
+KATO_TREE_POLL_INTERVAL = float(os.getenv("KATO_TREE_POLL_INTERVAL", "5"))
+
+# Ограничение глубины обхода на случай циклов в загруженных данных
+MAX_DEPTH = 16
+# parent_id = NULL в массиве parent_ids
+NO_PARENT = -1
+
+
+class KatoTree:
+    """
+    Неизменяемый снимок справочника KATO в виде параллельных массивов.
+    Строки упорядочены по (parent_id, id), поэтому дочерние элементы любого узла
+    занимают непрерывный отрезок [start, end).
+    """
+
+    def __init__(self, generation: str, rows):
+        rows = sorted(rows, key=lambda row: (NO_PARENT if row[1] is None else row[1], row[0]))
+        self.generation = generation
+        self.ids = array("q", (row[0] for row in rows))
+        self.parent_ids = array("q", (NO_PARENT if row[1] is None else row[1] for row in rows))
+        self.codes = [row[2] for row in rows]
+        self.names_kz = [row[3] for row in rows]
+        self.names_ru = [row[4] for row in rows]
+        self.index_by_id = {kato_id: index for index, kato_id in enumerate(self.ids)}
+        self.index_by_code = {code: index for index, code in enumerate(self.codes)}
+        self.children_slices: dict[int, tuple[int, int]] = {}
+        for index, parent_id in enumerate(self.parent_ids):
+            start, _ = self.children_slices.get(parent_id, (index, index))
+            self.children_slices[parent_id] = (start, index + 1)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _child_count(self, kato_id: int) -> int:
+        start, end = self.children_slices.get(kato_id, (0, 0))
+        return end - start
+
+    def _to_dict(self, index: int) -> dict:
+        kato_id = self.ids[index]
+        parent_id = self.parent_ids[index]
+        child_count = self._child_count(kato_id)
+        return {
+            "id": kato_id,
+            "parent_id": None if parent_id == NO_PARENT else parent_id,
+            "code": self.codes[index],
+            "name_kz": self.names_kz[index],
+            "name_ru": self.names_ru[index],
+            "has_children": child_count > 0,
+            "child_count": child_count,
+        }
+
+    def children(self, parent_id: int | None) -> list[dict]:
+        start, end = self.children_slices.get(NO_PARENT if parent_id is None else parent_id, (0, 0))
+        return [self._to_dict(index) for index in range(start, end)]
+
+    def by_id(self, kato_id: int) -> dict | None:
+        index = self.index_by_id.get(kato_id)
+        return None if index is None else self._to_dict(index)
+
+    def parents(self, kato_id: int) -> list[dict]:
+        """Родительские элементы от корня к элементу (сам элемент не входит)."""
+        result = []
+        index = self.index_by_id.get(kato_id)
+        while index is not None and len(result) < MAX_DEPTH:
+            index = self.index_by_id.get(self.parent_ids[index])
+            if index is not None:
+                result.append(self._to_dict(index))
+        result.reverse()
+        return result
+
+    def id_by_code(self, code: str) -> int | None:
+        index = self.index_by_code.get(code)
+        return None if index is None else self.ids[index]
+
+
+# Дерево заменяется одним присваиванием. Сборка идет без блокировки: блокировка на время
+# запросов к БД остановила бы event loop, если сервис вызван через AsyncSession.run_sync.
+# Параллельные запросы после смены поколения в худшем случае соберут дерево дважды
+_tree: KatoTree | None = None
+_checked_at = 0.0
+
+
+def _build(db: Session, generation: str) -> KatoTree:
+    rows = db.query(Kato.id, Kato.parent_id, Kato.code, Kato.name_kz, Kato.name_ru).all()
+    return KatoTree(generation, rows)
+
+
+def load(db: Session) -> KatoTree:
+    """Загружает (или перезагружает) дерево KATO для текущего поколения справочников."""
+    global _tree, _checked_at
+    _tree = tree = _build(db, get_generation(db))
+    _checked_at = time.monotonic()
+    return tree
+
+
+def get_tree(db: Session) -> KatoTree:
+    """
+    Актуальное дерево KATO. Если другой воркер перезагрузил справочники,
+    дерево пересобирается при ближайшей проверке поколения.
+    """
+    global _tree, _checked_at
+    tree = _tree
+    if tree is not None and time.monotonic() - _checked_at < KATO_TREE_POLL_INTERVAL:
+        return tree
+    generation = get_generation(db)
+    if tree is None or tree.generation != generation:
+        tree = _build(db, generation)
+        _tree = tree
+    _checked_at = time.monotonic()
+    return tree
+
+
+def invalidate():
+    """Сбрасывает дерево в памяти процесса; следующее обращение загрузит его заново."""
+    global _tree
+    _tree = None
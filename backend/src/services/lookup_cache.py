@@ -0,0 +1,74 @@
+import os
+import time
+from typing import Callable, NamedTuple
+
+from sqlalchemy.orm import Session
+
+from ..utils import metrics
+from ..utils.cache import TTLLRUCache
+from ..utils.etag import make_etag
+from .reference_generation import get_generation
+
+# Справочники меняются несколько раз в год, поэтому TTL — только страховка.
+# Записи привязаны к поколению справочников, которое сверяется с БД
+# не чаще раза в LOOKUP_CACHE_POLL_INTERVAL секунд: так перезагрузка в одном воркере
+# сбрасывает кэш во всех
+LOOKUP_CACHE_SIZE = int(os.getenv("LOOKUP_CACHE_SIZE", "2048"))
+LOOKUP_CACHE_TTL = int(os.getenv("LOOKUP_CACHE_TTL", "600"))
+LOOKUP_CACHE_POLL_INTERVAL = float(os.getenv("LOOKUP_CACHE_POLL_INTERVAL", "5"))
+
+_cache = TTLLRUCache(maxsize=LOOKUP_CACHE_SIZE, ttl=LOOKUP_CACHE_TTL)
+metrics.register_cache("lookup", _cache)
+
+_generation: str | None = None
+_checked_at = 0.0
+
+
+class CachedLookup(NamedTuple):
+    payload: list
+    etag: str
+
+
+def normalize_query(q: str | None) -> str:
+    """Приводит поисковую строку к ключу кэша: регистр и лишние пробелы не важны."""
+    return " ".join((q or "").split()).casefold()
+
+
+def _current_generation(db: Session) -> str:
+    """Поколение справочников, с которым сверялись не раньше LOOKUP_CACHE_POLL_INTERVAL секунд назад."""
+    global _generation, _checked_at
+    generation = _generation
+    if generation is not None and time.monotonic() - _checked_at < LOOKUP_CACHE_POLL_INTERVAL:
+        return generation
+    generation = get_generation(db)
+    if generation != _generation:
+        # Записи прошлого поколения больше не будут прочитаны, освобождаем место сразу
+        _cache.clear()
+        _generation = generation
+    _checked_at = time.monotonic()
+    return generation
+
+
+def get_or_load(db: Session, table: str, q: str | None, loader: Callable[[], list]) -> CachedLookup:
+    """
+    Возвращает результат поиска по справочнику из кэша или загружает его через loader.
+    loader должен вернуть уже сериализованный (JSON-совместимый) список.
+    """
+    key = (_current_generation(db), table, normalize_query(q))
+
+    def load() -> CachedLookup:
+        payload = loader()
+        return CachedLookup(payload=payload, etag=make_etag("lookup", key, payload))
+
+    return _cache.get_or_set(key, load)
+
+
+def invalidate():
+    """Сбрасывает кэш целиком (после перезагрузки справочников в этом процессе)."""
+    global _generation
+    _generation = None
+    _cache.clear()
+
+
+def stats() -> dict:
+    return {"size": len(_cache), "hits": _cache.hits, "misses": _cache.misses, "hit_ratio": _cache.hit_ratio}
@@ -0,0 +1,54 @@
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from ..models import models
+from ..schemas import lookup as lookup_schema
+
+
+def _unique(values: list) -> list:
+    """Убирает пустые значения и дубли, сохраняя порядок."""
+    return list(dict.fromkeys(v for v in values if v not in (None, "")))
+
+
+def resolve_codes(db: Session, request: lookup_schema.ResolveRequest) -> lookup_schema.ResolveResponse:
+    """
+    Разрешает пачку кодов справочников за один проход: по одному IN-запросу на таблицу.
+    Для ЕНС ТРУ дополнительно возвращает признак КТП и минимальный % ВЦ по реестру.
+    """
+    response = lookup_schema.ResolveResponse()
+
+    enstru_codes = _unique(request.enstru_codes)
+    if enstru_codes:
+        ktp_rows = db.query(
+            models.Reestr_KTP.enstru_code,
+            func.min(models.Reestr_KTP.dvc_percent)
+        ).filter(
+            models.Reestr_KTP.enstru_code.in_(enstru_codes)
+        ).group_by(models.Reestr_KTP.enstru_code).all()
+        ktp_by_code = {code: min_dvc for code, min_dvc in ktp_rows}
+
+        for enstru in db.query(models.Enstru).filter(models.Enstru.code.in_(enstru_codes)).all():
+            resolved = lookup_schema.EnstruResolved.model_validate(enstru)
+            resolved.is_ktp = enstru.code in ktp_by_code
+            resolved.min_dvc_percent = ktp_by_code.get(enstru.code)
+            response.enstru.append(resolved)
+
+    kato_ids = _unique(request.kato_ids)
+    kato_codes = _unique(request.kato_codes)
+    if kato_ids or kato_codes:
+        conditions = []
+        if kato_ids:
+            conditions.append(models.Kato.id.in_(kato_ids))
+        if kato_codes:
+            conditions.append(models.Kato.code.in_(kato_codes))
+        response.kato = db.query(models.Kato).filter(or_(*conditions)).all()
+
+    mkei_codes = _unique(request.mkei_codes)
+    if mkei_codes:
+        response.mkei = db.query(models.Mkei).filter(models.Mkei.code.in_(mkei_codes)).all()
+
+    agsk_codes = _unique(request.agsk_codes)
+    if agsk_codes:
+        response.agsk = db.query(models.Agsk).filter(models.Agsk.code.in_(agsk_codes)).all()
+
+    return response
@@ -7,8 +7,11 @@ import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 import statistics
+import time
 from ..models import models
 from ..schemas import plan as plan_schema
+from ..utils import metrics
+from ..utils.etag import make_etag
 
 # ========= Вспомогательные функции для версий =========
 
@@ -22,6 +25,14 @@ def _get_active_version(db: Session, plan_id: int, lock: bool = False) -> models
         query = query.with_for_update()
     return query.first()
 
+def _touch_version(version: models.ProcurementPlanVersion):
+    """
+    Отмечает изменение версии: атомарно увеличивает счетчик модификаций.
+    Значение попадает в ETag плана, поэтому вызывается при любой записи
+    в позиции, исполнение или статус версии.
+    """
+    version.modification_counter = models.ProcurementPlanVersion.modification_counter + 1
+
 def _recalculate_version_metrics(db: Session, version_id: int):
     """Пересчитывает общую сумму и другие метрики для конкретной версии плана."""
     version = db.query(models.ProcurementPlanVersion).filter(models.ProcurementPlanVersion.id == version_id).first()
@@ -37,15 +48,22 @@ def _recalculate_version_metrics(db: Session, version_id: int):
     total_amount = Decimal('0.00')
     vc_amount_total = Decimal('0.00')
 
+    # Минимальный % ВЦ по реестру КТП для всех товаров версии — одним запросом
+    goods_codes = {item.trucode for item in items if item.need_type == models.NeedType.GOODS}
+    min_dvc_by_code = dict(db.query(
+        models.Reestr_KTP.enstru_code,
+        func.min(models.Reestr_KTP.dvc_percent)
+    ).filter(
+        models.Reestr_KTP.enstru_code.in_(goods_codes)
+    ).group_by(models.Reestr_KTP.enstru_code).all()) if goods_codes else {}
+
     for item in items:
         total_amount += item.total_amount
         
         # Логика определения min_dvc_percent
         if item.need_type == models.NeedType.GOODS:
             # Для товаров ищем в реестре КТП
-            min_dvc = db.query(func.min(models.Reestr_KTP.dvc_percent)).filter(
-                models.Reestr_KTP.enstru_code == item.trucode
-            ).scalar()
+            min_dvc = min_dvc_by_code.get(item.trucode)
             item_dvc_percent = Decimal(str(min_dvc)) if min_dvc is not None else Decimal('0.00')
         else:
             # Для работ и услуг берем из доли местного содержания (resident_share)
@@ -75,6 +93,7 @@ def _recalculate_version_metrics(db: Session, version_id: int):
     
     version.vc_percentage = vc_percentage
     version.vc_amount = vc_amount_total
+    _touch_version(version)
 
     db.commit()
     db.refresh(version)
@@ -103,7 +122,9 @@ def create_plan(db: Session, plan_in: plan_schema.ProcurementPlanCreate, user: m
     return db_plan
 
 def get_plan_with_active_version(db: Session, plan_id: int) -> models.ProcurementPlan | None:
+    # Схема ответа читает и авторов версий: они загружаются здесь же, а не лениво
     return db.query(models.ProcurementPlan).options(
+        selectinload(models.ProcurementPlan.versions).selectinload(models.ProcurementPlanVersion.creator),
         selectinload(models.ProcurementPlan.versions)
         .selectinload(models.ProcurementPlanVersion.items)
         .options(
@@ -114,20 +135,153 @@ def get_plan_with_active_version(db: Session, plan_id: int) -> models.Procuremen
             joinedload(models.PlanItemVersion.agsk),
             joinedload(models.PlanItemVersion.kato_purchase),
             joinedload(models.PlanItemVersion.kato_delivery),
-            joinedload(models.PlanItemVersion.source_version),
+            joinedload(models.PlanItemVersion.source_version).joinedload(models.ProcurementPlanVersion.creator),
             joinedload(models.PlanItemVersion.root_item).joinedload(models.PlanItemVersion.version)
         )
     ).filter(
         models.ProcurementPlan.id == plan_id
     ).first()
 
+def get_plan_etag(db: Session, plan_id: int) -> tuple[int | None, str | None]:
+    """
+    Возвращает владельца плана и ETag, построенный по счетчикам изменений его версий.
+    Позиции не загружаются. Если план не найден, возвращает (None, None).
+    """
+    rows = db.query(
+        models.ProcurementPlan.created_by,
+        models.ProcurementPlanVersion.id,
+        models.ProcurementPlanVersion.modification_counter,
+        models.ProcurementPlanVersion.is_active
+    ).outerjoin(
+        models.ProcurementPlanVersion,
+        models.ProcurementPlanVersion.plan_id == models.ProcurementPlan.id
+    ).filter(
+        models.ProcurementPlan.id == plan_id
+    ).order_by(models.ProcurementPlanVersion.id).all()
+
+    if not rows:
+        return None, None
+
+    created_by = rows[0][0]
+    versions_state = [tuple(row[1:]) for row in rows]
+    return created_by, make_etag("plan", plan_id, versions_state)
+
+def get_plans_etag(db: Session, user: models.User, **params) -> str:
+    """ETag списка планов пользователя: состав планов и счетчики изменений всех их версий."""
+    rows = db.query(
+        models.ProcurementPlanVersion.plan_id,
+        models.ProcurementPlanVersion.id,
+        models.ProcurementPlanVersion.modification_counter,
+        models.ProcurementPlanVersion.is_active
+    ).join(
+        models.ProcurementPlan,
+        models.ProcurementPlanVersion.plan_id == models.ProcurementPlan.id
+    ).filter(
+        models.ProcurementPlan.created_by == user.id
+    ).order_by(models.ProcurementPlanVersion.plan_id, models.ProcurementPlanVersion.id).all()
+
+    return make_etag("plans", user.id, sorted(params.items()), [tuple(row) for row in rows])
+
 def get_plans_by_user(db: Session, user: models.User, skip: int = 0, limit: int = 100) -> list[models.ProcurementPlan]:
+    """
+    Список планов пользователя со всеми версиями (новые первыми).
+    Для списка на главной странице используется get_plan_summaries_by_user.
+    """
     return db.query(models.ProcurementPlan).options(
         selectinload(models.ProcurementPlan.versions).selectinload(models.ProcurementPlanVersion.creator)
     ).filter(
         models.ProcurementPlan.created_by == user.id
     ).order_by(desc(models.ProcurementPlan.id)).offset(skip).limit(limit).all()
 
+def get_plan_versions(db: Session, plan_id: int) -> models.ProcurementPlan | None:
+    """План с историей версий и их авторами, без позиций."""
+    return db.query(models.ProcurementPlan).options(
+        selectinload(models.ProcurementPlan.versions).selectinload(models.ProcurementPlanVersion.creator)
+    ).filter(
+        models.ProcurementPlan.id == plan_id
+    ).first()
+
+def get_plan_summaries_by_user(db: Session, user: models.User, before_id: int | None = None, limit: int = 50) -> plan_schema.ProcurementPlanSummaryPage:
+    """
+    Страница сводок по планам пользователя (новые первыми) с keyset-пагинацией по id.
+    Показатели активной версии (количество позиций, суммы, исполнение) считаются
+    одним сгруппированным запросом, без загрузки версий и позиций.
+    """
+    Plan = models.ProcurementPlan
+    Version = models.ProcurementPlanVersion
+    Item = models.PlanItemVersion
+
+    versions_count = db.query(func.count(Version.id)).filter(
+        Version.plan_id == Plan.id
+    ).correlate(Plan).scalar_subquery()
+    # Правило то же, что и в delete_plan: одобренный хотя бы раз план удалить нельзя
+    has_approved_versions = db.query(Version.id).filter(
+        Version.plan_id == Plan.id,
+        Version.status.in_([models.PlanStatus.PRE_APPROVED, models.PlanStatus.APPROVED])
+    ).correlate(Plan).exists()
+
+    query = db.query(
+        Plan.id,
+        Plan.plan_name,
+        Plan.year,
+        Plan.created_by,
+        Plan.created_at,
+        Version.id.label("active_version_id"),
+        Version.version_number.label("active_version_number"),
+        Version.status.label("status"),
+        Version.is_executed.label("is_executed"),
+        func.count(Item.id).label("items_count"),
+        func.coalesce(func.sum(Item.total_amount), 0).label("total_amount"),
+        func.coalesce(func.sum(Item.executed_amount), 0).label("executed_amount"),
+        versions_count.label("versions_count"),
+        has_approved_versions.label("has_approved_versions")
+    ).outerjoin(
+        Version, and_(Version.plan_id == Plan.id, Version.is_active == True)
+    ).outerjoin(
+        Item, and_(Item.version_id == Version.id, Item.is_deleted == False)
+    ).filter(
+        Plan.created_by == user.id
+    )
+    if before_id is not None:
+        query = query.filter(Plan.id < before_id)
+
+    # Берем на одну строку больше, чтобы понять, есть ли следующая страница
+    rows = query.group_by(
+        Plan.id, Plan.plan_name, Plan.year, Plan.created_by, Plan.created_at,
+        Version.id, Version.version_number, Version.status, Version.is_executed
+    ).order_by(desc(Plan.id)).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    summaries = []
+    for row in rows:
+        # SUM возвращает Decimal (PostgreSQL) или float/int (SQLite, пустой план):
+        # приводим обе суммы и процент к двум знакам, чтобы ответ не зависел от источника
+        total_amount = Decimal(str(row.total_amount or 0)).quantize(Decimal('0.01'))
+        executed_amount = Decimal(str(row.executed_amount or 0)).quantize(Decimal('0.01'))
+        executed_percent = (executed_amount / total_amount * 100) if total_amount > 0 else Decimal('0')
+        summaries.append(plan_schema.ProcurementPlanSummary(
+            id=row.id,
+            plan_name=row.plan_name,
+            year=row.year,
+            created_by=row.created_by,
+            created_at=row.created_at,
+            active_version_id=row.active_version_id,
+            active_version_number=row.active_version_number,
+            status=row.status,
+            is_executed=bool(row.is_executed),
+            items_count=row.items_count,
+            total_amount=total_amount,
+            executed_amount=executed_amount,
+            executed_percent=executed_percent.quantize(Decimal('0.01')),
+            versions_count=row.versions_count,
+            has_approved_versions=bool(row.has_approved_versions)
+        ))
+
+    next_cursor = summaries[-1].id if has_more and summaries else None
+    return plan_schema.ProcurementPlanSummaryPage(items=summaries, next_cursor=next_cursor)
+
 
 def update_plan_status(db: Session, plan_id: int, new_status: models.PlanStatus, user: models.User) -> models.ProcurementPlanVersion:
     active_version = _get_active_version(db, plan_id, lock=True)
@@ -148,6 +302,7 @@ def update_plan_status(db: Session, plan_id: int, new_status: models.PlanStatus,
             detail=f"Недопустимый переход статуса из {current_status.value} в {new_status.value}"
         )
 
+    _touch_version(active_version)
     db.commit()
     db.refresh(active_version)
     return active_version
@@ -332,6 +487,7 @@ def add_item_to_plan(db: Session, plan_id: int, item_in: plan_schema.PlanItemCre
     return db_item
 
 def export_plan_to_excel(db: Session, plan_id: int, version_id: int = None) -> bytes:
+    started = time.perf_counter()
     if version_id:
         version = db.query(models.ProcurementPlanVersion).filter(models.ProcurementPlanVersion.id == version_id).first()
     else:
@@ -595,11 +751,20 @@ def export_plan_to_excel(db: Session, plan_id: int, version_id: int = None) -> b
     ktp_row = 1
     ktp_row = create_table_header(ws_ktp, ktp_row, ktp_columns)
     
+    # Поставщики из реестра КТП для всех кодов версии — одним запросом
+    trucodes = {item.trucode for items in grouped_items.values() for item in items}
+    suppliers_by_code = {}
+    if trucodes:
+        for supplier in db.query(models.Reestr_KTP).filter(
+            models.Reestr_KTP.enstru_code.in_(trucodes)
+        ).order_by(models.Reestr_KTP.id).all():
+            suppliers_by_code.setdefault(supplier.enstru_code, []).append(supplier)
+
     for t in [models.NeedType.GOODS, models.NeedType.WORKS, models.NeedType.SERVICES]:
         items = grouped_items[t]
         for idx, item in enumerate(items, 1):
             # Проверяем наличие в реестре КТП
-            suppliers = db.query(models.Reestr_KTP).filter(models.Reestr_KTP.enstru_code == item.trucode).all()
+            suppliers = suppliers_by_code.get(item.trucode, [])
             
             if suppliers:
                 # Для каждого поставщика создаем строку
@@ -666,4 +831,5 @@ def export_plan_to_excel(db: Session, plan_id: int, version_id: int = None) -> b
 
     virtual_workbook = io.BytesIO()
     wb.save(virtual_workbook)
+    metrics.observe_job("export", time.perf_counter() - started, sum(len(items) for items in grouped_items.values()))
     return virtual_workbook.getvalue()
@@ -0,0 +1,54 @@
+import uuid
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.models import ReferenceGeneration
+
+GENERATION_ROW_ID = 1
+# Поколение до создания строки (миграция e4b8d1f6a273 или старт приложения ее создают)
+MISSING_GENERATION = "0"
+
+
+def get_generation(db: Session) -> str:
+    """
+    Текущее поколение справочников в виде строки "<номер>-<token>".
+    Читается отдельным запросом по первичному ключу (а не из identity map сессии),
+    поэтому подходит для дешевого опроса из всех воркеров. Только читает:
+    вызывается и из сессий реплики, поэтому строку не создает.
+    """
+    row = (
+        db.query(ReferenceGeneration.generation, ReferenceGeneration.token)
+        .filter(ReferenceGeneration.id == GENERATION_ROW_ID)
+        .first()
+    )
+    if row is None:
+        return MISSING_GENERATION
+    return f"{row.generation}-{row.token}"
+
+
+def ensure_generation(db: Session):
+    """Создает строку поколения, если ее нет (сессия основной БД)."""
+    exists = db.query(ReferenceGeneration.id).filter(ReferenceGeneration.id == GENERATION_ROW_ID).first()
+    if exists is not None:
+        return
+    db.add(ReferenceGeneration(id=GENERATION_ROW_ID, generation=1, token=uuid.uuid4().hex))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Строку одновременно создал другой воркер
+        db.rollback()
+
+
+def bump_generation(db: Session) -> str:
+    """Начинает новое поколение справочников (после их перезагрузки)."""
+    ensure_generation(db)
+    db.query(ReferenceGeneration).filter(ReferenceGeneration.id == GENERATION_ROW_ID).update(
+        {
+            ReferenceGeneration.generation: ReferenceGeneration.generation + 1,
+            ReferenceGeneration.token: uuid.uuid4().hex,
+        },
+        synchronize_session=False
+    )
+    db.commit()
+    return get_generation(db)
@@ -0,0 +1,40 @@
+from sqlalchemy.orm import Session
+
+from . import code_index, kato_service, kato_snapshot, kato_tree, lookup_cache, search_service
+from .reference_generation import bump_generation, ensure_generation
+
+
+def prepare_references(db: Session):
+    """
+    Подготовка справочников при старте приложения: заполняет недостающие
+    поисковые колонки, пересчитывает счетчики дочерних и пути KATO,
+    создает строку поколения справочников, если ее нет, и загружает индексы в памяти процесса.
+    """
+    ensure_generation(db)
+    search_service.refresh_search_columns(db, only_missing=True)
+    kato_service.refresh_child_counts(db)
+    kato_service.refresh_paths(db)
+    load_in_memory_indexes(db)
+
+
+def load_in_memory_indexes(db: Session):
+    """Загружает индексы справочников, которые живут в памяти процесса."""
+    code_index.load_all(db)
+    if kato_tree.KATO_TREE_ENABLED:
+        kato_tree.load(db)
+
+
+def reload_references(db: Session):
+    """
+    Обновляет все производные данные после перезагрузки справочников:
+    нормализованные поисковые колонки, счетчики дочерних и пути KATO, поисковые индексы в БД,
+    индексы в памяти процесса и кэши; начинает новое поколение справочников.
+    """
+    search_service.refresh_search_columns(db)
+    kato_service.refresh_child_counts(db)
+    kato_service.refresh_paths(db)
+    search_service.rebuild_search_indexes(db)
+    bump_generation(db)
+    load_in_memory_indexes(db)
+    lookup_cache.invalidate()
+    kato_snapshot.invalidate()
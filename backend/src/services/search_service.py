@@ -0,0 +1,238 @@
+import logging
+import re
+from typing import NamedTuple
+
+from sqlalchemy import and_, event, func, or_, text, update, Float, Integer
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..models import models
+from ..utils.text_normalize import build_search_text, normalize_search_text
+from . import code_index
+
+logger = logging.getLogger(__name__)
+
+
+class SearchSpec(NamedTuple):
+    """
+    Описание справочника для поиска: модель, колонка кода и текстовые колонки.
+    Из кода и текстовых колонок собирается нормализованная колонка search_text,
+    по которой и работает текстовый поиск.
+    """
+    model: type
+    code_column: str | None
+    text_columns: tuple[str, ...]
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return ((self.code_column,) if self.code_column else ()) + self.text_columns
+
+
+SEARCH_SPECS = {
+    "enstru": SearchSpec(models.Enstru, "code", ("name_rus", "name_kaz")),
+    "kato": SearchSpec(models.Kato, "code", ("name_ru", "name_kz")),
+    "agsk": SearchSpec(models.Agsk, "code", ("group", "name_ru")),
+    "mkei": SearchSpec(models.Mkei, "code", ("name_ru", "name_kz")),
+    "cost_items": SearchSpec(models.Cost_Item, None, ("name_ru", "name_kz")),
+    "source_funding": SearchSpec(models.Source_Funding, None, ("name_ru", "name_kz")),
+}
+
+# Минимальная длина запроса, с которой триграммный индекс PostgreSQL начинает работать
+PG_TRGM_MIN_LENGTH = 3
+
+SEARCH_COLUMN = "search_text"
+
+# Размер пачки при массовом пересчете search_text
+REFRESH_BATCH_SIZE = 5000
+
+# Состояние индексов, выясняется при старте приложения в detect_search_indexes()
+_pg_trgm_available = False
+_fts_tables: set[str] = set()
+
+
+def _fts_table(spec: SearchSpec) -> str:
+    return f"{spec.table}_fts"
+
+
+def detect_search_indexes(engine: Engine):
+    """
+    Выясняет при старте приложения, какие поисковые индексы есть в БД: pg_trgm на PostgreSQL,
+    FTS5-таблицы на SQLite. Сами индексы создает миграция b6d2e8f4a017; здесь — только чтение.
+    Без индексов поиск работает через LIKE по search_text.
+    """
+    global _pg_trgm_available
+
+    dialect = engine.dialect.name
+    try:
+        with engine.connect() as conn:
+            if dialect == "postgresql":
+                _pg_trgm_available = conn.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                ).first() is not None
+            elif dialect == "sqlite":
+                existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+                _fts_tables.clear()
+                _fts_tables.update(spec.table for spec in SEARCH_SPECS.values() if _fts_table(spec) in existing)
+    except Exception:
+        logger.warning("Не удалось проверить поисковые индексы, поиск будет работать без них", exc_info=True)
+        return
+    if dialect == "postgresql" and not _pg_trgm_available:
+        logger.warning("Расширение pg_trgm не установлено: примените миграции (alembic upgrade head)")
+    if dialect == "sqlite" and len(_fts_tables) < len(SEARCH_SPECS):
+        logger.warning("Нет FTS5-таблиц для части справочников: примените миграции (alembic upgrade head)")
+
+
+def rebuild_search_indexes(db: Session):
+    """Полностью перестраивает FTS5-индексы (после массовой перезагрузки справочников)."""
+    if db.get_bind().dialect.name != "sqlite":
+        return
+    for spec in SEARCH_SPECS.values():
+        if spec.table in _fts_tables:
+            fts = _fts_table(spec)
+            db.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    db.commit()
+
+
+def _row_search_text(spec: SearchSpec, values) -> str | None:
+    return build_search_text(*(values[column] for column in spec.columns))
+
+
+def refresh_search_columns(db: Session, only_missing: bool = False):
+    """
+    Пересчитывает search_text для справочников, загруженных в обход ORM.
+    Идет пачками по id и обновляет только записи, у которых значение изменилось (или отсутствует).
+    """
+    for spec in SEARCH_SPECS.values():
+        model = spec.model
+        search_column = getattr(model, SEARCH_COLUMN)
+        last_id = None
+        while True:
+            query = db.query(model.id, search_column, *[getattr(model, column) for column in spec.columns])
+            if only_missing:
+                query = query.filter(search_column.is_(None))
+            if last_id is not None:
+                query = query.filter(model.id > last_id)
+            rows = query.order_by(model.id).limit(REFRESH_BATCH_SIZE).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changes = []
+            for row in rows:
+                values = row._mapping
+                value = _row_search_text(spec, values)
+                if value != values[SEARCH_COLUMN]:
+                    changes.append({"id": row.id, SEARCH_COLUMN: value})
+            if changes:
+                db.execute(update(model), changes)
+            db.commit()
+
+
+def _make_search_text_listener(spec: SearchSpec):
+    def listener(mapper, connection, target):
+        values = {column: getattr(target, column) for column in spec.columns}
+        setattr(target, SEARCH_COLUMN, _row_search_text(spec, values))
+    return listener
+
+
+# search_text поддерживается автоматически для всех записей, сохраняемых через ORM
+for _spec in SEARCH_SPECS.values():
+    _listener = _make_search_text_listener(_spec)
+    event.listen(_spec.model, "before_insert", _listener)
+    event.listen(_spec.model, "before_update", _listener)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _fts_match_expression(q: str) -> str | None:
+    """Превращает пользовательский ввод в FTS5-запрос: каждое слово ищется по префиксу."""
+    tokens = re.findall(r"\w+", q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _code_prefix_query(db: Session, spec: SearchSpec, q: str, dialect: str):
+    code = getattr(spec.model, spec.code_column)
+    if dialect == "postgresql":
+        # LIKE 'q%' использует индекс text_pattern_ops
+        condition = code.like(f"{_escape_like(q)}%", escape="\\")
+    else:
+        # Диапазон по бинарному порядку строк использует обычный уникальный индекс по коду
+        condition = and_(code >= q, code < q + "\U0010ffff")
+    return db.query(spec.model).filter(condition).order_by(code)
+
+
+def _text_query(db: Session, spec: SearchSpec, q: str, dialect: str):
+    """Текстовый поиск по нормализованной колонке search_text. q уже нормализован."""
+    model = spec.model
+    search_column = getattr(model, SEARCH_COLUMN)
+
+    if dialect == "sqlite" and spec.table in _fts_tables:
+        match = _fts_match_expression(q)
+        if match is None:
+            return None
+        fts = _fts_table(spec)
+        ranked = text(
+            f"SELECT rowid AS id, bm25({fts}) AS rank FROM {fts} WHERE {fts} MATCH :match"
+        ).bindparams(match=match).columns(id=Integer, rank=Float).subquery()
+        return db.query(model).join(ranked, model.id == ranked.c.id).order_by(ranked.c.rank)
+
+    escaped = _escape_like(q)
+    if dialect == "postgresql" and _pg_trgm_available and len(q) >= PG_TRGM_MIN_LENGTH:
+        # LIKE по подстроке обслуживается GIN-триграммным индексом
+        return db.query(model).filter(
+            search_column.like(f"%{escaped}%", escape="\\")
+        ).order_by(func.similarity(search_column, q).desc())
+
+    # Короткие запросы (и запасной вариант без индексов): совпадение с началом любого слова
+    return db.query(model).filter(or_(
+        search_column.like(f"{escaped}%", escape="\\"),
+        search_column.like(f"% {escaped}%", escape="\\")
+    ))
+
+
+def search(db: Session, name: str, q: str | None, limit: int = 50) -> list:
+    """
+    Поиск по справочнику с ранжированием по релевантности.
+    Сначала идут записи, код которых начинается с запроса, затем — найденные по тексту
+    в нормализованной колонке search_text (bm25 в FTS5 на SQLite, триграммное сходство
+    на PostgreSQL), так что регистр, ё/е и казахские буквы не мешают поиску.
+    """
+    spec = SEARCH_SPECS[name]
+    q = (q or "").strip()
+    if not q:
+        return db.query(spec.model).limit(limit).all()
+
+    dialect = db.get_bind().dialect.name
+    results = []
+    seen_ids = set()
+
+    if spec.code_column:
+        # Для ЕНС ТРУ и АГСК префикс кода ищется по индексу в памяти, иначе — запросом в БД
+        prefix_rows = code_index.find_by_prefix(db, name, q, limit)
+        if prefix_rows is None:
+            prefix_rows = _code_prefix_query(db, spec, q, dialect).limit(limit).all()
+        for row in prefix_rows:
+            results.append(row)
+            seen_ids.add(row.id)
+
+    if len(results) < limit:
+        text_query = _text_query(db, spec, normalize_search_text(q), dialect)
+        if text_query is not None:
+            # Запрашиваем с запасом, чтобы после исключения дублей хватило до limit
+            for row in text_query.limit(limit + len(seen_ids)).all():
+                if row.id in seen_ids:
+                    continue
+                results.append(row)
+                seen_ids.add(row.id)
+                if len(results) >= limit:
+                    break
+
+    return results
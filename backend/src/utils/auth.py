@@ -2,18 +2,28 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
+import os
 
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 from ..database.database import get_db
 from ..models.models import User
+from . import metrics
+from .cache import TTLLRUCache
 
 # --- Конфигурация ---
 SECRET_KEY = "a_very_secret_key_that_should_be_in_env_vars"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 часа
 
+# Кэш аутентифицированных пользователей: TTL ограничивает время, за которое
+# изменения пользователя, сделанные другим воркером, становятся видны этому
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
 # --- Утилиты для паролей и токенов ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -48,9 +58,61 @@ def authenticate_user(db: Session, iin: str, password: str) -> Optional[User]:
     #     return None
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+@dataclass(frozen=True)
+class Principal:
     """
-    Декодирует токен, извлекает ИИН пользователя и возвращает объект User из БД.
+    Неизменяемый снимок аутентифицированного пользователя. Совместим с User
+    по полям, которые используют роутеры и сервисы (id, iin и т.д.), но не привязан
+    к сессии БД, поэтому может жить в кэше между запросами.
+    """
+    id: int
+    iin: str
+    full_name: str
+    bin: Optional[str]
+    org_name: Optional[str]
+    email: Optional[str]
+    phone: Optional[str]
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            iin=user.iin,
+            full_name=user.full_name,
+            bin=user.bin,
+            org_name=user.org_name,
+            email=user.email,
+            phone=user.phone,
+            is_active=user.is_active is not False,
+        )
+
+
+_principal_cache = TTLLRUCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+metrics.register_cache("principal", _principal_cache)
+
+
+def invalidate_principal(iin: str):
+    """Удаляет пользователя из кэша (например, после деактивации)."""
+    _principal_cache.invalidate(iin)
+
+
+def _invalidate_user_listener(mapper, connection, target: User):
+    # Учитываем и прежний ИИН, если он менялся
+    for iin in {target.iin, *inspect(target).attrs.iin.history.deleted}:
+        if iin:
+            invalidate_principal(iin)
+
+
+event.listen(User, "after_update", _invalidate_user_listener)
+event.listen(User, "after_delete", _invalidate_user_listener)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    Декодирует токен, извлекает ИИН пользователя и возвращает снимок пользователя
+    из кэша или из БД. В пределах запроса зависимость вычисляется один раз
+    (кэш зависимостей FastAPI), даже если указана и в dependencies роутера, и в параметрах.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,7 +127,13 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.iin == iin).first()
-    if user is None:
+    principal = _principal_cache.get(iin)
+    if principal is None:
+        user = db.query(User).filter(User.iin == iin).first()
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        _principal_cache.set(iin, principal)
+    if not principal.is_active:
         raise credentials_exception
-    return user
+    return principal
@@ -0,0 +1,29 @@
+import hashlib
+from typing import Iterable, Optional
+
+
+def make_etag(*parts) -> str:
+    """Строит сильный ETag из составных частей состояния ресурса."""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def _split_etags(header_value: str) -> Iterable[str]:
+    for tag in header_value.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            yield tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match.
+    Для GET используется слабое сравнение (RFC 9110), поэтому префикс W/ игнорируется.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in _split_etags(if_none_match)
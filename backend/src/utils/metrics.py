@@ -0,0 +1,227 @@
+"""
+Метрики процесса в текстовом формате Prometheus (GET /metrics).
+
+Счетчики и гистограммы накапливаются в памяти процесса; показатели, которые
+дешевле снять в момент запроса (пулы соединений, кэши), отдают функции-сборщики
+(register_collector). При нескольких воркерах каждый отдает свои метрики —
+суммирует их Prometheus.
+"""
+import bisect
+import threading
+from typing import Callable, Iterable
+
+# Границы корзин по умолчанию (как в клиентах Prometheus), секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Длительные операции: экспорт и импорт Excel
+JOB_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+Sample = tuple[str, dict, float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> dict:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> list[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [счетчики по корзинам (без накопления), сумма, количество]
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> list[Sample]:
+        result = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    result.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                result.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, count))
+                result.append((f"{self.name}_sum", labels, total))
+                result.append((f"{self.name}_count", labels, count))
+        return result
+
+
+class CollectedMetric:
+    """Описание метрики, значения которой отдает функция-сборщик."""
+
+    def __init__(self, name: str, type_name: str, documentation: str, samples: list[Sample]):
+        self.name = name
+        self.type_name = type_name
+        self.documentation = documentation
+        self._samples = samples
+
+    def samples(self) -> list[Sample]:
+        return self._samples
+
+
+_registry: list[_Metric] = []
+_collectors: list[Callable[[], Iterable[CollectedMetric]]] = []
+_caches: dict[str, object] = {}
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def register_collector(collector: Callable[[], Iterable[CollectedMetric]]):
+    """Функция, которая при каждом запросе /metrics возвращает список CollectedMetric."""
+    _collectors.append(collector)
+    return collector
+
+
+def register_cache(name: str, cache):
+    """Метрики попаданий для кэша с атрибутами hits, misses, hit_ratio и __len__ (TTLLRUCache)."""
+    _caches[name] = cache
+
+
+@register_collector
+def _collect_caches() -> list[CollectedMetric]:
+    caches = list(_caches.items())
+    return [
+        CollectedMetric("baiterek_cache_hits_total", "counter", "Попадания в кэш",
+                        [("baiterek_cache_hits_total", {"cache": name}, cache.hits) for name, cache in caches]),
+        CollectedMetric("baiterek_cache_misses_total", "counter", "Промахи кэша",
+                        [("baiterek_cache_misses_total", {"cache": name}, cache.misses) for name, cache in caches]),
+        CollectedMetric("baiterek_cache_hit_ratio", "gauge", "Доля попаданий в кэш с запуска процесса",
+                        [("baiterek_cache_hit_ratio", {"cache": name}, cache.hit_ratio) for name, cache in caches]),
+        CollectedMetric("baiterek_cache_entries", "gauge", "Количество записей в кэше",
+                        [("baiterek_cache_entries", {"cache": name}, len(cache)) for name, cache in caches]),
+    ]
+
+
+def render() -> str:
+    """Все метрики в текстовом формате Prometheus 0.0.4."""
+    metrics = list(_registry)
+    for collector in _collectors:
+        metrics.extend(collector())
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ========= Метрики приложения =========
+
+HTTP_REQUESTS = _register(Counter(
+    "baiterek_http_requests_total", "HTTP-запросы по маршрутам и статусам", ("method", "route", "status")
+))
+HTTP_REQUEST_DURATION = _register(Histogram(
+    "baiterek_http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route")
+))
+HTTP_REQUESTS_IN_FLIGHT = _register(Gauge(
+    "baiterek_http_requests_in_flight", "HTTP-запросы в обработке"
+))
+DB_QUERIES = _register(Counter(
+    "baiterek_db_queries_total", "Выполненные SQL-запросы"
+))
+DB_QUERY_DURATION = _register(Histogram(
+    "baiterek_db_query_duration_seconds", "Время выполнения SQL-запроса",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+))
+JOB_DURATION = _register(Histogram(
+    "baiterek_job_duration_seconds", "Длительность экспорта и импорта смет", ("job",), buckets=JOB_BUCKETS
+))
+JOB_ROWS = _register(Counter(
+    "baiterek_job_rows_total", "Обработанные строки (позиции) при экспорте и импорте", ("job",)
+))
+
+
+def observe_job(job: str, duration: float, rows: int):
+    """Учитывает завершенный экспорт/импорт: длительность и число позиций."""
+    JOB_DURATION.observe(duration, job=job)
+    JOB_ROWS.inc(rows, job=job)
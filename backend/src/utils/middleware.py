@@ -0,0 +1,115 @@
+import math
+import threading
+import time
+from contextvars import ContextVar
+
+import anyio
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..database.database import DATABASE_READ_URL, READ_PRIMARY_COOKIE, REPLICA_MAX_LAG_SECONDS
+from . import metrics, profiling, query_stats
+
+# Список-флаг текущего запроса: изменяемый объект, поэтому отметка из потока
+# пула (синхронные эндпоинты) видна и в middleware
+_request_commits: ContextVar[list | None] = ContextVar("request_commits", default=None)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_commit(session):
+    commits = _request_commits.get()
+    if commits is not None:
+        commits.append(True)
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """
+    Если запрос что-то записал в БД, ставит cookie, по которой get_read_db в течение
+    REPLICA_MAX_LAG_SECONDS читает из основной БД: клиент сразу видит свои изменения,
+    даже если реплика их еще не получила.
+    """
+    if not DATABASE_READ_URL:
+        return await call_next(request)
+    commits = []
+    token = _request_commits.set(commits)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_commits.reset(token)
+    if commits and response.status_code < 400:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + REPLICA_MAX_LAG_SECONDS),
+            max_age=math.ceil(REPLICA_MAX_LAG_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+def _route_path(request: Request) -> str:
+    """
+    Шаблон пути маршрута (/api/plans/{plan_id}), чтобы не плодить записи на каждый id.
+    Известен только после обработки запроса; для ненайденных путей — "unmatched".
+    """
+    path = getattr(request.scope.get("route"), "path", None)
+    if path is None:
+        return "unmatched"
+    return f"{request.scope.get('root_path', '')}{path}"
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Считает SQL-запросы и время в БД за HTTP-запрос (см. query_stats),
+    добавляет заголовок Server-Timing и пишет статистику в сводку по маршрутам.
+    """
+    if not query_stats.SQL_STATS_ENABLED:
+        return await call_next(request)
+    started = time.perf_counter()
+    stats, token = query_stats.start_request()
+    try:
+        response = await call_next(request)
+    finally:
+        query_stats.finish_request(token)
+    response.headers["Server-Timing"] = query_stats.server_timing(stats, time.perf_counter() - started)
+    query_stats.record(f"{request.method} {_route_path(request)}", stats)
+    return response
+
+
+async def metrics_middleware(request: Request, call_next):
+    """HTTP-метрики для /metrics: запросы по маршрутам и статусам, время обработки, запросы в работе."""
+    started = time.perf_counter()
+    status_code = 500
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+        route = _route_path(request)
+        metrics.HTTP_REQUESTS.inc(method=request.method, route=route, status=status_code)
+        metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=request.method, route=route)
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Профилирует запрос, если он пришел с токеном профилирования (см. profiling).
+    id сохраненного профиля возвращается в заголовке X-Profile-Id.
+    """
+    if not profiling.is_requested(request.headers):
+        return await call_next(request)
+    sampler = profiling.StackSampler(profiling.PROFILE_SAMPLE_INTERVAL)
+    sampler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        sampler.stop()
+    endpoint = request.scope.get("endpoint")
+    # Для ненайденного пути endpoint отсутствует или это смонтированное приложение
+    if not hasattr(endpoint, "__code__") or getattr(endpoint, "skip_profiling", False):
+        return response
+    body = profiling.collapse(sampler.samples, endpoint, threading.get_ident())
+    response.headers[profiling.PROFILE_ID_HEADER] = await anyio.to_thread.run_sync(profiling.save, body)
+    return response
@@ -0,0 +1,132 @@
+"""
+Профилирование отдельного HTTP-запроса по требованию.
+
+Включается только при заданном PROFILING_TOKEN и только для запроса с этим токеном
+(только заголовок X-Profile-Token: в параметре URL токен попадал бы в логи доступа
+и историю браузера). На время запроса фоновый поток раз в PROFILE_SAMPLE_INTERVAL
+секунд снимает стеки всех потоков
+(sys._current_frames): синхронные эндпоинты выполняются в пуле потоков, поэтому
+cProfile, включенный в потоке event loop, их бы не увидел. Для синхронного эндпоинта
+в профиль попадают стеки, проходящие через его функцию. Асинхронный эндпоинт выполняет
+сервисы в greenlet (AsyncSession.run_sync), стек которого не связан с корутиной,
+поэтому для него берутся все непустые стеки потока event loop — при параллельных
+запросах в профиль попадут и они.
+
+Профиль сохраняется в PROFILE_DIR в формате collapsed stacks (<id>.folded) —
+его открывают speedscope.app и flamegraph.pl.
+"""
+import inspect
+import os
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import uuid
+from collections import Counter
+
+# Без токена профилирование недоступно
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "baiterek_profiles"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+# Сколько последних профилей хранить
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+FILE_SUFFIX = ".folded"
+
+
+class StackSampler(threading.Thread):
+    """Фоновый поток, периодически снимающий стеки всех остальных потоков процесса."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        # (id потока, стек кодов от корня к листу) -> число попаданий
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[thread_id, tuple(stack)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(stack: tuple) -> bool:
+    """Event loop ждет событий (selectors.*.select)."""
+    return bool(stack) and stack[-1].co_name == "select" and stack[-1].co_filename.endswith("selectors.py")
+
+
+def collapse(samples: Counter, endpoint, loop_thread_id: int) -> str:
+    """
+    Стеки в формате collapsed stacks: "корень;...;лист N", обрезанные до функции эндпоинта.
+    loop_thread_id — поток event loop, в котором выполняется асинхронный эндпоинт.
+    """
+    target = endpoint.__code__
+    is_async = inspect.iscoroutinefunction(endpoint)
+    lines = Counter()
+    for (thread_id, stack), count in samples.items():
+        if target in stack:
+            stack = stack[stack.index(target):]
+        elif not is_async or thread_id != loop_thread_id or _is_idle(stack):
+            continue
+        lines[";".join(_frame_name(code) for code in stack)] += count
+    return "".join(f"{stack} {count}\n" for stack, count in lines.most_common())
+
+
+def not_profiled(endpoint):
+    """Декоратор эндпоинта, запросы к которому не профилируются (например, выдача профилей)."""
+    endpoint.skip_profiling = True
+    return endpoint
+
+
+def is_requested(headers) -> bool:
+    """Запрошено ли профилирование: токен в заголовке совпадает с PROFILING_TOKEN."""
+    if not PROFILING_TOKEN:
+        return False
+    token = headers.get(PROFILE_TOKEN_HEADER)
+    return token is not None and secrets.compare_digest(token, PROFILING_TOKEN)
+
+
+def profile_path(profile_id: str) -> str | None:
+    """Путь к файлу профиля или None, если id некорректен."""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    return os.path.join(PROFILE_DIR, f"{profile_id}{FILE_SUFFIX}")
+
+
+def save(body: str) -> str:
+    """Сохраняет профиль и удаляет самые старые сверх PROFILE_MAX_FILES. Возвращает id профиля."""
+    profile_id = uuid.uuid4().hex
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(profile_path(profile_id), "w", encoding="utf-8") as f:
+        f.write(body)
+    files = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(FILE_SUFFIX)),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in files[:max(0, len(files) - PROFILE_MAX_FILES)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+    return profile_id
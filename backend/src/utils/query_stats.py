@@ -0,0 +1,183 @@
+"""
+Учет SQL-запросов в рамках HTTP-запроса.
+
+События Engine (любого: основная БД, реплика, sync_engine асинхронного движка)
+считают выполненные запросы и их время в статистику текущего HTTP-запроса.
+Запросы группируются по «форме» — тексту SQL без литералов и с одним
+плейсхолдером вместо списков IN. Если одна форма выполняется больше
+SQL_REPEAT_WARN_THRESHOLD раз за запрос, это почти наверняка N+1: пишем предупреждение.
+Сводка по маршрутам хранится в памяти процесса (см. get_offenders).
+Общее число и время запросов (в том числе вне HTTP-запросов) идут в metrics.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "1") == "1"
+# Порог повторов одной формы запроса за HTTP-запрос для предупреждения о N+1
+SQL_REPEAT_WARN_THRESHOLD = int(os.getenv("SQL_REPEAT_WARN_THRESHOLD", "10"))
+# Сколько форм запросов хранить в сводке по каждому маршруту
+SQL_STATS_SHAPES_PER_ROUTE = int(os.getenv("SQL_STATS_SHAPES_PER_ROUTE", "20"))
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Текст SQL без литералов и параметров: одинаковые запросы с разными значениями совпадают."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _PLACEHOLDER_LIST.sub("(?)", shape)
+
+
+class RequestQueryStats:
+    """Запросы одного HTTP-запроса: количество, время и разбивка по формам."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # форма -> [количество, суммарное время]
+        self.shapes: dict[str, list] = {}
+
+    def add(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        entry = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+
+    def repeated(self, threshold: int) -> list[tuple[str, int, float]]:
+        """Формы, выполненные больше threshold раз, по убыванию числа повторов."""
+        return sorted(
+            ((shape, count, duration) for shape, (count, duration) in self.shapes.items() if count > threshold),
+            key=lambda item: item[1], reverse=True
+        )
+
+
+# Статистика текущего HTTP-запроса: изменяемый объект, поэтому запросы из потока
+# пула (синхронные эндпоинты) и из run_sync попадают в него же
+_current: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def start_request() -> tuple[RequestQueryStats, object]:
+    stats = RequestQueryStats()
+    return stats, _current.set(stats)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Время начала хранится в контексте выполнения: запрос, упавший с ошибкой,
+    # не дойдет до after_cursor_execute, и ничего за собой не оставит
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started_at", None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    metrics.DB_QUERIES.inc()
+    metrics.DB_QUERY_DURATION.observe(duration)
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, duration)
+
+
+class RouteStats:
+    """Накопленная статистика маршрута."""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.duration = 0.0
+        # форма -> [запросов всего, максимум за один HTTP-запрос, суммарное время]
+        self.shapes: dict[str, list] = {}
+
+    def add(self, stats: RequestQueryStats):
+        self.requests += 1
+        self.queries += stats.count
+        self.max_queries = max(self.max_queries, stats.count)
+        self.duration += stats.duration
+        for shape, (count, duration) in stats.shapes.items():
+            entry = self.shapes.setdefault(shape, [0, 0, 0.0])
+            entry[0] += count
+            entry[1] = max(entry[1], count)
+            entry[2] += duration
+        if len(self.shapes) > SQL_STATS_SHAPES_PER_ROUTE * 2:
+            # Оставляем самые частые формы
+            top = sorted(self.shapes.items(), key=lambda item: item[1][1], reverse=True)
+            self.shapes = dict(top[:SQL_STATS_SHAPES_PER_ROUTE])
+
+
+_routes_lock = threading.Lock()
+_routes: dict[str, RouteStats] = {}
+
+
+def record(route: str, stats: RequestQueryStats):
+    """Добавляет статистику HTTP-запроса в сводку и предупреждает о повторяющихся запросах."""
+    with _routes_lock:
+        _routes.setdefault(route, RouteStats()).add(stats)
+    for shape, count, duration in stats.repeated(SQL_REPEAT_WARN_THRESHOLD):
+        logger.warning(
+            "%s: запрос выполнен %d раз (%.1f мс), возможен N+1: %s",
+            route, count, duration * 1000, shape[:300]
+        )
+
+
+def get_offenders(limit: int = 10) -> list[dict]:
+    """Маршруты с наибольшим средним числом запросов и их самые повторяющиеся запросы."""
+    with _routes_lock:
+        routes = list(_routes.items())
+        result = []
+        for route, stats in routes:
+            shapes = sorted(stats.shapes.items(), key=lambda item: item[1][1], reverse=True)
+            result.append({
+                "route": route,
+                "requests": stats.requests,
+                "avg_queries": round(stats.queries / stats.requests, 2),
+                "max_queries": stats.max_queries,
+                "avg_db_ms": round(stats.duration / stats.requests * 1000, 2),
+                "top_statements": [
+                    {
+                        "statement": shape,
+                        "total": total,
+                        "max_per_request": max_per_request,
+                        "total_ms": round(duration * 1000, 2),
+                    }
+                    for shape, (total, max_per_request, duration) in shapes[:5]
+                ],
+            })
+    result.sort(key=lambda item: item["avg_queries"], reverse=True)
+    return result[:limit]
+
+
+def reset():
+    with _routes_lock:
+        _routes.clear()
+
+
+def server_timing(stats: RequestQueryStats, total: float) -> str:
+    """Значение заголовка Server-Timing: время в БД и полное время обработки."""
+    return f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={total * 1000:.1f}'
@@ -0,0 +1,32 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.encoders import decimal_encoder
+from fastapi.responses import JSONResponse
+
+
+def _orjson_default(obj: Any):
+    """
+    Сериализация типов, которые orjson не поддерживает из коробки.
+    Поля Decimal из response_model приходят сюда уже строками (Pydantic в режиме JSON),
+    а "сырые" Decimal кодируем так же, как jsonable_encoder — числом,
+    чтобы формат сумм и количеств в ответах не менялся.
+    """
+    if isinstance(obj, Decimal):
+        return decimal_encoder(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Ответ, сериализуемый через orjson вместо стандартного json.dumps.
+    Подключается явно (default_response_class роутера или response_class эндпоинта)
+    для эндпоинтов с большими ответами: планы, позиции, справочники, исполнение.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,27 @@
+# Сворачивание букв для поиска: ё -> е и казахские буквы -> ближайшие русские,
+# чтобы "Қонаев", "конаев" и "ҚОНАЕВ" находились одинаково
+_FOLD_TABLE = str.maketrans({
+    "ё": "е",
+    "ә": "а",
+    "ғ": "г",
+    "қ": "к",
+    "ң": "н",
+    "ө": "о",
+    "ұ": "у",
+    "ү": "у",
+    "һ": "х",
+    "і": "и",
+})
+
+
+def normalize_search_text(value: str | None) -> str:
+    """Нормализует строку для поиска: casefold, сворачивание букв, схлопывание пробелов."""
+    if not value:
+        return ""
+    return " ".join(value.casefold().translate(_FOLD_TABLE).split())
+
+
+def build_search_text(*values: str | None) -> str | None:
+    """Собирает нормализованную поисковую строку из нескольких полей записи."""
+    text = normalize_search_text(" ".join(v for v in values if v))
+    return text or None
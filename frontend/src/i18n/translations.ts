@@ -20,6 +20,7 @@ export const translations = {
     dashboard_title: 'Мои сметы закупок',
     no_plans_found: 'Сметы не найдены.',
     no_plans_found_total: 'Сметы не найдены.',
+    load_more_plans: 'Загрузить еще',
     smeta_id: 'ID',
     smeta_year: 'Год',
     smeta_amount: 'Сумма',
@@ -237,6 +238,7 @@ export const translations = {
     dashboard_title: 'Менің сатып алу сметаларым',
     no_plans_found: 'Сметалар табылмады.',
     no_plans_found_total: 'Сметалар табылмады.',
+    load_more_plans: 'Тағы жүктеу',
     smeta_id: 'ID',
     smeta_year: 'Жылы',
     smeta_amount: 'Сомасы',
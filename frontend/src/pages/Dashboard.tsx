@@ -1,4 +1,4 @@
-import React, { useEffect, useState, Fragment, useMemo } from 'react';
+import React, { useEffect, useState, Fragment, useMemo, useCallback } from 'react';
 import {
   Box, Button, Typography, Paper, CircularProgress, Alert,
   Table, TableBody, TableCell, TableContainer, TableHead, TableRow, IconButton,
@@ -15,10 +15,10 @@ import { useNavigate } from 'react-router-dom';
 import { useTranslation } from '../i18n/index.tsx';
 import Header from '../components/Header';
 import {
-  getPlans, deletePlan, createPlan, createVersion, deleteLatestVersion, exportVersionToExcel,
+  getPlanSummaries, getPlanVersions, deletePlan, createPlan, createVersion, deleteLatestVersion, exportVersionToExcel,
   PlanStatus
 } from '../services/api';
-import type { ProcurementPlan, ProcurementPlanVersion } from '../services/api';
+import type { ProcurementPlanSummary, ProcurementPlanVersion } from '../services/api';
 import { format } from 'date-fns';
 
 // Helper function to format currency
@@ -37,18 +37,20 @@ const getStatusChipColor = (status: PlanStatus, isExecuted: boolean) => {
 };
 
 // Row component for the main plan table
-const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlan; onReload: () => void; }) => {
+const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlanSummary; onReload: () => void; }) => {
   const { t } = useTranslation();
   const navigate = useNavigate();
   const [open, setOpen] = useState(false);
+  // История версий загружается при первом раскрытии строки
+  const [versions, setVersions] = useState<ProcurementPlanVersion[] | null>(null);
   const [isErrorDialogOpen, setErrorDialogOpen] = useState(false);
   const [errorDialogMessage, setErrorDialogMessage] = useState('');
 
-  const handleError = (err: any, defaultMessage: string) => {
+  const handleError = useCallback((err: any, defaultMessage: string) => {
     const message = err.response?.data?.detail || defaultMessage;
     setErrorDialogMessage(message);
     setErrorDialogOpen(true);
-  };
+  }, []);
 
   const handleCreateNewVersion = async () => {
     if (window.confirm(t('confirm_create_version'))) {
@@ -83,15 +85,35 @@ const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlan; onReloa
     }
   };
 
-  const activeVersion = plan.versions.find(v => v.is_active);
-  const canDeletePlan = !plan.versions.some(v => v.status !== PlanStatus.DRAFT);
-  const isExecuted = activeVersion?.is_executed || false;
+  const loadVersions = useCallback(async () => {
+    try {
+      setVersions(await getPlanVersions(plan.id));
+    } catch (err) {
+      setOpen(false);
+      handleError(err, t('error_loading_plans'));
+    }
+  }, [plan.id, t, handleError]);
+
+  // После перезагрузки списка сводка плана новая: история версий сбрасывается
+  useEffect(() => {
+    setVersions(null);
+  }, [plan]);
+
+  // История загружается, когда строка раскрыта, а версий еще нет (первое раскрытие или сброс выше)
+  useEffect(() => {
+    if (open && versions === null) loadVersions();
+  }, [open, versions, loadVersions]);
+
+  const handleToggle = () => setOpen(!open);
+
+  const canDeletePlan = !plan.has_approved_versions;
+  const isExecuted = plan.is_executed;
 
   return (
     <Fragment>
       <TableRow sx={{ '& > *': { borderBottom: 'unset' } }}>
         <TableCell>
-          <IconButton aria-label="expand row" size="small" onClick={() => setOpen(!open)}>
+          <IconButton aria-label="expand row" size="small" onClick={handleToggle}>
             {open ? <KeyboardArrowUpIcon /> : <KeyboardArrowDownIcon />}
           </IconButton>
         </TableCell>
@@ -114,15 +136,15 @@ const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlan; onReloa
         </TableCell>
         <TableCell>
           <Chip
-            label={isExecuted ? t('status_EXECUTED') : t(`status_${activeVersion?.status}`)}
-            color={getStatusChipColor(activeVersion?.status || PlanStatus.DRAFT, isExecuted)}
+            label={isExecuted ? t('status_EXECUTED') : t(`status_${plan.status}`)}
+            color={getStatusChipColor(plan.status || PlanStatus.DRAFT, isExecuted)}
             size="small"
             icon={isExecuted ? <CheckCircleIcon /> : undefined}
           />
         </TableCell>
-        <TableCell>{formatCurrency(activeVersion?.total_amount || 0)}</TableCell>
+        <TableCell>{formatCurrency(plan.total_amount)}</TableCell>
         <TableCell align="right">
-          {activeVersion?.status === PlanStatus.DRAFT ? (
+          {plan.status === PlanStatus.DRAFT ? (
             <Tooltip title={t('edit_draft')}>
               <IconButton size="small" onClick={() => navigate(`/plans/${plan.id}`)}>
                 <EditIcon />
@@ -136,7 +158,7 @@ const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlan; onReloa
             </Tooltip>
           )}
           
-          {activeVersion?.status !== PlanStatus.DRAFT && (
+          {plan.status !== PlanStatus.DRAFT && (
             <Tooltip title={t('create_new_version_tooltip')}>
               <IconButton size="small" color="primary" onClick={handleCreateNewVersion}>
                 <FileCopyIcon />
@@ -144,7 +166,7 @@ const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlan; onReloa
             </Tooltip>
           )}
 
-          {activeVersion?.status === PlanStatus.DRAFT && activeVersion.version_number > 1 && (
+          {plan.status === PlanStatus.DRAFT && (plan.active_version_number || 0) > 1 && (
             <Tooltip title={t('delete_draft_version_tooltip')}>
               <IconButton size="small" color="secondary" onClick={handleDeleteLatest}>
                 <RestoreFromTrashIcon />
@@ -165,6 +187,7 @@ const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlan; onReloa
           <Collapse in={open} timeout="auto" unmountOnExit>
             <Box sx={{ margin: 1 }}>
               <Typography variant="h6" gutterBottom component="div">{t('versions_history')}</Typography>
+              {versions === null && <CircularProgress size={24} />}
               <Table size="small" aria-label="versions">
                 <TableHead>
                   <TableRow>
@@ -177,7 +200,7 @@ const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlan; onReloa
                   </TableRow>
                 </TableHead>
                 <TableBody>
-                  {plan.versions.map((version) => (
+                  {(versions || []).map((version) => (
                     <TableRow key={version.id}>
                       <TableCell>
                         <Typography variant="body2" fontWeight={version.is_active ? "bold" : "normal"}>
@@ -222,9 +245,12 @@ const PlanRow = React.memo(({ plan, onReload }: { plan: ProcurementPlan; onReloa
 export default function Dashboard() {
   const { t } = useTranslation();
   const navigate = useNavigate();
-  const [plans, setPlans] = useState<ProcurementPlan[]>([]);
+  const [plans, setPlans] = useState<ProcurementPlanSummary[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  // Курсор следующей страницы сводок; null — загружены все планы
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [isCreateDialogOpen, setCreateDialogOpen] = useState(false);
   const [newPlanName, setNewPlanName] = useState('');
   const [newPlanYear, setNewPlanYear] = useState(new Date().getFullYear());
@@ -237,8 +263,10 @@ export default function Dashboard() {
     try {
       setLoading(true);
       setError('');
-      const data = await getPlans();
-      setPlans(data.sort((a, b) => b.id - a.id));
+      // Сервер отдает сводки уже отсортированными: новые планы первыми
+      const page = await getPlanSummaries();
+      setPlans(page.items);
+      setNextCursor(page.next_cursor);
     } catch (err) {
       setError(t('error_loading_plans'));
       console.error(err);
@@ -247,6 +275,21 @@ export default function Dashboard() {
     }
   };
 
+  const loadMorePlans = async () => {
+    if (nextCursor === null) return;
+    try {
+      setLoadingMore(true);
+      const page = await getPlanSummaries(nextCursor);
+      setPlans(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError(t('error_loading_plans'));
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     loadPlans();
   }, [t]);
@@ -293,16 +336,15 @@ export default function Dashboard() {
     if (currentTab === 0) return filtered;
 
     return filtered.filter(plan => {
-        const activeVersion = plan.versions.find(v => v.is_active);
-        if (!activeVersion) return false;
+        if (plan.active_version_id === null) return false;
 
-        if (currentTab === 4) return activeVersion.is_executed;
-        if (activeVersion.is_executed) return false; // Executed plans shouldn't appear in other tabs
+        if (currentTab === 4) return plan.is_executed;
+        if (plan.is_executed) return false; // Executed plans shouldn't appear in other tabs
 
         switch (currentTab) {
-            case 1: return activeVersion.status === PlanStatus.DRAFT;
-            case 2: return activeVersion.status === PlanStatus.PRE_APPROVED;
-            case 3: return activeVersion.status === PlanStatus.APPROVED;
+            case 1: return plan.status === PlanStatus.DRAFT;
+            case 2: return plan.status === PlanStatus.PRE_APPROVED;
+            case 3: return plan.status === PlanStatus.APPROVED;
             default: return true;
         }
     });
@@ -380,6 +422,14 @@ export default function Dashboard() {
                 )}
               </TableBody>
             </Table>
+            {/* Вкладки и поиск работают по загруженным страницам */}
+            {nextCursor !== null && (
+              <Box sx={{ display: 'flex', justifyContent: 'center', p: 2 }}>
+                <Button variant="outlined" onClick={loadMorePlans} disabled={loadingMore}>
+                  {loadingMore ? <CircularProgress size={20} /> : t('load_more_plans')}
+                </Button>
+              </Box>
+            )}
           </TableContainer>
         )}
       </Box>
@@ -2,7 +2,7 @@ import axios from 'axios';
 import type { 
     Mkei, Kato, Agsk, CostItem, SourceFunding, Enstru, UserLookup,
     NeedType, PlanItemVersion, ProcurementPlanVersion, ProcurementPlan, PlanItemPayload,
-    Execution, ExecutionPayload
+    Execution, ExecutionPayload, ProcurementPlanSummary, ProcurementPlanSummaryPage
 } from './api.types';
 import { PlanStatus } from './api.types';
 
@@ -50,11 +50,15 @@ export const checkKtp = (enstruCode: string): Promise<{ is_ktp: boolean }> => ap
 
 // --- API для Планов (ProcurementPlan) ---
 export const getPlans = (): Promise<ProcurementPlan[]> => api.get('/plans/').then(res => res.data);
+// Одна страница сводок; следующую запрашивают с before_id = next_cursor
+export const getPlanSummaries = (before_id?: number): Promise<ProcurementPlanSummaryPage> =>
+  api.get('/plans/summary', { params: { before_id, limit: 50 } }).then(res => res.data);
 export const getPlanById = (planId: number): Promise<ProcurementPlan> => api.get(`/plans/${planId}`).then(res => res.data);
 export const createPlan = (data: { plan_name: string; year: number }): Promise<ProcurementPlan> => api.post('/plans/', data).then(res => res.data);
 export const deletePlan = (planId: number): Promise<void> => api.delete(`/plans/${planId}`);
 
 // --- API для Версий Плана (ProcurementPlanVersion) ---
+export const getPlanVersions = (planId: number): Promise<ProcurementPlanVersion[]> => api.get(`/plans/${planId}/versions`).then(res => res.data);
 export const createVersion = (planId: number): Promise<ProcurementPlanVersion> => api.post(`/plans/${planId}/versions`).then(res => res.data);
 export const updateVersionStatus = (planId: number, status: PlanStatus): Promise<ProcurementPlanVersion> =>
   api.patch(`/plans/${planId}/versions/active/status`, { status }).then(res => res.data);
@@ -134,5 +138,5 @@ export { PlanStatus };
 export type { 
     Mkei, Kato, Agsk, CostItem, SourceFunding, Enstru, UserLookup,
     NeedType, PlanItemVersion, ProcurementPlanVersion, ProcurementPlan, PlanItemPayload,
-    Execution, ExecutionPayload
+    Execution, ExecutionPayload, ProcurementPlanSummary, ProcurementPlanSummaryPage
 };
@@ -101,6 +101,30 @@ export interface ProcurementPlan {
   versions: ProcurementPlanVersion[];
 }
 
+// Строка списка планов: показатели активной версии считаются на сервере
+export interface ProcurementPlanSummary {
+  id: number;
+  plan_name: string;
+  year: number;
+  created_by: number;
+  created_at: string;
+  active_version_id: number | null;
+  active_version_number: number | null;
+  status: PlanStatus | null;
+  is_executed: boolean;
+  items_count: number;
+  total_amount: number;
+  executed_amount: number;
+  executed_percent: number;
+  versions_count: number;
+  has_approved_versions: boolean;
+}
+
+export interface ProcurementPlanSummaryPage {
+  items: ProcurementPlanSummary[];
+  next_cursor: number | null;
+}
+
 export interface PlanItemPayload {
   trucode: string;
   unit_id?: number;